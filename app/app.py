@@ -2,46 +2,152 @@ import base64
 import io
 import json
 import logging
+import os
 import re
 import subprocess
 import time
-from umap import UMAP
+from startup import startup_profile
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from gensim.models.coherencemodel import CoherenceModel
-from gensim.corpora.dictionary import Dictionary
 import numpy as np
-from flask import Flask, request, jsonify, send_file, render_template
-import nltk
-from nltk.corpus import stopwords
-import psutil
-from nltk import word_tokenize
-from nltk.collocations import BigramCollocationFinder
-from nltk.sentiment import SentimentIntensityAnalyzer
-from wordcloud import WordCloud
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import LatentDirichletAllocation, NMF, TruncatedSVD, PCA
-from bertopic import BERTopic
-from sentence_transformers import SentenceTransformer
-from textblob import TextBlob
-from transformers import pipeline, AutoTokenizer
-import ollama
+from flask import Flask, Response, g, request, jsonify, send_file, render_template
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
 from tqdm import tqdm
-
-# Download required NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('vader_lexicon', quiet=True)
-nltk.download('stopwords', quiet=True)
+from nltk_resources import configure_nltk_data, english_stopwords, nltk_word_tokenize
+from dataset_store import DatasetStore, DatasetNotFound, compute_dataset_id, spool_upload
+from profiling import StreamingProfiler
+from embedding_cache import EmbeddingStore
+from model_registry import ModelRegistry, parse_preload_spec
+from vector_index import VectorIndexCache
+from llm_inference import LLMBatchRunner, DEFAULT_PARALLELISM, DEFAULT_PACK_SIZE
+from llm_cache import LLMLabelCache, label_cache_key
+from jobs import JobManager, JobManagerClosed, parse_concurrency_spec, report_progress
+from topic_sweep import run_topic_sweep, DEFAULT_SWEEP_JOBS
+from topic_store import (
+    TopicModelStore, TopicModelNotFound, TOPIC_MODEL_METHODS, VOCABULARY_MODES, DEFAULT_HASH_FEATURES
+)
+from coherence import CoherenceIndex, COHERENCE_MEASURES
+from text_artifacts import TextArtifactCache, column_texts
+from collocations import top_collocations, COLLOCATION_MEASURES, DEFAULT_COLLOCATION_JOBS
+from wordcloud_render import WordCloudRenderer, PREVIEW_SIZE, PREVIEW_MAX_WORDS
+from bertopic_stages import BERTopicStageCache
+from result_store import (
+    ResultStore, ResultSet, ResultNotFound, DEFAULT_INLINE_ROWS, DEFAULT_PAGE_ROWS, MAX_PAGE_ROWS, EXPORT_FORMATS
+)
+from projection import project_2d, DEFAULT_POINT_BUDGET
+from charts import ChartService, CHART_FORMATS, line_chart, scatter_chart, sentiment_chart
+from dl_sentiment import (
+    SentimentEngine, DL_BACKENDS, DEFAULT_DL_BACKEND, DEFAULT_TOKEN_BUDGET, DEFAULT_MAX_BATCH_SIZE
+)
+from sentiment_engine import (
+    score_texts, label_scores, summarize_sentiment, RULE_BASED_MODELS, DEFAULT_SENTIMENT_JOBS
+)
+from metrics import (
+    MetricsRegistry, SystemSampler, DEFAULT_TIMING_HEADER, current_timing, span, start_timing, stop_timing, timed
+)
+
+# Heavy backends (BERTopic, sentence-transformers, torch, matplotlib, ollama,
+# ...) are imported by the code that uses them, on first use.
+startup_profile.mark("imports")
+
+# NLTK resources resolve from SS_NLTK_DATA first and are only downloaded
+# when missing, on first use
+configure_nltk_data()
+startup_profile.mark("nltk_data")
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # Request bodies are parsed and responses encoded as timed stages.
+    def loads(self, s, **kwargs):
+        with span("decode"):
+            return super().loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        with span("serialize"):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
-
-vader_analyzer = SentimentIntensityAnalyzer()
-
-# Cache for transformer-based sentiment analysis pipelines
-loaded_pipelines = {}
+app.json = TimedJSONProvider(app)
+
+# Shared cache for sentence-transformers, sentiment pipelines and tokenizers.
+# SS_MODEL_CACHE_MB bounds the estimated memory of loaded models.
+model_registry = ModelRegistry()
+
+# Parsed uploads keyed by content hash, shared by all /process/* routes
+dataset_store = DatasetStore()
+
+# CSV uploads at or above this size are ingested and profiled in chunks
+STREAMING_UPLOAD_THRESHOLD = int(os.environ.get("SS_STREAMING_THRESHOLD", 64 * 1024 ** 2))
+STREAMING_CHUNK_ROWS = int(os.environ.get("SS_STREAMING_CHUNK_ROWS", 50000))
+
+# Sentence embeddings keyed by (model, text hash), persisted as float16 shards
+embedding_store = EmbeddingStore()
+
+# Normalised embedding matrices per (dataset, column, model) for semantic search
+vector_indexes = VectorIndexCache()
+
+# LLM labels keyed by (model, prompt version, aspect, text hash). Bump a
+# prompt version whenever its template changes so stale labels are not reused.
+llm_label_cache = LLMLabelCache()
+ABSA_PROMPT_VERSION = "absa-v1"
+ZERO_SHOT_PROMPT_VERSION = "zero-shot-v1"
+
+# Tokenized columns (token codes, vocabulary, count matrix) per
+# (dataset, column, tokenizer), shared by the word cloud and topic routes
+text_artifacts = TextArtifactCache()
+dataset_store.on_evict(text_artifacts.drop_dataset)
+
+# BERTopic UMAP/HDBSCAN stages and reduced topic models per
+# (dataset, column, embedding model, UMAP params)
+bertopic_stages = BERTopicStageCache()
+dataset_store.on_evict(bertopic_stages.drop_dataset)
+
+# Per-row sentiment/ABSA/zero-shot results as columns, paged and exported
+# from /results/<id>
+result_store = ResultStore()
+
+# Rendered word cloud PNGs keyed by a hash of their inputs, served by ID
+wordcloud_renderer = WordCloudRenderer()
+
+# Charts drawn with the Figure API on a thread pool (no pyplot state)
+chart_service = ChartService()
+
+# Persisted LDA/NMF/LSA models that can be updated with new rows
+topic_model_store = TopicModelStore()
+
+# Background jobs for long-running analyses, capped per job type (keyed by URL rule)
+JOB_TYPES = {
+    "/process/absa": "llm",
+    "/process/zero_shot_sentiment": "llm",
+    "/process/topic_modeling": "topic_modeling",
+    "/process/sentiment": "sentiment",
+    "/process/wordcloud": "wordcloud",
+    "/process/semantic_wordcloud": "wordcloud",
+    "/topic_models": "topic_modeling",
+    "/topic_models/<model_id>/update": "topic_modeling",
+    "/topic_models/<model_id>/transform": "topic_modeling"
+}
+job_manager = JobManager(
+    limits=parse_concurrency_spec(os.environ.get("SS_JOB_CONCURRENCY", "llm=1,topic_modeling=2,sentiment=2,wordcloud=4"))
+)
+
+# Per-route latency and per-stage timing histograms served at /metrics,
+# along with cache, queue and memory gauges collected when scraped
+metrics_registry = MetricsRegistry()
+request_seconds = metrics_registry.histogram(
+    "ss_request_seconds", "Time to build the response, by route.", ("route",)
+)
+stage_seconds = metrics_registry.histogram(
+    "ss_stage_seconds", "Time spent in each pipeline stage, by route.", ("route", "stage")
+)
+requests_total = metrics_registry.counter("ss_requests_total", "Requests handled, by route and status.", ("route", "status"))
+
+# CPU/RAM sampled in the background for /system_stats and /metrics
+system_sampler = SystemSampler()
+
+# Set by serve.py: an AnalysisPool that runs CPU-heavy routes in forked
+# worker processes. None under `python app.py`, where every route runs here.
+analysis_pool = None
+startup_profile.mark("stores")
 
 def is_ollama_running():
     try:
@@ -66,6 +172,7 @@ def check_ai_readiness():
             "error": "Ollama is not running or not found in PATH."
         })
     try:
+        import ollama
         model_data = str(ollama.list())
         pattern = r"model='(.*?)'"
         models = re.findall(pattern, model_data)
@@ -82,90 +189,183 @@ def check_ai_readiness():
             "error": f"Error fetching Ollama models: {e}"
         })
 
-def get_dl_pipeline(model_name: str, max_length: int = 512):
-    if model_name not in loaded_pipelines:
-        try:
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            loaded_pipelines[model_name] = pipeline(
-                "sentiment-analysis",
-                model=model_name,
-                tokenizer=tokenizer,
-                truncation=True,
-                max_length=max_length
-            )
-        except Exception as e:
-            raise ValueError(f"Error loading model '{model_name}': {str(e)}")
-    return loaded_pipelines[model_name]
+def load_sentiment_engine(model_name, backend=DEFAULT_DL_BACKEND, max_length=512):
+    tokenizer = model_registry.get("tokenizer", model_name)
+    return SentimentEngine(model_name, tokenizer, backend=backend, max_length=max_length)
+
+def load_sentence_transformer(name):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+def load_tokenizer(name):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(name)
+
+model_registry.register_loader("sentence-transformer", load_sentence_transformer)
+model_registry.register_loader("tokenizer", load_tokenizer)
+model_registry.register_loader("sentiment", load_sentiment_engine)
+
+# e.g. SS_PRELOAD_MODELS="sentence-transformer:all-MiniLM-L6-v2,sentiment:distilbert-base-uncased-finetuned-sst-2-english"
+model_warmup = model_registry.preload(parse_preload_spec(os.environ.get("SS_PRELOAD_MODELS", "")))
+startup_profile.mark("model_preload")
+
+def get_sentiment_engine(model_name: str, backend: str = DEFAULT_DL_BACKEND, max_length: int = 512):
+    # Default settings share the registry key used by SS_PRELOAD_MODELS.
+    kwargs = {}
+    if backend != DEFAULT_DL_BACKEND:
+        kwargs["backend"] = backend
+    if max_length != 512:
+        kwargs["max_length"] = max_length
+    try:
+        return model_registry.get("sentiment", model_name, **kwargs)
+    except Exception as e:
+        raise ValueError(f"Error loading model '{model_name}': {str(e)}")
+
+def compute_column_stats(df):
+    stats = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            stats[col] = {
+                'type': 'Numeric',
+                'mean': float(df[col].mean()),
+                'stdDev': float(df[col].std())
+            }
+        else:
+            series_str = df[col].astype(str)
+            lengths = series_str.str.len()
+            stats[col] = {
+                'type': 'Textual',
+                'avgLen': float(lengths.mean()),
+                'maxLen': int(lengths.max()),
+                'minLen': int(lengths.min()),
+                'uniqueCount': int(series_str.nunique())
+            }
+    return stats
+
+def read_frame_from_bytes(data_bytes, file_type):
+    stream = io.BytesIO(data_bytes)
+    with span("parse"):
+        if file_type == "csv":
+            return pd.read_csv(stream)
+        elif file_type == "xlsx":
+            return pd.read_excel(stream)
+    raise ValueError(f"Unsupported file type '{file_type}'.")
 
 def parse_csv_from_bytes(data_bytes):
     try:
-        stream = io.BytesIO(data_bytes)
-        df = pd.read_csv(stream)
-        stats = {}
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                stats[col] = {
-                    'type': 'Numeric',
-                    'mean': float(df[col].mean()),
-                    'stdDev': float(df[col].std())
-                }
-            else:
-                series_str = df[col].astype(str)
-                lengths = series_str.str.len()
-                stats[col] = {
-                    'type': 'Textual',
-                    'avgLen': float(lengths.mean()),
-                    'maxLen': int(lengths.max()),
-                    'minLen': int(lengths.min()),
-                    'uniqueCount': int(series_str.nunique())
-                }
-        return df, stats
+        df = read_frame_from_bytes(data_bytes, "csv")
+        return df, compute_column_stats(df)
     except Exception as e:
         raise ValueError(f"Error processing CSV: {str(e)}")
 
 def parse_xlsx_from_bytes(data_bytes):
     try:
-        stream = io.BytesIO(data_bytes)
-        df = pd.read_excel(stream)
-        stats = {}
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                stats[col] = {
-                    'type': 'Numeric',
-                    'mean': float(df[col].mean()),
-                    'stdDev': float(df[col].std())
-                }
-            else:
-                series_str = df[col].astype(str)
-                lengths = series_str.str.len()
-                stats[col] = {
-                    'type': 'Textual',
-                    'avgLen': float(lengths.mean()),
-                    'maxLen': int(lengths.max()),
-                    'minLen': int(lengths.min()),
-                    'uniqueCount': int(series_str.nunique())
-                }
-        return df, stats
+        df = read_frame_from_bytes(data_bytes, "xlsx")
+        return df, compute_column_stats(df)
     except Exception as e:
         raise ValueError(f"Error processing XLSX: {str(e)}")
 
-def generate_word_cloud(word_freq, max_words=500):
-    wc = WordCloud(
-        width=1500,
-        height=1500,
-        max_words=max_words,
-        background_color="white"
-    ).generate_from_frequencies(word_freq)
-    img_buffer = io.BytesIO()
-    wc.to_image().save(img_buffer, format="PNG")
-    img_buffer.seek(0)
-    img_b64 = base64.b64encode(img_buffer.read()).decode("utf-8")
-    data_uri = f"data:image/png;base64,{img_b64}"
-    return data_uri
+def ingest_csv_stream(path, dataset_id, chunk_rows=STREAMING_CHUNK_ROWS):
+    # Reads the CSV chunk by chunk, feeding each chunk to the profiler and the
+    # Parquet writer, so memory stays bounded by the chunk size.
+    profiler = StreamingProfiler()
+
+    def profiled_chunks():
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=str):
+            profiler.update(chunk)
+            yield chunk
+
+    try:
+        with span("parse"):
+            dataset_store.put_chunks(dataset_id, profiled_chunks())
+    except Exception as e:
+        raise ValueError(f"Error processing CSV: {str(e)}")
+    return profiler.stats()
+
+def resolve_dataset_id(params):
+    """
+    Return the dataset ID for an analysis request. Clients normally send the
+    `datasetId` returned by /upload; an inline `base64` payload is still
+    accepted and is converted once into the dataset store so repeats skip
+    parsing.
+    """
+    dataset_id = params.get("datasetId")
+    if dataset_id:
+        return dataset_id
+    data_b64 = params.get("base64")
+    if not data_b64:
+        raise ValueError("Must provide 'datasetId' or 'base64'.")
+    with span("decode"):
+        data_bytes = base64.b64decode(data_b64)
+    dataset_id = compute_dataset_id(data_bytes)
+    if dataset_id not in dataset_store:
+        file_type = params.get("fileType", "csv").lower()
+        dataset_store.put(dataset_id, read_frame_from_bytes(data_bytes, file_type))
+    return dataset_id
+
+def load_column(params, column):
+    # Raises KeyError if the column does not exist.
+    return dataset_store.get_column(resolve_dataset_id(params), column)
+
+def word_cloud_images(word_freq, max_words, params):
+    """
+    Render (or reuse) the word cloud for word_freq and return its response
+    fields: `imageId`/`imageUrl` of the full-size PNG and, unless
+    `inlineImage` is false, the image as a data URI. With `preview` the
+    inline image is a small, fast preview and the full size is rendered in
+    the background for /wordcloud_images.
+    """
+    options = {
+        "background_color": params.get("backgroundColor", "white"),
+        "colormap": params.get("colormap") or None
+    }
+    fields = {}
+    if params.get("preview", False):
+        image_id, _ = wordcloud_renderer.submit(word_freq, max_words=max_words, **options)
+        with span("render"):
+            _, png = wordcloud_renderer.render(
+                word_freq, max_words=min(max_words, PREVIEW_MAX_WORDS), width=PREVIEW_SIZE, height=PREVIEW_SIZE,
+                **options
+            )
+        fields["preview"] = True
+    else:
+        with span("render"):
+            image_id, png = wordcloud_renderer.render(word_freq, max_words=max_words, **options)
+    fields["imageId"] = image_id
+    fields["imageUrl"] = f"/wordcloud_images/{image_id}"
+    if params.get("inlineImage", True):
+        with span("serialize"):
+            fields["image"] = "data:image/png;base64," + base64.b64encode(png).decode("utf-8")
+    return fields
+
+def result_fields(params, result):
+    """
+    Store a run's per-row results and return the response fields pointing
+    at them. The rows are also returned inline as `results` when
+    `inlineResults` is true, which is the default for runs of at most
+    SS_INLINE_RESULT_ROWS rows.
+    """
+    with span("serialize"):
+        result_id = result_store.put(result)
+    fields = {
+        "resultId": result_id,
+        "resultsUrl": f"/results/{result_id}",
+        "exportUrl": f"/results/{result_id}/export",
+        "rowCount": len(result)
+    }
+    inline = params.get("inlineResults")
+    if inline is None:
+        inline = len(result) <= DEFAULT_INLINE_ROWS
+    if inline:
+        columns = result.columns(texts=dataset_store.get_column(result.dataset_id, result.column))
+        with span("serialize"):
+            fields["results"] = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return fields
 
 def compute_cosine_similarity(query_embedding, word_embeddings):
     if query_embedding.ndim != 2 or word_embeddings.ndim != 2:
         raise ValueError("Both query_embedding and word_embeddings must be 2D arrays.")
+    from sklearn.metrics.pairwise import cosine_similarity
     similarities = cosine_similarity(query_embedding, word_embeddings)[0]
     return similarities
 
@@ -180,27 +380,37 @@ def upload_file():
     file_obj = request.files['file']
     if file_obj.filename == '':
         return jsonify({"error": "No file selected."}), 400
+    filename = file_obj.filename.lower()
+    if not filename.endswith(('.csv', '.xlsx')):
+        return jsonify({
+            "message": f"{file_obj.filename} received. Only CSV and XLSX processing implemented."
+        }), 400
+    upload_path = None
     try:
-        file_bytes = file_obj.read()
-        filename = file_obj.filename.lower()
-        if filename.endswith('.csv'):
-            df, stats = parse_csv_from_bytes(file_bytes)
-            return jsonify({
-                "message": f"{file_obj.filename} processed successfully.",
-                "stats": stats
-            })
-        elif filename.endswith('.xlsx'):
-            df, stats = parse_xlsx_from_bytes(file_bytes)
-            return jsonify({
-                "message": f"{file_obj.filename} processed successfully.",
-                "stats": stats
-            })
-        else:
-            return jsonify({
-                "message": f"{file_obj.filename} received. Only CSV and XLSX processing implemented."
-            }), 400
+        dataset_id, upload_path, size = spool_upload(file_obj.stream, dataset_store.data_dir)
+        stats = dataset_store.get_stats(dataset_id)
+        if stats is None:
+            if filename.endswith('.csv') and size >= STREAMING_UPLOAD_THRESHOLD:
+                stats = ingest_csv_stream(upload_path, dataset_id)
+            else:
+                with open(upload_path, 'rb') as fh:
+                    file_bytes = fh.read()
+                if filename.endswith('.csv'):
+                    df, stats = parse_csv_from_bytes(file_bytes)
+                else:
+                    df, stats = parse_xlsx_from_bytes(file_bytes)
+                dataset_store.put(dataset_id, df)
+            dataset_store.put_stats(dataset_id, stats)
+        return jsonify({
+            "message": f"{file_obj.filename} processed successfully.",
+            "datasetId": dataset_id,
+            "stats": stats
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        if upload_path and os.path.exists(upload_path):
+            os.remove(upload_path)
 
 @app.route('/exportProject', methods=['POST'])
 def export_project():
@@ -233,24 +443,6 @@ def import_project():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-import base64
-import io
-import numpy as np
-import matplotlib.pyplot as plt
-from flask import request, jsonify
-from sklearn.decomposition import PCA, TruncatedSVD
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
-from tqdm import tqdm
-import nltk
-from nltk.corpus import stopwords
-from gensim.corpora.dictionary import Dictionary
-from gensim.models.coherencemodel import CoherenceModel
-# For BERTopic (if needed)
-from sentence_transformers import SentenceTransformer
-from umap import UMAP
-from bertopic import BERTopic
-
 @app.route('/process/topic_modeling', methods=['POST'])
 def process_topic_modeling():
     params = request.get_json()
@@ -258,8 +450,6 @@ def process_topic_modeling():
         return jsonify({"error": "No JSON payload"}), 400
 
     method = params.get("method", "lda").lower()
-    csv_b64 = params.get("base64")
-    file_type = params.get("fileType", "csv").lower()
     column = params.get("column")
     num_topics = int(params.get("numTopics", 5))
     remove_sw = params.get("stopwords", False)
@@ -267,74 +457,68 @@ def process_topic_modeling():
     embedding_model_name = params.get("embeddingModel", "")
     random_state = int(params.get("randomState", 42))
     coherence_analysis = params.get("coherence_analysis", False)
+    chart_format = params.get("chartFormat", "png")
+    max_points = int(params.get("maxPoints", DEFAULT_POINT_BUDGET))
 
-    if not csv_b64 or not column:
-        missing = [param for param in ["base64", "column"] if not params.get(param)]
+    if not (params.get("datasetId") or params.get("base64")) or not column:
+        missing = [param for param in ["datasetId", "column"] if not params.get(param)]
         return jsonify({"error": f"Must provide {', '.join(missing)}."}), 400
+    if chart_format not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format '{chart_format}'."}), 400
 
     try:
-        file_bytes = base64.b64decode(csv_b64)
-        if file_type == "xlsx":
-            df, _ = parse_xlsx_from_bytes(file_bytes)
-        elif file_type == "csv":
-            df, _ = parse_csv_from_bytes(file_bytes)
-        else:
-            return jsonify({"error": f"Unsupported file type '{file_type}'."}), 400
+        dataset_id = resolve_dataset_id(params)
+        series = dataset_store.get_column(dataset_id, column)
+    except DatasetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except KeyError:
+        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
     except Exception as e:
         return jsonify({"error": f"Error decoding file: {str(e)}"}), 400
 
-    if column not in df.columns:
-        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-
-    texts = df[column].astype(str).dropna().tolist()
+    texts = column_texts(series)
     if not texts:
         return jsonify({"error": "No valid rows in dataset."}), 400
 
+    def artifact(tokenizer):
+        return text_artifacts.get(dataset_id, column, tokenizer, lambda: texts)
+
     # Use NLTK stopwords if requested
-    user_stops = set(stopwords.words("english")) if remove_sw else set()
+    user_stops = set(english_stopwords()) if remove_sw else set()
     topic_labels = []
-    clustering_plot_data_uri = None
+    clustering_chart = None
+    clustering_points = None
     doc_topics = None  # For LDA, NMF, or LSA
 
     try:
+        if method in ["lda", "nmf", "lsa"]:
+            from sklearn.decomposition import LatentDirichletAllocation, NMF, TruncatedSVD
         if method == "lda":
-            vectorizer = CountVectorizer(
-                stop_words=list(user_stops) if remove_sw else None,
-                token_pattern=r"(?u)\b\w+\b"
-            )
-            X = vectorizer.fit_transform(texts)
-            vocab = vectorizer.get_feature_names_out()
+            X, vocab = artifact("regex").term_counts(user_stops)
             lda_model = LatentDirichletAllocation(n_components=num_topics, random_state=random_state)
-            lda_model.fit(X)
-            doc_topics = lda_model.transform(X)
+            with span("fit"):
+                lda_model.fit(X)
+                doc_topics = lda_model.transform(X)
             for comp in lda_model.components_:
                 top_indices = comp.argsort()[::-1][:words_per_topic]
                 top_words = [vocab[i] for i in top_indices]
                 topic_labels.append(f": {', '.join(top_words)}")
         elif method == "nmf":
-            vectorizer = TfidfVectorizer(
-                stop_words=list(user_stops) if remove_sw else None,
-                token_pattern=r"(?u)\b\w+\b"
-            )
-            X = vectorizer.fit_transform(texts)
-            vocab = vectorizer.get_feature_names_out()
+            X, vocab = artifact("regex").tfidf(user_stops)
             nmf_model = NMF(n_components=num_topics, random_state=random_state)
-            nmf_model.fit(X)
-            doc_topics = nmf_model.transform(X)
+            with span("fit"):
+                nmf_model.fit(X)
+                doc_topics = nmf_model.transform(X)
             for comp in nmf_model.components_:
                 top_indices = comp.argsort()[::-1][:words_per_topic]
                 top_words = [vocab[i] for i in top_indices]
                 topic_labels.append(f": {', '.join(top_words)}")
         elif method == "lsa":
-            vectorizer = TfidfVectorizer(
-                stop_words=list(user_stops) if remove_sw else None,
-                token_pattern=r"(?u)\b\w+\b"
-            )
-            X = vectorizer.fit_transform(texts)
-            vocab = vectorizer.get_feature_names_out()
+            X, vocab = artifact("regex").tfidf(user_stops)
             svd_model = TruncatedSVD(n_components=num_topics, random_state=random_state)
-            svd_model.fit(X)
-            doc_topics = svd_model.transform(X)
+            with span("fit"):
+                svd_model.fit(X)
+                doc_topics = svd_model.transform(X)
             for row in svd_model.components_:
                 top_indices = row.argsort()[::-1][:words_per_topic]
                 top_words = [vocab[i] for i in top_indices]
@@ -342,63 +526,64 @@ def process_topic_modeling():
         elif method == "bertopic":
             # For BERTopic, optionally remove stop words if requested.
             if remove_sw:
-                texts_processed = [
-                    " ".join([w for w in nltk.word_tokenize(text) if w.lower() not in user_stops])
-                    for text in texts
-                ]
+                tokens = artifact("nltk")
+                keep = tokens.vocabulary_mask(user_stops, lowercase=True)
+                texts_processed = [" ".join(doc) for doc in tokens.documents(keep=keep)]
             else:
                 texts_processed = texts
             if not embedding_model_name.strip():
                 embedding_model_name = "all-MiniLM-L6-v2"
-            embedding_model = SentenceTransformer(embedding_model_name)
-            embeddings = embedding_model.encode(texts_processed, show_progress_bar=False)
-            umap_model = UMAP(random_state=random_state)
-            topic_model = BERTopic(verbose=False, nr_topics=num_topics, min_topic_size=5, umap_model=umap_model)
-            topics_result, _ = topic_model.fit_transform(texts_processed, embeddings)
+
+            def embed():
+                embedding_model = model_registry.get("sentence-transformer", embedding_model_name)
+                return embedding_store.encode(
+                    embedding_model_name, texts_processed,
+                    lambda batch: embedding_model.encode(batch, show_progress_bar=False)
+                )
+
+            # UMAP and HDBSCAN run once per stage key; a new numTopics only
+            # re-extracts and reduces topics, a new wordsPerTopic reuses the model.
+            stage_key = bertopic_stages.stage_key(
+                dataset_id, column, embedding_model_name, remove_sw, {"random_state": random_state}
+            )
+            topic_model, reduced, topics_result = bertopic_stages.topics(
+                stage_key, num_topics, texts_processed, embed
+            )
             topic_labels = []
             for t_id in sorted(set(topics_result) - {-1}):
                 top_words_tuples = topic_model.get_topic(t_id)
                 top_words = [pair[0] for pair in top_words_tuples[:words_per_topic]]
                 topic_labels.append(f": {', '.join(top_words)}")
-            # Generate clustering plot for BERTopic using embeddings and topics_result
-            from sklearn.decomposition import PCA
-            pca = PCA(n_components=2)
-            projected = pca.fit_transform(embeddings)
-            plt.figure(figsize=(8, 6))
-            scatter = plt.scatter(projected[:, 0], projected[:, 1], c=topics_result, cmap="viridis", alpha=0.7)
-            plt.xlabel("PC1")
-            plt.ylabel("PC2")
-            plt.title("BERTopic Document Clustering (PC1 vs PC2)")
-            plt.colorbar(scatter, ticks=range(num_topics), label="Topic")
-            buf = io.BytesIO()
-            plt.savefig(buf, format="png")
-            plt.close()
-            buf.seek(0)
-            clustering_plot_b64 = base64.b64encode(buf.read()).decode("utf-8")
-            clustering_plot_data_uri = f"data:image/png;base64,{clustering_plot_b64}"
+            # Project the UMAP embedding BERTopic clustered on, not the raw
+            # sentence embeddings.
+            cluster_labels = np.asarray(topics_result)
+            projected, sampled_rows, projection_info = project_2d(reduced, cluster_labels, max_points, random_state)
+            clustering_chart = scatter_chart(
+                projected, cluster_labels[sampled_rows], "BERTopic Document Clustering (PC1 vs PC2)", "Topic",
+                ticks=range(num_topics)
+            )
             doc_topics = None  # Not used further for BERTopic
         else:
             return jsonify({"error": f"Unsupported method '{method}'."}), 400
 
         # For LDA, NMF, or LSA, generate a clustering plot using doc_topics (if available)
         if method in ["lda", "nmf", "lsa"] and doc_topics is not None:
-            from sklearn.decomposition import PCA
-            pca = PCA(n_components=2)
-            projected = pca.fit_transform(doc_topics)
             cluster_labels = np.argmax(doc_topics, axis=1)
-            plt.figure(figsize=(8, 6))
-            cmap = plt.cm.get_cmap("viridis", num_topics)
-            scatter = plt.scatter(projected[:, 0], projected[:, 1], c=cluster_labels, cmap=cmap, alpha=0.7)
-            plt.xlabel("PC1")
-            plt.ylabel("PC2")
-            plt.title(f"{method.upper()} Document Clustering (PC1 vs PC2)")
-            plt.colorbar(scatter, ticks=range(num_topics), label="Cluster")
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png')
-            plt.close()
-            buf.seek(0)
-            clustering_plot_b64 = base64.b64encode(buf.read()).decode("utf-8")
-            clustering_plot_data_uri = f"data:image/png;base64,{clustering_plot_b64}"
+            projected, sampled_rows, projection_info = project_2d(doc_topics, cluster_labels, max_points, random_state)
+            clustering_chart = scatter_chart(
+                projected, cluster_labels[sampled_rows], f"{method.upper()} Document Clustering (PC1 vs PC2)", "Cluster",
+                num_colors=num_topics, ticks=range(num_topics)
+            )
+
+        if clustering_chart is not None:
+            # Down-sampled coordinates so clients can draw the scatter themselves.
+            clustering_points = {
+                "x": clustering_chart["x"],
+                "y": clustering_chart["y"],
+                "topic": clustering_chart["c"],
+                "row": sampled_rows.tolist(),
+                **projection_info
+            }
 
         # --------------------- Coherence Analysis with Additional Metrics --------------------- #
         if coherence_analysis and method in ["lda", "nmf", "lsa"]:
@@ -406,145 +591,102 @@ def process_topic_modeling():
             max_topics = int(params.get("max_topics", 10))
             step = int(params.get("step", 1))
             topics_range = list(range(min_topics, max_topics + 1, step))
-            coherence_scores = []
-            # Lists for additional metrics:
-            perplexity_scores = []  # only for LDA
-            sse_scores = []         # for NMF and LSA
-
-            # Tokenize texts for coherence computation.
-            tokenized_texts = [nltk.word_tokenize(text.lower()) for text in texts]
-            dictionary = Dictionary(tokenized_texts)
-            corpus = [dictionary.doc2bow(text) for text in tokenized_texts]
-
-            for k in tqdm(topics_range, desc="Coherence analysis", unit="topic"):
-                if method == "lda":
-                    vectorizer = CountVectorizer(
-                        stop_words=list(user_stops) if remove_sw else None,
-                        token_pattern=r"(?u)\b\w+\b"
-                    )
-                    X = vectorizer.fit_transform(texts)
-                    vocab = vectorizer.get_feature_names_out()
-                    model_k = LatentDirichletAllocation(n_components=k, random_state=random_state)
-                    model_k.fit(X)
-                    topics = []
-                    for comp in model_k.components_:
-                        top_indices = comp.argsort()[::-1][:words_per_topic]
-                        top_words = [vocab[i] for i in top_indices]
-                        topics.append(top_words)
-                    # Compute perplexity for LDA
-                    perplexity_scores.append(model_k.perplexity(X))
-                elif method == "nmf":
-                    vectorizer = TfidfVectorizer(
-                        stop_words=list(user_stops) if remove_sw else None,
-                        token_pattern=r"(?u)\b\w+\b"
-                    )
-                    X = vectorizer.fit_transform(texts)
-                    vocab = vectorizer.get_feature_names_out()
-                    model_k = NMF(n_components=k, random_state=random_state)
-                    model_k.fit(X)
-                    topics = []
-                    for comp in model_k.components_:
-                        top_indices = comp.argsort()[::-1][:words_per_topic]
-                        top_words = [vocab[i] for i in top_indices]
-                        topics.append(top_words)
-                    # Use the model's reconstruction error as SSE metric.
-                    sse_scores.append(model_k.reconstruction_err_)
-                elif method == "lsa":
-                    vectorizer = TfidfVectorizer(
-                        stop_words=list(user_stops) if remove_sw else None,
-                        token_pattern=r"(?u)\b\w+\b"
-                    )
-                    X = vectorizer.fit_transform(texts)
-                    vocab = vectorizer.get_feature_names_out()
-                    model_k = TruncatedSVD(n_components=k, random_state=random_state)
-                    model_k.fit(X)
-                    topics = []
-                    for row in model_k.components_:
-                        top_indices = row.argsort()[::-1][:words_per_topic]
-                        top_words = [vocab[i] for i in top_indices]
-                        topics.append(top_words)
-                    # For LSA, compute SSE by reconstructing the TF-IDF matrix.
-                    if hasattr(X, "toarray"):
-                        X_dense = X.toarray()
-                    else:
-                        X_dense = X
-                    X_approx = model_k.inverse_transform(model_k.transform(X))
-                    sse = np.sum((X_dense - X_approx) ** 2)
-                    sse_scores.append(sse)
-
-                coherence_model = CoherenceModel(topics=topics, texts=tokenized_texts,
-                                                  dictionary=dictionary, coherence='c_v')
-                score = coherence_model.get_coherence()
-                coherence_scores.append(score)
+
+            coherence_measure = params.get("coherence_measure", "c_v")
+            if coherence_measure not in COHERENCE_MEASURES:
+                return jsonify({"error": f"Unsupported coherence measure '{coherence_measure}'."}), 400
+
+            # Window co-occurrence counts for the topic words are indexed from
+            # the cached token stream and shared by every k in the sweep.
+            tokens = artifact("nltk_lower")
+            with span("coherence"):
+                coherence_index = CoherenceIndex.from_codes(tokens.codes, np.diff(tokens.offsets), tokens.vocabulary)
+
+            # The sweep reuses the matrix and vocabulary from the main fit
+            # above and fits the candidate k values in parallel.
+            n_jobs = int(params.get("n_jobs", DEFAULT_SWEEP_JOBS))
+            points = {}
+            # The sweep's own time (outside the nested coherence spans) is its fitting.
+            with tqdm(total=len(topics_range), desc="Coherence analysis", unit="topic") as progress, span("fit"):
+                for point in run_topic_sweep(method, X, vocab, topics_range, random_state, words_per_topic, n_jobs=n_jobs):
+                    coherence_start = time.perf_counter()
+                    with span("coherence"):
+                        point["coherence"] = coherence_index.coherence(point["topics"], coherence_measure)
+                    point["coherence_seconds"] = time.perf_counter() - coherence_start
+                    points[point["k"]] = point
+                    progress.update(1)
+                    done_ks = sorted(points)
+                    report_progress(len(points), len(topics_range), partial={
+                        "topics_range": done_ks,
+                        "coherence_scores": [points[k]["coherence"] for k in done_ks]
+                    })
+
+            coherence_scores = [points[k]["coherence"] for k in topics_range]
+            if method == "lda":
+                perplexity_scores = [points[k]["metric"] for k in topics_range]
+            else:
+                sse_scores = [points[k]["metric"] for k in topics_range]
+            sweep_timings = [
+                {
+                    "k": k,
+                    "fit_seconds": round(points[k]["fit_seconds"], 3),
+                    "coherence_seconds": round(points[k]["coherence_seconds"], 3)
+                }
+                for k in topics_range
+            ]
 
             best_index = np.argmax(coherence_scores)
             best_topic_num = topics_range[best_index]
             best_coherence = coherence_scores[best_index]
 
-            # Generate coherence plot.
-            plt.figure(figsize=(8, 6))
-            plt.plot(topics_range, coherence_scores, marker='o')
-            plt.xlabel("Number of Topics")
-            plt.ylabel("Coherence Score (c_v)")
-            plt.title(f"Coherence Analysis for {method.upper()}")
-            plt.grid(True)
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png')
-            plt.close()
-            buf.seek(0)
-            img_b64 = base64.b64encode(buf.read()).decode("utf-8")
-            coherence_plot = f"data:image/png;base64,{img_b64}"
+            # The coherence, perplexity/SSE and clustering charts are rendered
+            # in parallel by the chart service.
+            if method == "lda":
+                metric_name, metric_chart = "perplexity", line_chart(
+                    topics_range, perplexity_scores, "Perplexity Analysis for LDA", "Number of Topics", "Perplexity"
+                )
+            else:
+                metric_name, metric_chart = "sse", line_chart(
+                    topics_range, sse_scores, f"SSE Analysis for {method.upper()}", "Number of Topics", "SSE"
+                )
+            charts = chart_service.render_many({
+                "coherence": line_chart(
+                    topics_range, coherence_scores, f"Coherence Analysis for {method.upper()}",
+                    "Number of Topics", f"Coherence Score ({coherence_measure})"
+                ),
+                metric_name: metric_chart,
+                "clustering": clustering_chart
+            }, chart_format)
 
             response_data = {
                 "message": f"{method.upper()} topic modeling completed with coherence analysis.",
                 "topics": topic_labels,
                 "coherence_analysis": {
-                    "coherence_plot": coherence_plot,
+                    "coherence_plot": charts["coherence"],
                     "best_topic": best_topic_num,
                     "best_coherence": best_coherence,
                     "topics_range": topics_range,
-                    "coherence_scores": coherence_scores
+                    "coherence_scores": coherence_scores,
+                    "coherence_measure": coherence_measure,
+                    "sweep_timings": sweep_timings
                 }
             }
             # Add perplexity analysis for LDA.
             if method == "lda":
-                plt.figure(figsize=(8, 6))
-                plt.plot(topics_range, perplexity_scores, marker='o')
-                plt.xlabel("Number of Topics")
-                plt.ylabel("Perplexity")
-                plt.title("Perplexity Analysis for LDA")
-                plt.grid(True)
-                buf = io.BytesIO()
-                plt.savefig(buf, format='png')
-                plt.close()
-                buf.seek(0)
-                perplexity_plot_b64 = base64.b64encode(buf.read()).decode("utf-8")
-                perplexity_plot = f"data:image/png;base64,{perplexity_plot_b64}"
                 response_data["perplexity_analysis"] = {
-                    "perplexity_plot": perplexity_plot,
+                    "perplexity_plot": charts["perplexity"],
                     "perplexity_scores": perplexity_scores
                 }
             # Add SSE analysis for NMF or LSA.
             elif method in ["nmf", "lsa"]:
-                plt.figure(figsize=(8, 6))
-                plt.plot(topics_range, sse_scores, marker='o')
-                plt.xlabel("Number of Topics")
-                plt.ylabel("SSE")
-                plt.title(f"SSE Analysis for {method.upper()}")
-                plt.grid(True)
-                buf = io.BytesIO()
-                plt.savefig(buf, format='png')
-                plt.close()
-                buf.seek(0)
-                sse_plot_b64 = base64.b64encode(buf.read()).decode("utf-8")
-                sse_plot = f"data:image/png;base64,{sse_plot_b64}"
                 response_data["sse_analysis"] = {
-                    "sse_plot": sse_plot,
+                    "sse_plot": charts["sse"],
                     "sse_scores": sse_scores
                 }
 
-            if clustering_plot_data_uri:
-                response_data["clustering_plot"] = clustering_plot_data_uri
+            if "clustering" in charts:
+                response_data["clustering_plot"] = charts["clustering"]
+                response_data["clustering_points"] = clustering_points
             return jsonify(response_data), 200
 
         # Build response data (if no coherence analysis was requested):
@@ -552,8 +694,9 @@ def process_topic_modeling():
             "message": f"{method.upper()} topic modeling completed.",
             "topics": topic_labels
         }
-        if clustering_plot_data_uri:
-            response_data["clustering_plot"] = clustering_plot_data_uri
+        if clustering_chart is not None:
+            response_data["clustering_plot"] = chart_service.render(clustering_chart, chart_format)
+            response_data["clustering_points"] = clustering_points
         return jsonify(response_data), 200
 
     except Exception as e:
@@ -562,6 +705,7 @@ def process_topic_modeling():
 @app.route('/get_models', methods=['GET'])
 def get_models():
     try:
+        import ollama
         model_data = ollama.list()
         pattern = r"model='(.*?)'"
         models = re.findall(pattern, str(model_data))
@@ -570,6 +714,134 @@ def get_models():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def load_topic_texts(params):
+    # Rows come from an uploaded dataset column or an inline `texts` list.
+    if params.get("texts") is not None:
+        texts = [str(text) for text in params["texts"]]
+    else:
+        column = params.get("column")
+        if not (params.get("datasetId") or params.get("base64")) or not column:
+            raise ValueError("Must provide 'texts' or 'datasetId' and 'column'.")
+        texts = load_column(params, column).astype(str).dropna().tolist()
+    if not texts:
+        raise ValueError("No valid rows in dataset.")
+    return texts
+
+def topic_model_response(topic_model, words_per_topic):
+    data = topic_model.info()
+    data["topics"] = [f": {', '.join(words)}" for words in topic_model.topics(words_per_topic)]
+    return data
+
+@app.route('/topic_models', methods=['POST'])
+def create_topic_model():
+    params = request.get_json()
+    if not params:
+        return jsonify({"error": "No JSON payload"}), 400
+    method = params.get("method", "lda").lower()
+    vocabulary = params.get("vocabulary", "frozen")
+    if method not in TOPIC_MODEL_METHODS:
+        return jsonify({"error": f"Unsupported method '{method}'. Use one of: {', '.join(TOPIC_MODEL_METHODS)}."}), 400
+    if vocabulary not in VOCABULARY_MODES:
+        return jsonify({"error": f"Unsupported vocabulary '{vocabulary}'. Use one of: {', '.join(VOCABULARY_MODES)}."}), 400
+    try:
+        texts = load_topic_texts(params)
+    except DatasetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except KeyError:
+        return jsonify({"error": f"Column '{params.get('column')}' not found in dataset."}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stop_words = english_stopwords() if params.get("stopwords", False) else None
+    try:
+        topic_model = topic_model_store.create(
+            texts, method, int(params.get("numTopics", 5)),
+            vocabulary=vocabulary,
+            stop_words=stop_words,
+            random_state=int(params.get("randomState", 42)),
+            n_features=int(params.get("nFeatures", DEFAULT_HASH_FEATURES))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error fitting topic model: {str(e)}"}), 500
+    return jsonify(topic_model_response(topic_model, int(params.get("wordsPerTopic", 5)))), 201
+
+@app.route('/topic_models', methods=['GET'])
+def list_topic_models():
+    return jsonify({"models": topic_model_store.list()}), 200
+
+@app.route('/topic_models/<model_id>', methods=['GET'])
+def get_topic_model(model_id):
+    try:
+        topic_model = topic_model_store.get(model_id)
+    except TopicModelNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    words_per_topic = int(request.args.get("wordsPerTopic", 5))
+    return jsonify(topic_model_response(topic_model, words_per_topic)), 200
+
+@app.route('/topic_models/<model_id>', methods=['DELETE'])
+def delete_topic_model(model_id):
+    try:
+        topic_model_store.delete(model_id)
+    except TopicModelNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"modelId": model_id, "deleted": True}), 200
+
+@app.route('/topic_models/<model_id>/update', methods=['POST'])
+def update_topic_model(model_id):
+    params = request.get_json()
+    if not params:
+        return jsonify({"error": "No JSON payload"}), 400
+    try:
+        texts = load_topic_texts(params)
+        topic_model = topic_model_store.update(model_id, texts)
+    except (TopicModelNotFound, DatasetNotFound) as e:
+        return jsonify({"error": str(e)}), 404
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except KeyError:
+        return jsonify({"error": f"Column '{params.get('column')}' not found in dataset."}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error updating topic model: {str(e)}"}), 500
+    data = topic_model_response(topic_model, int(params.get("wordsPerTopic", 5)))
+    data["newDocuments"] = len(texts)
+    return jsonify(data), 200
+
+@app.route('/topic_models/<model_id>/transform', methods=['POST'])
+def transform_topic_model(model_id):
+    params = request.get_json()
+    if not params:
+        return jsonify({"error": "No JSON payload"}), 400
+    try:
+        texts = load_topic_texts(params)
+        topic_model, doc_topics = topic_model_store.transform(model_id, texts)
+    except (TopicModelNotFound, DatasetNotFound) as e:
+        return jsonify({"error": str(e)}), 404
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except KeyError:
+        return jsonify({"error": f"Column '{params.get('column')}' not found in dataset."}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error assigning topics: {str(e)}"}), 500
+
+    assigned = np.argmax(doc_topics, axis=1)
+    weights = doc_topics[np.arange(len(assigned)), assigned]
+    results = [
+        {"text": text, "topic": topic, "weight": weight}
+        for text, topic, weight in zip(texts, assigned.tolist(), weights.tolist())
+    ]
+    data = topic_model_response(topic_model, int(params.get("wordsPerTopic", 5)))
+    data["results"] = results
+    data["topicCounts"] = np.bincount(assigned, minlength=topic_model.num_topics).tolist()
+    return jsonify(data), 200
+
 @app.route('/process/sentiment', methods=['POST'])
 def process_sentiment():
     try:
@@ -579,138 +851,96 @@ def process_sentiment():
 
         method = data.get("method")
         column = data.get("column")
-        b64_csv = data.get("base64")
+        dataset_ref = data.get("datasetId") or data.get("base64")
 
-        if not all([method, column, b64_csv]):
-            missing = [param for param in ["method", "column", "base64"] if not data.get(param)]
+        if not all([method, column, dataset_ref]):
+            missing = [param for param in ["method", "column", "datasetId"] if not data.get(param)]
             return jsonify({"error": f"Missing required parameters: {', '.join(missing)}"}), 400
 
         if method not in ["rulebasedsa", "dlbasedsa"]:
             return jsonify({"error": f"Unknown method '{method}'"}), 400
+        chart_format = data.get("chartFormat", "png")
+        if chart_format not in CHART_FORMATS:
+            return jsonify({"error": f"Unsupported chart format '{chart_format}'."}), 400
 
         rule_based_model = data.get("ruleBasedModel", "textblob")
         dl_model_name = data.get("dlModel", "distilbert-base-uncased-finetuned-sst-2-english")
 
         try:
-            csv_bytes = base64.b64decode(b64_csv)
-            df, _ = parse_csv_from_bytes(csv_bytes)
+            dataset_id = resolve_dataset_id(data)
+            series = dataset_store.get_column(dataset_id, column)
+        except DatasetNotFound as e:
+            return jsonify({"error": str(e)}), 404
+        except KeyError:
+            return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
         except Exception as e:
             return jsonify({"error": f"Error decoding CSV data: {str(e)}"}), 400
 
-        if column not in df.columns:
-            return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-
-        df_clean = df[df[column].astype(str).str.strip() != ""]
-        texts = df_clean[column].astype(str).tolist()
+        keep = (series.astype(str).str.strip() != "").to_numpy()
+        rows = np.flatnonzero(keep)
+        texts = series[keep].astype(str).tolist()
         if not texts:
             return jsonify({"error": "No valid rows in dataset after cleaning."}), 400
 
-        results = []
         if method == "rulebasedsa":
-            if rule_based_model == "textblob":
-                for text in tqdm(texts, desc="Processing rule-based sentiment", unit="text"):
-                    polarity = TextBlob(text).sentiment.polarity
-                    sentiment_label = ("Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral")
-                    results.append({
-                        "text": text,
-                        "sentiment": sentiment_label,
-                        "score": polarity
-                    })
-            elif rule_based_model == "vader":
-                for text in tqdm(texts, desc="Processing rule-based sentiment (Vader)", unit="text"):
-                    scores = vader_analyzer.polarity_scores(text)
-                    compound = scores["compound"]
-                    if compound >= 0.05:
-                        sentiment_label = "Positive"
-                    elif compound <= -0.05:
-                        sentiment_label = "Negative"
-                    else:
-                        sentiment_label = "Neutral"
-                    results.append({
-                        "text": text,
-                        "sentiment": sentiment_label,
-                        "score": compound
-                    })
-            else:
+            if rule_based_model not in RULE_BASED_MODELS:
                 return jsonify({"error": f"Unsupported rule-based model '{rule_based_model}'"}), 400
+            n_jobs = int(data.get("n_jobs", DEFAULT_SENTIMENT_JOBS))
+            with tqdm(desc=f"Processing rule-based sentiment ({rule_based_model})", unit="text") as progress:
+                def on_progress(done, total):
+                    progress.total = total
+                    progress.update(done - progress.n)
+                    report_progress(done, total)
+
+                with span("infer"):
+                    scores, unique_texts = score_texts(texts, rule_based_model, n_jobs=n_jobs, on_progress=on_progress)
+            labels = label_scores(scores, rule_based_model)
+            inference_report = {"rows": len(texts), "distinct_texts": unique_texts}
         elif method == "dlbasedsa":
+            backend = data.get("backend", DEFAULT_DL_BACKEND)
+            if backend not in DL_BACKENDS:
+                return jsonify({"error": f"Unsupported backend '{backend}'. Use one of: {', '.join(DL_BACKENDS)}."}), 400
             try:
-                dl_pipe = get_dl_pipeline(dl_model_name)
+                engine = get_sentiment_engine(dl_model_name, backend)
             except ValueError as ve:
                 return jsonify({"error": str(ve)}), 400
             try:
-                dl_results = dl_pipe(texts)
-                for text_val, res in zip(tqdm(texts, desc="Processing DL-based sentiment", unit="text"), dl_results):
-                    label = res.get("label", "Neutral")
-                    score = res.get("score", 0.0)
-                    if label.upper() in ['POSITIVE', 'NEGATIVE']:
-                        sentiment_label = label.capitalize()
-                    else:
-                        sentiment_label = 'Neutral'
-                    results.append({
-                        "text": text_val,
-                        "sentiment": sentiment_label,
-                        "score": float(score)
-                    })
+                with tqdm(desc="Processing DL-based sentiment", unit="text") as progress:
+                    def on_progress(done, total):
+                        progress.total = total
+                        progress.update(done - progress.n)
+                        report_progress(done, total)
+
+                    with span("infer"):
+                        dl_labels, dl_scores, inference_report = engine.predict(
+                            texts,
+                            token_budget=int(data.get("tokenBudget", DEFAULT_TOKEN_BUDGET)),
+                            max_batch_size=int(data.get("maxBatchSize", DEFAULT_MAX_BATCH_SIZE)),
+                            on_progress=on_progress
+                        )
+                labels = [
+                    label.capitalize() if label.upper() in ['POSITIVE', 'NEGATIVE'] else 'Neutral'
+                    for label in dl_labels
+                ]
+                scores = dl_scores
             except Exception as e:
                 return jsonify({"error": f"Error during DL-based sentiment analysis: {str(e)}"}), 500
 
         # Calculate summary statistics from the detailed results
-        summary = {
-            "Positive": {"Count": 0, "Average Score": 0.0},
-            "Neutral":  {"Count": 0, "Average Score": 0.0},
-            "Negative": {"Count": 0, "Average Score": 0.0}
-        }
-        for r in results:
-            s = r["sentiment"]
-            try:
-                score = float(r["score"])
-            except Exception:
-                score = 0.0
-            if s in summary:
-                summary[s]["Count"] += 1
-                summary[s]["Average Score"] += score
-
-        for sentiment, data_stats in summary.items():
-            count = data_stats["Count"]
-            avg = round(data_stats["Average Score"] / count, 4) if count > 0 else None
-            summary[sentiment]["Average Score"] = avg
-
-        total_count = summary["Positive"]["Count"] + summary["Neutral"]["Count"] + summary["Negative"]["Count"]
-        if total_count > 0:
-            percentages = {
-                "Positive": summary["Positive"]["Count"] * 100 / total_count,
-                "Neutral": summary["Neutral"]["Count"] * 100 / total_count,
-                "Negative": summary["Negative"]["Count"] * 100 / total_count
-            }
-        else:
-            percentages = {"Positive": 0, "Neutral": 0, "Negative": 0}
+        summary, percentages = summarize_sentiment(labels, scores)
 
         # Generate a bar chart for the sentiment distribution
-        plt.figure(figsize=(6, 4))
-        sentiments_list = list(percentages.keys())
-        percents_list = list(percentages.values())
-        bars = plt.bar(sentiments_list, percents_list, color=["green", "blue", "red"])
-        plt.xlabel("Sentiment")
-        plt.ylabel("Percentage")
-        plt.title("Sentiment Analysis Summary")
-        for bar in bars:
-            yval = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2.0, yval, f'{yval:.1f}%', va='bottom', ha='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close()
-        buf.seek(0)
-        chart_b64 = base64.b64encode(buf.read()).decode("utf-8")
-        chart_data_uri = f"data:image/png;base64,{chart_b64}"
+        chart = chart_service.render(sentiment_chart(percentages, "Sentiment Analysis Summary"), chart_format)
 
         # Return the detailed results along with summary statistics and the chart.
-        return jsonify({
+        response_data = {
             "message": "Sentiment analysis completed (aggregated).",
-            "results": results,
+            **result_fields(data, ResultSet.from_labels(dataset_id, column, rows, labels, scores)),
             "stats": summary,
-            "chart": chart_data_uri
-        }), 200
+            "inference": inference_report,
+            "chart": chart
+        }
+        return jsonify(response_data), 200
 
     except Exception as ex:
         return jsonify({"error": "Internal Server Error."}), 500
@@ -721,232 +951,273 @@ def process_wordcloud():
     if not params:
         return jsonify({"error": "Missing JSON payload."}), 400
     method = params.get("method", "freq").lower()
-    csv_b64 = params.get("base64")
     column = params.get("column")
-    file_type = params.get("fileType", "csv").lower()
     stopwords_flag = params.get("stopwords", False)
     exclude_words_list = params.get("excludeWords", [])
     max_words = params.get("maxWords", 500)
-    window_size = params.get("windowSize", 2)
-    if not csv_b64 or not column:
-        return jsonify({"error": "Must provide 'base64' data and 'column'."}), 400
+    window_size = int(params.get("windowSize", 2))
+    collocation_measure = params.get("collocationMeasure", "freq").lower()
+    min_freq = int(params.get("minFreq", 1))
+    if not (params.get("datasetId") or params.get("base64")) or not column:
+        return jsonify({"error": "Must provide 'datasetId' and 'column'."}), 400
     if not isinstance(exclude_words_list, list):
         exclude_words_list = []
     try:
-        csv_bytes = base64.b64decode(csv_b64)
-        if file_type == "xlsx":
-            df, _ = parse_xlsx_from_bytes(csv_bytes)
-        elif file_type == "csv":
-            df, _ = parse_csv_from_bytes(csv_bytes)
-        else:
-            return jsonify({"error": f"Unsupported file type '{file_type}'."}), 400
-        if column not in df.columns:
+        try:
+            dataset_id = resolve_dataset_id(params)
+            series = dataset_store.get_column(dataset_id, column)
+        except DatasetNotFound as e:
+            return jsonify({"error": str(e)}), 404
+        except KeyError:
             return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-        texts = df[column].astype(str).dropna().tolist()
+        texts = column_texts(series)
         if len(texts) == 0:
             return jsonify({"error": f"No valid text rows in column '{column}'."}), 400
         user_stops_set = set(exclude_words_list)
         if stopwords_flag:
-            user_stops_set |= set(stopwords.words("english"))
-        user_stops_list = list(user_stops_set)
+            user_stops_set |= set(english_stopwords())
         word_freq = {}
         if method == "tfidf":
-            vectorizer = TfidfVectorizer(
-                stop_words=user_stops_list if stopwords_flag else None,
-                token_pattern=r"(?u)\b\w+\b"
+            X, features = text_artifacts.get(dataset_id, column, "regex", lambda: texts).tfidf(
+                user_stops_set if stopwords_flag else None
             )
-            X = vectorizer.fit_transform(texts)
-            features = vectorizer.get_feature_names_out()
             tfidf_sums = X.sum(axis=0).A1
             for token, score in zip(features, tfidf_sums):
                 if token in user_stops_set:
                     continue
                 word_freq[token] = float(score)
         elif method == "freq":
-            vectorizer = CountVectorizer(
-                stop_words=user_stops_list if stopwords_flag else None,
-                token_pattern=r"(?u)\b\w+\b"
+            features, counts = text_artifacts.get(dataset_id, column, "regex", lambda: texts).frequencies(
+                user_stops_set if stopwords_flag else None
             )
-            X = vectorizer.fit_transform(texts)
-            features = vectorizer.get_feature_names_out()
-            counts = X.sum(axis=0).A1
             for token, c in zip(features, counts):
                 if token in user_stops_set:
                     continue
                 word_freq[token] = int(c)
         elif method == "collocation":
-            word_freq = {}
-            for text in tqdm(texts, desc="Processing collocations", unit="text"):
-                tokens = [t.lower() for t in word_tokenize(text) if t.isalpha()]
-                if user_stops_list:
-                    tokens = [t for t in tokens if t not in user_stops_list]
-                finder = BigramCollocationFinder.from_words(tokens, window_size=window_size)
-                freq_dict = finder.ngram_fd
-                for bigram, freq in freq_dict.items():
-                    bigram_str = "_".join(bigram)
-                    word_freq[bigram_str] = word_freq.get(bigram_str, 0) + freq
-            if len(word_freq) > max_words:
-                sorted_bigrams = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-                limited_bigrams = sorted_bigrams[:max_words]
-                word_freq = dict(limited_bigrams)
+            if collocation_measure not in COLLOCATION_MEASURES:
+                return jsonify({"error": f"Unsupported collocation measure '{collocation_measure}'."}), 400
+            if window_size < 2:
+                return jsonify({"error": "windowSize must be at least 2."}), 400
+            # One pass over the lowercased, filtered token codes of the whole
+            # column instead of a BigramCollocationFinder per text.
+            artifact = text_artifacts.get(dataset_id, column, "nltk", lambda: texts)
+            keep = artifact.vocabulary_mask(user_stops_set, alpha_only=True, lowercase=True)
+            codes, offsets, vocabulary = artifact.encode(keep, artifact.lowercase_vocabulary())
+            with span("vectorize"):
+                word_freq = top_collocations(
+                    codes, offsets, vocabulary, window_size=window_size, max_words=max_words,
+                    measure=collocation_measure, min_freq=min_freq,
+                    n_jobs=int(params.get("n_jobs", DEFAULT_COLLOCATION_JOBS))
+                )
         else:
             return jsonify({"error": f"Unsupported method '{method}'."}), 400
         if not word_freq:
             return jsonify({"error": "No tokens found for the chosen configuration."}), 400
-        data_uri = generate_word_cloud(word_freq, max_words=max_words)
         return jsonify({
             "message": f"{method.upper()} word cloud generated successfully.",
-            "image": data_uri
+            **word_cloud_images(word_freq, max_words, params)
         }), 200
     except Exception as e:
         return jsonify({"error": f"Error generating word cloud: {str(e)}"}), 500
 
+@app.route("/wordcloud_images/<image_id>", methods=["GET"])
+def get_wordcloud_image(image_id):
+    # ?wait=<seconds> bounds the wait for a render still in flight (202 after it).
+    wait = request.args.get("wait", type=float)
+    try:
+        png = wordcloud_renderer.get(image_id, timeout=wait)
+    except KeyError:
+        return jsonify({"error": f"Word cloud image '{image_id}' not found."}), 404
+    except TimeoutError:
+        return jsonify({"status": "pending", "imageId": image_id}), 202
+    except Exception as e:
+        return jsonify({"error": f"Error generating word cloud: {str(e)}"}), 500
+    response = send_file(io.BytesIO(png), mimetype="image/png", download_name=f"{image_id}.png")
+    # IDs are content hashes, so a rendered image never changes.
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
 @app.route("/process/semantic_wordcloud", methods=["POST"])
 def process_semantic_wordcloud():
-    print("DEBUG: Received request to generate semantic word cloud.")
     params = request.get_json()
     if not params:
-        print("DEBUG: Missing JSON payload in the request.")
         return jsonify({"error": "Missing JSON payload."}), 400
     query = params.get("query")
     column = params.get("column")
-    csv_b64 = params.get("base64")
+    dataset_ref = params.get("datasetId") or params.get("base64")
     embedding_model_name = params.get("embeddingModel", "all-MiniLM-L6-v2")
     max_words = params.get("maxWords", 500)
     stopwords_flag = params.get("stopwords", False)
-    print(f"DEBUG: Parameters received -> Query: {query}, Column: {column}, Embedding Model: {embedding_model_name}, Max Words: {max_words}, Stopwords Flag: {stopwords_flag}")
-    if not query or not column or not csv_b64:
-        print("DEBUG: Missing required inputs: query, column, or base64 CSV data.")
-        return jsonify({"error": "Query, column, and base64 CSV data are required."}), 400
+    search_mode = params.get("searchMode", "auto").lower()
+    nprobe = int(params.get("nprobe", 8))
+    if not query or not column or not dataset_ref:
+        return jsonify({"error": "Query, column, and datasetId are required."}), 400
+    if search_mode not in ["auto", "exact", "approximate"]:
+        return jsonify({"error": f"Unsupported search mode '{search_mode}'."}), 400
     try:
-        print("DEBUG: Decoding base64 CSV data.")
-        csv_bytes = base64.b64decode(csv_b64)
-        df, _ = parse_csv_from_bytes(csv_bytes)
-        print(f"DEBUG: Columns in dataset -> {list(df.columns)}")
-        if column not in df.columns:
-            print(f"DEBUG: Specified column '{column}' not found in dataset.")
+        try:
+            dataset_id = resolve_dataset_id(params)
+            series = dataset_store.get_column(dataset_id, column)
+        except DatasetNotFound as e:
+            return jsonify({"error": str(e)}), 404
+        except KeyError:
             return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-        texts = df[column].dropna().astype(str).tolist()
-        print(f"DEBUG: Extracted {len(texts)} rows from column '{column}'.")
+        texts = column_texts(series)
         if not texts:
-            print("DEBUG: No valid rows found in the specified column.")
             return jsonify({"error": "No valid rows in the specified column."}), 400
         if not embedding_model_name.strip():
-            print("DEBUG: Embedding model name is empty. Using default model 'all-MiniLM-L6-v2'.")
             embedding_model_name = "all-MiniLM-L6-v2"
-        print(f"DEBUG: Initializing embedding model '{embedding_model_name}'.")
-        embedding_model = SentenceTransformer(embedding_model_name)
-        print("DEBUG: Computing embeddings for query and texts.")
-        query_embedding = embedding_model.encode([query], show_progress_bar=False)[0]
-        text_embeddings = embedding_model.encode(texts, show_progress_bar=False)
-        print("DEBUG: Embedding computation completed.")
-        print(f"DEBUG: Query embedding shape: {query_embedding.shape}, Text embeddings shape: {text_embeddings.shape}")
-        print("DEBUG: Calculating cosine similarities.")
-        query_norm = np.linalg.norm(query_embedding)
-        text_norms = np.linalg.norm(text_embeddings, axis=1)
-        cosine_similarities = np.dot(text_embeddings, query_embedding) / (text_norms * query_norm + 1e-10)
-        print(f"DEBUG: Cosine similarities calculated. Sample values: {cosine_similarities[:5]}")
-        top_indices = cosine_similarities.argsort()[-max_words:][::-1]
+        embedding_model = model_registry.get("sentence-transformer", embedding_model_name)
+        with span("embed"):
+            query_embedding = embedding_model.encode([query], show_progress_bar=False)[0]
+        # Embedding the column (on a cache miss) is charged to "embed" and
+        # the rest of the build, e.g. IVF clustering, to "index".
+        with span("index"):
+            index = vector_indexes.get_or_build(
+                (dataset_id, column, embedding_model_name),
+                lambda: embedding_store.encode(
+                    embedding_model_name, texts,
+                    lambda batch: embedding_model.encode(batch, show_progress_bar=False)
+                ),
+                mode=search_mode
+            )
+        search_start = time.perf_counter()
+        use_mode = search_mode
+        if use_mode == "auto":
+            use_mode = "approximate" if index.has_ivf else "exact"
+        with span("search"):
+            top_indices, top_scores = index.search(query_embedding, max_words, mode=use_mode, nprobe=nprobe)
+        search_ms = (time.perf_counter() - search_start) * 1000
         selected_texts = [texts[i] for i in top_indices]
-        print(f"DEBUG: Selected top {len(selected_texts)} texts based on similarity.")
         word_freq = {}
-        stopwords_set = set(stopwords.words("english")) if stopwords_flag else set()
-        for text in tqdm(selected_texts, desc="Processing semantic word cloud", unit="text"):
-            if not text:
-                print("DEBUG: Skipping empty text.")
-                continue
-            try:
-                tokens = word_tokenize(text.lower())
-                filtered_tokens = [t for t in tokens if t.isalpha() and t not in stopwords_set]
-                for token in filtered_tokens:
-                    word_freq[token] = word_freq.get(token, 0) + 1
-            except Exception as tokenize_error:
-                print(f"DEBUG: Tokenization error for text: '{text}' -> {tokenize_error}")
-        print(f"DEBUG: Word frequencies generated. Sample: {list(word_freq.items())[:5]}")
+        stopwords_set = set(english_stopwords()) if stopwords_flag else set()
+        # Reuse the column's token stream when another analysis already
+        # built it; otherwise only the selected texts are tokenized.
+        artifact = text_artifacts.peek(dataset_id, column, "nltk_lower")
+        with span("tokenize"):
+            if artifact is not None:
+                keep = artifact.vocabulary_mask(stopwords_set, alpha_only=True)
+                for tokens in artifact.documents(rows=top_indices, keep=keep):
+                    for token in tokens:
+                        word_freq[token] = word_freq.get(token, 0) + 1
+            else:
+                word_tokenize = nltk_word_tokenize()
+                for text in tqdm(selected_texts, desc="Processing semantic word cloud", unit="text"):
+                    if not text:
+                        continue
+                    try:
+                        tokens = word_tokenize(text.lower())
+                        filtered_tokens = [t for t in tokens if t.isalpha() and t not in stopwords_set]
+                        for token in filtered_tokens:
+                            word_freq[token] = word_freq.get(token, 0) + 1
+                    except Exception:
+                        # A text the tokenizer rejects adds no words.
+                        continue
         if not word_freq:
-            print("DEBUG: No tokens found for the selected configuration.")
             return jsonify({"error": "No tokens found for the selected configuration."}), 400
-        print("DEBUG: Generating word cloud.")
-        wc = WordCloud(
-            width=1500,
-            height=1500,
-            max_words=max_words,
-            background_color="white"
-        ).generate_from_frequencies(word_freq)
-        print("DEBUG: Converting word cloud to base64.")
-        img_buffer = io.BytesIO()
-        wc.to_image().save(img_buffer, format="PNG")
-        img_buffer.seek(0)
-        img_b64 = base64.b64encode(img_buffer.read()).decode("utf-8")
-        data_uri = f"data:image/png;base64,{img_b64}"
-        print("DEBUG: Semantic word cloud generated successfully.")
+        images = word_cloud_images(word_freq, max_words, params)
         return jsonify({
             "message": "Semantic word cloud generated successfully.",
-            "image": data_uri
+            **images,
+            "search": {"mode": use_mode, "nprobe": nprobe, "latencyMs": round(search_ms, 2)}
         })
     except Exception as e:
-        print(f"ERROR: {str(e)}")
         return jsonify({"error": f"Error generating word cloud: {str(e)}"}), 500
 
+def label_progress_reporter():
+    # Forwards LLM progress to the current job with running label counts.
+    counts = {"Positive": 0, "Neutral": 0, "Negative": 0}
+
+    def on_progress(done, total, new_labels):
+        for label in new_labels:
+            if label in counts:
+                counts[label] += 1
+        report_progress(done, total, partial={"counts": dict(counts)})
+
+    return on_progress
+
+def build_absa_prompt(text, aspect):
+    return (
+        f"Analyze the sentiment towards the aspect '{aspect}' in the following text.\n\n"
+        f"Text: \"{text}\"\nAspect: {aspect}\nSentiment (Positive, Negative, Neutral) DONT WRITE ANYTHING ELSE, analyze rationally. Just write sentiment only:"
+    )
+
+def build_packed_absa_prompt(texts, aspect):
+    numbered = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, start=1))
+    return (
+        f"Analyze the sentiment towards the aspect '{aspect}' in each of the following {len(texts)} numbered texts.\n\n"
+        f"{numbered}\n\n"
+        f"Respond ONLY with a JSON list of {len(texts)} labels in the same order, each one of \"Positive\", \"Negative\" or \"Neutral\". DONT WRITE ANYTHING ELSE:"
+    )
+
+def build_zero_shot_prompt(text):
+    return (
+        f"Please label the following text as Positive, Negative, or Neutral. Dont give any explanation, just label rationally and nothing else. Just write sentiment only.\n\n"
+        f"Text: \"{text}\"\n\nSentiment:"
+    )
+
+def build_packed_zero_shot_prompt(texts):
+    numbered = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, start=1))
+    return (
+        f"Please label each of the following {len(texts)} numbered texts as Positive, Negative, or Neutral. Dont give any explanation.\n\n"
+        f"{numbered}\n\n"
+        f"Respond ONLY with a JSON list of {len(texts)} labels in the same order, each one of \"Positive\", \"Negative\" or \"Neutral\":"
+    )
+
 @app.route('/process/absa', methods=['POST'])
 def process_absa():
     params = request.get_json()
     if not params:
         return jsonify({"error": "No JSON payload provided."}), 400
 
-    csv_b64 = params.get("base64")
-    file_type = params.get("fileType", "csv").lower()
+    dataset_ref = params.get("datasetId") or params.get("base64")
     column = params.get("column")
     aspect = params.get("aspect")
     model = params.get("model")
 
     # Ensure required parameters are provided
-    if not all([csv_b64, column, aspect]):
-        missing = [param for param in ["base64", "column", "aspect"] if not params.get(param)]
-        return jsonify({"error": f"Parameters 'base64', 'column', and 'aspect' are required."}), 400
-
-    # Decode and parse the file
+    if not all([dataset_ref, column, aspect]):
+        missing = [param for param in ["datasetId", "column", "aspect"] if not params.get(param)]
+        return jsonify({"error": f"Parameters 'datasetId', 'column', and 'aspect' are required."}), 400
+    chart_format = params.get("chartFormat", "png")
+    if chart_format not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format '{chart_format}'."}), 400
+
+    # Look up the uploaded dataset
     try:
-        csv_bytes = base64.b64decode(csv_b64)
-        if file_type == "csv":
-            df, _ = parse_csv_from_bytes(csv_bytes)
-        elif file_type == "xlsx":
-            df, _ = parse_xlsx_from_bytes(csv_bytes)
-        else:
-            return jsonify({"error": f"Unsupported file type '{file_type}'."}), 400
+        dataset_id = resolve_dataset_id(params)
+        series = dataset_store.get_column(dataset_id, column)
+    except DatasetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except KeyError:
+        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
     except Exception as e:
         return jsonify({"error": f"Error decoding file: {str(e)}"}), 400
 
-    if column not in df.columns:
-        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-
     # Remove rows that are missing or whose text is "nan" (case-insensitive)
-    df_clean = df[column].dropna()
-    df_clean = df_clean[df_clean.astype(str).str.strip().str.lower() != "nan"]
-    texts = df_clean.astype(str).tolist()
+    keep = (series.notna() & (series.astype(str).str.strip().str.lower() != "nan")).to_numpy()
+    rows = np.flatnonzero(keep)
+    texts = series[keep].astype(str).tolist()
     if not texts:
         return jsonify({"error": "No valid text data found in the specified column."}), 400
 
-    results = []
     try:
-        # Process each text using the provided ABSA prompt
-        for text in tqdm(texts, desc="Processing ABSA", unit="text"):
-            prompt = (
-                f"Analyze the sentiment towards the aspect '{aspect}' in the following text.\n\n"
-                f"Text: \"{text}\"\nAspect: {aspect}\nSentiment (Positive, Negative, Neutral) DONT WRITE ANYTHING ELSE, analyze rationally. Just write sentiment only:"
-            )
-            response = ollama.chat(
-                model=model,
-                messages=[{'role': 'user', 'content': prompt}]
-            )
-            sentiment = response.message.content.strip().capitalize()
-            if sentiment not in ["Positive", "Negative", "Neutral"]:
-                sentiment = "Neutral"
-            results.append({
-                "text": text,
-                "aspect": aspect,
-                "sentiment": sentiment
-            })
+        # Label texts with the ABSA prompt, several requests in flight at once
+        runner = LLMBatchRunner(
+            model,
+            parallelism=params.get("parallelism", DEFAULT_PARALLELISM),
+            pack_size=params.get("packSize", DEFAULT_PACK_SIZE)
+        )
+        labels, throughput = runner.run(
+            texts,
+            lambda text: build_absa_prompt(text, aspect),
+            lambda batch: build_packed_absa_prompt(batch, aspect),
+            desc="Processing ABSA",
+            on_progress=label_progress_reporter(),
+            cache=llm_label_cache if params.get("useCache", True) else None,
+            cache_key_fn=lambda text: label_cache_key(model, ABSA_PROMPT_VERSION, aspect, text)
+        )
     except Exception as e:
         return jsonify({"error": f"Error during ABSA: {str(e)}"}), 500
 
@@ -956,8 +1227,7 @@ def process_absa():
         "Neutral":  {"Count": 0},
         "Negative": {"Count": 0}
     }
-    for r in results:
-        s = r["sentiment"]
+    for s in labels:
         if s in summary:
             summary[s]["Count"] += 1
 
@@ -972,28 +1242,14 @@ def process_absa():
         percentages = {"Positive": 0, "Neutral": 0, "Negative": 0}
 
     # Generate a bar chart for sentiment distribution
-    plt.figure(figsize=(6, 4))
-    sentiments_list = list(percentages.keys())
-    percents_list = list(percentages.values())
-    bars = plt.bar(sentiments_list, percents_list, color=["green", "blue", "red"])
-    plt.xlabel("Sentiment")
-    plt.ylabel("Percentage")
-    plt.title("ABSA Sentiment Analysis Summary")
-    for bar in bars:
-        yval = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2.0, yval, f'{yval:.1f}%', va='bottom', ha='center')
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    chart_b64 = base64.b64encode(buf.read()).decode("utf-8")
-    chart_data_uri = f"data:image/png;base64,{chart_b64}"
+    chart = chart_service.render(sentiment_chart(percentages, "ABSA Sentiment Analysis Summary"), chart_format)
 
     return jsonify({
         "message": "ABSA completed.",
-        "results": results,
+        **result_fields(params, ResultSet.from_labels(dataset_id, column, rows, labels, constants={"aspect": aspect})),
         "stats": summary,
-        "chart": chart_data_uri
+        "chart": chart,
+        "throughput": throughput
     }), 200
 
 @app.route('/process/zero_shot_sentiment', methods=['POST'])
@@ -1002,56 +1258,51 @@ def process_zero_shot_sentiment():
     if not params:
         return jsonify({"error": "No JSON payload provided."}), 400
 
-    csv_b64 = params.get("base64")
-    file_type = params.get("fileType", "csv").lower()
+    dataset_ref = params.get("datasetId") or params.get("base64")
     column = params.get("column")
     model_name = params.get("model")
 
     # Validate required parameters
-    if not all([csv_b64, column]):
-        missing = [param for param in ["base64", "column"] if not params.get(param)]
-        return jsonify({"error": f"Parameters 'base64' and 'column' are required."}), 400
-
-    # Decode file and read data
+    if not all([dataset_ref, column]):
+        missing = [param for param in ["datasetId", "column"] if not params.get(param)]
+        return jsonify({"error": f"Parameters 'datasetId' and 'column' are required."}), 400
+    chart_format = params.get("chartFormat", "png")
+    if chart_format not in CHART_FORMATS:
+        return jsonify({"error": f"Unsupported chart format '{chart_format}'."}), 400
+
+    # Look up the uploaded dataset
     try:
-        csv_bytes = base64.b64decode(csv_b64)
-        if file_type == "csv":
-            df, _ = parse_csv_from_bytes(csv_bytes)
-        elif file_type == "xlsx":
-            df, _ = parse_xlsx_from_bytes(csv_bytes)
-        else:
-            return jsonify({"error": f"Unsupported file type '{file_type}'."}), 400
+        dataset_id = resolve_dataset_id(params)
+        series = dataset_store.get_column(dataset_id, column)
+    except DatasetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except KeyError:
+        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
     except Exception as e:
         return jsonify({"error": f"Error decoding file: {str(e)}"}), 400
 
-    if column not in df.columns:
-        return jsonify({"error": f"Column '{column}' not found in dataset."}), 400
-
     # Remove missing values and filter out cells that become "nan" after conversion
-    df_clean = df[column].dropna()
-    df_clean = df_clean[df_clean.astype(str).str.strip().str.lower() != "nan"]
-    texts = df_clean.astype(str).tolist()
+    keep = (series.notna() & (series.astype(str).str.strip().str.lower() != "nan")).to_numpy()
+    rows = np.flatnonzero(keep)
+    texts = series[keep].astype(str).tolist()
     if not texts:
         return jsonify({"error": "No valid text data found in the specified column."}), 400
 
-    results = []
     try:
-        for text in tqdm(texts, desc="Processing zero-shot sentiment", unit="text"):
-            prompt = (
-                f"Please label the following text as Positive, Negative, or Neutral. Dont give any explanation, just label rationally and nothing else. Just write sentiment only.\n\n"
-                f"Text: \"{text}\"\n\nSentiment:"
-            )
-            response = ollama.chat(
-                model=model_name,
-                messages=[{'role': 'user', 'content': prompt}]
-            )
-            sentiment = response.message.content.strip().capitalize()
-            if sentiment not in ["Positive", "Negative", "Neutral"]:
-                sentiment = "Neutral"
-            results.append({
-                "text": text,
-                "sentiment": sentiment
-            })
+        runner = LLMBatchRunner(
+            model_name,
+            parallelism=params.get("parallelism", DEFAULT_PARALLELISM),
+            pack_size=params.get("packSize", DEFAULT_PACK_SIZE)
+        )
+        labels, throughput = runner.run(
+            texts,
+            build_zero_shot_prompt,
+            build_packed_zero_shot_prompt,
+            desc="Processing zero-shot sentiment",
+            on_progress=label_progress_reporter(),
+            cache=llm_label_cache if params.get("useCache", True) else None,
+            cache_key_fn=lambda text: label_cache_key(model_name, ZERO_SHOT_PROMPT_VERSION, None, text)
+        )
     except Exception as e:
         return jsonify({"error": f"Error during zero-shot sentiment analysis: {str(e)}"}), 500
 
@@ -1061,8 +1312,7 @@ def process_zero_shot_sentiment():
         "Neutral":  {"Count": 0},
         "Negative": {"Count": 0}
     }
-    for r in results:
-        s = r["sentiment"]
+    for s in labels:
         if s in summary:
             summary[s]["Count"] += 1
 
@@ -1077,43 +1327,262 @@ def process_zero_shot_sentiment():
         percentages = {"Positive": 0, "Neutral": 0, "Negative": 0}
 
     # Generate a bar chart for the sentiment distribution
-    plt.figure(figsize=(6, 4))
-    sentiments_list = list(percentages.keys())
-    percents_list = list(percentages.values())
-    bars = plt.bar(sentiments_list, percents_list, color=["green", "blue", "red"])
-    plt.xlabel("Sentiment")
-    plt.ylabel("Percentage")
-    plt.title("Zero-Shot Sentiment Analysis Summary")
-    for bar in bars:
-        yval = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width() / 2.0, yval, f'{yval:.1f}%', va='bottom', ha='center')
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    chart_b64 = base64.b64encode(buf.read()).decode("utf-8")
-    chart_data_uri = f"data:image/png;base64,{chart_b64}"
+    chart = chart_service.render(sentiment_chart(percentages, "Zero-Shot Sentiment Analysis Summary"), chart_format)
 
     return jsonify({
         "message": "Zero-shot sentiment analysis completed.",
-        "results": results,
+        **result_fields(params, ResultSet.from_labels(dataset_id, column, rows, labels)),
         "stats": summary,
-        "chart": chart_data_uri
+        "chart": chart,
+        "throughput": throughput
+    }), 200
+
+
+def result_texts(result):
+    # The dataset column when ?includeText is set, so rows carry their text.
+    if request.args.get("includeText", "false").lower() in ("1", "true", "yes"):
+        return dataset_store.get_column(result.dataset_id, result.column)
+    return None
+
+@app.route('/results/<result_id>', methods=['GET'])
+def get_results(result_id):
+    """
+    Page through a stored result: `limit` rows from row `cursor` as columns,
+    with `nextCursor` for the following page (null after the last one).
+    `format=ndjson` streams the rows from `cursor` as one JSON object per
+    line instead, all remaining rows unless `limit` is given.
+    """
+    try:
+        result = result_store.get(result_id)
+        texts = result_texts(result)
+    except (ResultNotFound, DatasetNotFound) as e:
+        return jsonify({"error": str(e)}), 404
+    cursor = max(request.args.get("cursor", 0, type=int), 0)
+    if request.args.get("format", "json") == "ndjson":
+        limit = request.args.get("limit", type=int)
+        end = None if limit is None else cursor + max(limit, 0)
+        return Response(result.iter_ndjson(cursor, end, texts), mimetype="application/x-ndjson")
+    limit = min(max(request.args.get("limit", DEFAULT_PAGE_ROWS, type=int), 1), MAX_PAGE_ROWS)
+    end = min(cursor + limit, len(result))
+    return jsonify({
+        "resultId": result_id,
+        "total": len(result),
+        "cursor": cursor,
+        "nextCursor": end if end < len(result) else None,
+        "columns": result.columns(cursor, end, texts)
     }), 200
 
+@app.route('/results/<result_id>/export', methods=['GET'])
+def export_results(result_id):
+    # Streamed download of every row as ?format=csv (default), parquet or ndjson.
+    export_format = request.args.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."}), 400
+    try:
+        result = result_store.get(result_id)
+        texts = result_texts(result)
+    except (ResultNotFound, DatasetNotFound) as e:
+        return jsonify({"error": str(e)}), 404
+    if export_format == "csv":
+        body, mimetype = result.iter_csv(texts), "text/csv"
+    elif export_format == "parquet":
+        body, mimetype = result.iter_parquet(texts), "application/vnd.apache.parquet"
+    else:
+        body, mimetype = result.iter_ndjson(texts=texts), "application/x-ndjson"
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=results_{result_id}.{export_format}"
+    })
+
+
+def run_view_as_job(path, params):
+    # Replays a /process/* request inside a worker thread and returns the
+    # view's JSON body and status code.
+    endpoint, _ = app.url_map.bind('').match(path, method='POST')
+    with app.test_request_context(path, method='POST', json=params):
+        response = app.make_response(app.view_functions[endpoint]())
+        return response.get_json(), response.status_code
+
+def run_job_view(path, params):
+    with timed() as timing:
+        if analysis_pool is not None and analysis_pool.handles(route_rule(path)):
+            body, status_code = analysis_pool.run(path, params)
+        else:
+            body, status_code = run_view_as_job(path, params)
+    observe_request(route_rule(path), status_code, timing)
+    return body, status_code
+
+def observe_request(rule, status_code, timing):
+    requests_total.inc({"route": rule, "status": status_code})
+    request_seconds.observe({"route": rule}, timing.total())
+    for stage, seconds in timing.stages.items():
+        stage_seconds.observe({"route": rule, "stage": stage}, seconds)
+
+def route_rule(path):
+    try:
+        rule, _ = app.url_map.bind('').match(path or "", method='POST', return_rule=True)
+    except HTTPException:
+        return None
+    return rule.rule
+
+def job_type_for(path):
+    return JOB_TYPES.get(route_rule(path))
+
+@app.before_request
+def start_request_timing():
+    # Registered before dispatch_to_analysis_pool, so worker stages land here.
+    g.timing_token = start_timing()
+
+@app.after_request
+def record_request_timing(response):
+    timing = current_timing()
+    if timing is None or request.url_rule is None:
+        return response
+    observe_request(request.url_rule.rule, response.status_code, timing)
+    if DEFAULT_TIMING_HEADER or request.headers.get("X-Timing"):
+        response.headers["X-Timing"] = timing.header()
+    return response
+
+@app.teardown_request
+def stop_request_timing(exc):
+    token = g.pop("timing_token", None)
+    if token is not None:
+        stop_timing(token)
+
+@app.before_request
+def dispatch_to_analysis_pool():
+    # Under serve.py, direct requests to CPU-heavy routes run in a pool
+    # worker too; requests without a JSON body get their 400 from the view here.
+    if analysis_pool is None or request.method != 'POST' or request.url_rule is None:
+        return None
+    if not analysis_pool.handles(request.url_rule.rule):
+        return None
+    params = request.get_json(silent=True)
+    if not params:
+        return None
+    body, status_code = analysis_pool.run(request.path, params)
+    return jsonify(body), status_code
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    payload = request.get_json()
+    if not payload:
+        return jsonify({"error": "No JSON payload provided."}), 400
+    path = payload.get("endpoint")
+    params = payload.get("params") or {}
+    job_type = job_type_for(path)
+    if job_type is None:
+        return jsonify({"error": f"Endpoint '{path}' cannot be run as a job."}), 400
+    try:
+        job = job_manager.submit(job_type, path, lambda: run_job_view(path, params))
+    except JobManagerClosed as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(job.to_dict()), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({"jobs": job_manager.list(), "queueDepth": job_manager.queue_depth()}), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    return jsonify(job.to_dict(include_result=False)), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    if job_manager.get(job_id) is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    return Response(
+        job_manager.events(job_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/model_stats', methods=['GET'])
+def model_stats():
+    return jsonify(model_registry.stats()), 200
+
+@app.route('/startup_stats', methods=['GET'])
+def startup_stats():
+    return jsonify(startup_profile.report()), 200
 
 @app.route('/system_stats', methods=['GET'])
 def system_stats():
-    cpu_utilization = psutil.cpu_percent(interval=1)
-    ram_info = psutil.virtual_memory()
-    ram_total = ram_info.total / (1024 ** 3)
-    ram_available = ram_info.available / (1024 ** 3)
-    ram_utilization = ram_info.percent
+    sample = system_sampler.latest()
     stats = {
-        "cpu_utilization_percent": cpu_utilization,
-        "ram_utilization_percent": ram_utilization,
+        "cpu_utilization_percent": sample["cpu_utilization_percent"],
+        "ram_utilization_percent": sample["ram_utilization_percent"],
+        "sampled_at": sample["sampled_at"]
     }
     return jsonify(stats), 200
 
+def process_snapshot(llm_labels=True):
+    # Cache counters and loaded models of this process; analysis workers
+    # send theirs back with every result (see serve.py). They leave out the
+    # LLM label cache: ABSA and zero-shot run in the server process.
+    bertopic = bertopic_stages.stats()
+    caches = {
+        "text_artifacts": text_artifacts.stats(),
+        "embeddings": embedding_store.stats(),
+        "wordcloud_images": wordcloud_renderer.stats(),
+        "bertopic_stages": bertopic,
+        "bertopic_models": {"hits": bertopic["model_hits"], "misses": bertopic["model_misses"]}
+    }
+    if llm_labels:
+        caches["llm_labels"] = llm_label_cache.stats()
+    return {"caches": caches, "models": model_registry.stats()["models"]}
+
+def collect_metrics():
+    snapshots = {os.getpid(): process_snapshot()}
+    if analysis_pool is not None:
+        snapshots.update(analysis_pool.worker_snapshots())
+    hits, misses, model_bytes, model_hits = [], [], [], []
+    for pid, snapshot in snapshots.items():
+        for cache, stats in snapshot["caches"].items():
+            hits.append(({"cache": cache, "pid": pid}, stats["hits"]))
+            misses.append(({"cache": cache, "pid": pid}, stats["misses"]))
+        for model in snapshot["models"]:
+            labels = {"kind": model["kind"], "name": model["name"], "pid": pid}
+            model_bytes.append((labels, model["bytes"]))
+            model_hits.append((labels, model["hits"]))
+    depth = [
+        ({"type": job_type, "state": state}, count)
+        for job_type, states in job_manager.queue_depth().items() for state, count in states.items()
+    ]
+    sample = system_sampler.latest()
+    rss = [({"pid": os.getpid()}, sample["process_rss_bytes"])]
+    rss += [({"pid": child["pid"]}, child["rss_bytes"]) for child in sample["children"]]
+    startup = startup_profile.report()
+    return [
+        ("ss_cache_hits_total", "counter", "Cache hits, by cache and process.", hits),
+        ("ss_cache_misses_total", "counter", "Cache misses, by cache and process.", misses),
+        ("ss_model_bytes", "gauge", "Memory of each loaded model (parameters, or RSS growth on load).", model_bytes),
+        ("ss_model_hits_total", "counter", "Requests served by an already loaded model.", model_hits),
+        ("ss_job_queue_depth", "gauge", "Background jobs by type and state.", depth),
+        ("ss_process_resident_bytes", "gauge", "Resident memory of the server and its child processes.", rss),
+        ("ss_cpu_utilization_percent", "gauge", "System CPU utilisation.", [({}, sample["cpu_utilization_percent"])]),
+        ("ss_ram_utilization_percent", "gauge", "System RAM utilisation.", [({}, sample["ram_utilization_percent"])]),
+        ("ss_startup_seconds", "gauge", "Server process start-up time by phase (see /startup_stats).",
+         [({"phase": phase}, seconds) for phase, seconds in startup["phases"].items()]
+         + [({"phase": "total"}, startup["total_seconds"])])
+    ]
+
+metrics_registry.register_collector(collect_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+startup_profile.mark("routes")
+startup_profile.finish()
+
 if __name__ == '__main__':
     app.run(debug=True)
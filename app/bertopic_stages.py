@@ -0,0 +1,249 @@
+"""
+BERTopic split into its expensive stages (UMAP, HDBSCAN), cached per
+dataset, column, embedding model, stop-word setting and UMAP parameters,
+and its cheap c-TF-IDF topic extraction, which reruns on the cached
+clusters when only numTopics changes.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from disk_cache import evict_oldest, touch
+from metrics import span
+
+DEFAULT_BERTOPIC_DIR = os.environ.get(
+    "SS_BERTOPIC_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "bertopic")
+)
+DEFAULT_BERTOPIC_CACHE_MB = int(os.environ.get("SS_BERTOPIC_CACHE_MB", 256))
+DEFAULT_BERTOPIC_CACHE_MODELS = int(os.environ.get("SS_BERTOPIC_CACHE_MODELS", 8))
+# Stage files on disk; the least recently used are removed beyond this
+DEFAULT_BERTOPIC_DISK_MB = int(os.environ.get("SS_BERTOPIC_DISK_MB", 2048))
+
+_DATASET_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def fit_stages(embeddings, umap_params, min_topic_size=5):
+    """
+    The expensive half of BERTopic.fit_transform: UMAP on the sentence
+    embeddings, then HDBSCAN with BERTopic's default settings. Returns
+    (reduced embeddings, raw cluster labels).
+    """
+    from umap import UMAP
+    try:
+        from hdbscan import HDBSCAN
+    except ImportError:
+        # BERTopic falls back to scikit-learn's HDBSCAN the same way.
+        from sklearn.cluster import HDBSCAN
+
+    with span("umap"):
+        reduced = np.nan_to_num(UMAP(**umap_params).fit_transform(embeddings))
+    with span("hdbscan"):
+        clusterer = HDBSCAN(
+            min_cluster_size=min_topic_size,
+            metric="euclidean",
+            cluster_selection_method="eom",
+            prediction_data=True
+        ).fit(reduced)
+    return reduced.astype(np.float32), np.asarray(clusterer.labels_, dtype=np.int64)
+
+
+def fit_topics(docs, embeddings, labels, num_topics, min_topic_size=5):
+    """
+    The cheap half: c-TF-IDF topic representations for fixed cluster labels,
+    reduced to num_topics. Passing the labels as `y` to a BERTopic with
+    pass-through UMAP and clustering stages gives the same topics as a full
+    fit that clustered into those labels.
+    """
+    from bertopic import BERTopic
+    from bertopic.cluster import BaseCluster
+    from bertopic.dimensionality import BaseDimensionalityReduction
+
+    topic_model = BERTopic(
+        verbose=False,
+        nr_topics=num_topics,
+        min_topic_size=min_topic_size,
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=BaseCluster()
+    )
+    topics, _ = topic_model.fit_transform(docs, embeddings, y=labels)
+    return topic_model, topics
+
+
+class BERTopicStageCache:
+    """
+    Fitted BERTopic stages keyed by (dataset ID, column, embedding model,
+    stop-word flag, UMAP params, min_topic_size): the reduced embeddings and
+    HDBSCAN labels, kept in an in-memory LRU up to max_bytes and written to
+    `<stage_dir>/<dataset_id>/` as .npz. Topic models fitted on top of them
+    are kept per number of topics (up to max_models), so changing numTopics
+    only repeats topic extraction and reduction, and changing wordsPerTopic
+    only reads the cached topics. Stage files are capped at max_disk_bytes,
+    least recently used first, and drop_dataset() removes a dataset's.
+    """
+
+    def __init__(self, stage_dir=DEFAULT_BERTOPIC_DIR, max_bytes=DEFAULT_BERTOPIC_CACHE_MB * 1024 ** 2,
+                 max_models=DEFAULT_BERTOPIC_CACHE_MODELS, max_disk_bytes=DEFAULT_BERTOPIC_DISK_MB * 1024 ** 2):
+        self.stage_dir = stage_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_models = max_models
+        self._stages = OrderedDict()
+        self._stage_bytes = 0
+        self._models = OrderedDict()
+        self._build_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.model_hits = 0
+        self.model_misses = 0
+
+    @staticmethod
+    def stage_key(dataset_id, column, embedding_model, remove_stopwords, umap_params, min_topic_size=5):
+        return (dataset_id, json.dumps(
+            [str(column), embedding_model, bool(remove_stopwords), umap_params, int(min_topic_size)],
+            sort_keys=True
+        ))
+
+    def _path(self, key):
+        dataset_id, settings = key
+        if not _DATASET_ID_RE.match(dataset_id or ""):
+            return None
+        digest = hashlib.blake2b(settings.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.stage_dir, dataset_id, f"{digest}.npz")
+
+    def _build_lock(self, key):
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.Lock())
+
+    def _remember_stages(self, key, stages):
+        with self._lock:
+            if key in self._stages:
+                return
+            nbytes = sum(array.nbytes for array in stages)
+            self._stages[key] = (stages, nbytes)
+            self._stage_bytes += nbytes
+            while len(self._stages) > 1 and self._stage_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._stages.popitem(last=False)
+                self._stage_bytes -= evicted_bytes
+
+    def _cached_stages(self, key):
+        with self._lock:
+            if key in self._stages:
+                self._stages.move_to_end(key)
+                return self._stages[key][0]
+        return None
+
+    def stages(self, key, embeddings_fn):
+        """
+        (reduced embeddings, cluster labels) for the key, loaded from disk or
+        fitted on embeddings_fn() on first use.
+        """
+        path = self._path(key)
+        stages = self._cached_stages(key)
+        if stages is not None:
+            self._count_hit(path)
+            return stages
+        with self._build_lock(key):
+            stages = self._cached_stages(key)
+            if stages is not None:
+                self._count_hit(path)
+                return stages
+            _, settings = key
+            umap_params, min_topic_size = json.loads(settings)[3:]
+            if path and os.path.exists(path):
+                with np.load(path, allow_pickle=False) as data:
+                    stages = (data["reduced"], data["labels"])
+                self._count_hit(path)
+            else:
+                with self._lock:
+                    self.misses += 1
+                stages = fit_stages(embeddings_fn(), umap_params, min_topic_size)
+                if path:
+                    self._save(path, stages)
+            self._remember_stages(key, stages)
+        with self._lock:
+            self._build_locks.pop(key, None)
+        return stages
+
+    def _count_hit(self, path):
+        if path:
+            touch(path)
+        with self._lock:
+            self.hits += 1
+
+    def topics(self, key, num_topics, docs, embeddings_fn):
+        """
+        (topic_model, reduced embeddings, per-document topics) for the key
+        reduced to num_topics. The model is shared between requests and must
+        only be read.
+        """
+        model_key = (key, num_topics)
+        with self._lock:
+            if model_key in self._models:
+                self._models.move_to_end(model_key)
+                self.model_hits += 1
+                return self._models[model_key]
+        with self._build_lock(model_key):
+            with self._lock:
+                if model_key in self._models:
+                    self.model_hits += 1
+                    return self._models[model_key]
+            reduced, labels = self.stages(key, embeddings_fn)
+            with self._lock:
+                self.model_misses += 1
+            min_topic_size = json.loads(key[1])[4]
+            embeddings = embeddings_fn()
+            with span("fit"):
+                topic_model, topics = fit_topics(docs, embeddings, labels, num_topics, min_topic_size)
+            result = (topic_model, reduced, topics)
+            with self._lock:
+                self._models[model_key] = result
+                while len(self._models) > max(self.max_models, 1):
+                    self._models.popitem(last=False)
+        with self._lock:
+            self._build_locks.pop(model_key, None)
+        return result
+
+    def _save(self, path, stages):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, reduced=stages[0], labels=stages[1])
+        os.replace(tmp_path, path)
+        # Another thread's .tmp.npz is still being written; leave it alone.
+        files = [name for name in glob.glob(os.path.join(self.stage_dir, "*", "*.npz"))
+                 if not name.endswith(".tmp.npz")]
+        evict_oldest(files, self.max_disk_bytes, keep={path})
+
+    def drop_dataset(self, dataset_id):
+        """Forget a dataset's stages and topic models, in memory and on disk."""
+        if not _DATASET_ID_RE.match(dataset_id or ""):
+            return
+        with self._lock:
+            for key in [key for key in self._stages if key[0] == dataset_id]:
+                _, nbytes = self._stages.pop(key)
+                self._stage_bytes -= nbytes
+            for model_key in [model_key for model_key in self._models if model_key[0][0] == dataset_id]:
+                del self._models[model_key]
+        shutil.rmtree(os.path.join(self.stage_dir, dataset_id), ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_stages": len(self._stages),
+                "cached_bytes": self._stage_bytes,
+                "cached_models": len(self._models),
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "model_hits": self.model_hits,
+                "model_misses": self.model_misses
+            }
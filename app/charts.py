@@ -0,0 +1,147 @@
+"""
+Charts for the sentiment and topic-modeling routes. Each chart is a small
+JSON spec (bar, line or scatter) drawn with matplotlib's object-oriented
+Figure API rather than pyplot's global state, so concurrent requests cannot
+draw into each other; a response's specs render in parallel on a thread
+pool, or are returned as-is with chartFormat "json".
+"""
+import base64
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import span
+
+CHART_FORMATS = ("png", "json")
+DEFAULT_CHART_WORKERS = int(os.environ.get("SS_CHART_WORKERS", 4))
+SENTIMENT_COLORS = {"Positive": "green", "Neutral": "blue", "Negative": "red"}
+
+
+def _to_list(values):
+    return [value.item() if hasattr(value, "item") else value for value in values]
+
+
+# Chart specs are plain JSON-serialisable dicts: the same object is drawn
+# server-side by render_png or returned as-is for client-side rendering.
+
+def bar_chart(labels, values, title, xlabel, ylabel, colors=None, value_decimals=1, value_suffix="%", figsize=(6, 4)):
+    return {
+        "type": "bar",
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+        "x": _to_list(labels),
+        "y": _to_list(values),
+        "colors": colors,
+        "valueDecimals": value_decimals,
+        "valueSuffix": value_suffix,
+        "figsize": list(figsize)
+    }
+
+
+def sentiment_chart(percentages, title):
+    labels = list(percentages)
+    return bar_chart(labels, list(percentages.values()), title, "Sentiment", "Percentage",
+                     colors=[SENTIMENT_COLORS.get(label, "gray") for label in labels])
+
+
+def line_chart(x, y, title, xlabel, ylabel, figsize=(8, 6)):
+    return {
+        "type": "line",
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+        "x": _to_list(x),
+        "y": _to_list(y),
+        "figsize": list(figsize)
+    }
+
+
+def scatter_chart(points, labels, title, colorbar_label, num_colors=None, ticks=None, xlabel="PC1", ylabel="PC2",
+                  figsize=(8, 6)):
+    """
+    2-D scatter coloured by integer labels on viridis; num_colors makes the
+    colormap discrete with that many levels.
+    """
+    return {
+        "type": "scatter",
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+        "x": _to_list(points[:, 0]),
+        "y": _to_list(points[:, 1]),
+        "c": _to_list(labels),
+        "cmap": "viridis",
+        "colors": num_colors,
+        "colorbarLabel": colorbar_label,
+        "colorbarTicks": _to_list(ticks) if ticks is not None else None,
+        "figsize": list(figsize)
+    }
+
+
+def _draw_bar(fig, ax, spec):
+    bars = ax.bar(spec["x"], spec["y"], color=spec["colors"])
+    for bar in bars:
+        yval = bar.get_height()
+        label = f"{yval:.{spec['valueDecimals']}f}{spec['valueSuffix']}"
+        ax.text(bar.get_x() + bar.get_width() / 2.0, yval, label, va="bottom", ha="center")
+
+
+def _draw_line(fig, ax, spec):
+    ax.plot(spec["x"], spec["y"], marker="o")
+    ax.grid(True)
+
+
+def _draw_scatter(fig, ax, spec):
+    import matplotlib
+
+    cmap = matplotlib.colormaps[spec["cmap"]]
+    if spec["colors"]:
+        cmap = cmap.resampled(spec["colors"])
+    scatter = ax.scatter(spec["x"], spec["y"], c=spec["c"], cmap=cmap, alpha=0.7)
+    fig.colorbar(scatter, ax=ax, ticks=spec["colorbarTicks"], label=spec["colorbarLabel"])
+
+
+CHART_TEMPLATES = {"bar": _draw_bar, "line": _draw_line, "scatter": _draw_scatter}
+
+
+def render_png(spec):
+    """
+    Draw a chart spec on its own Figure (no pyplot state, so concurrent
+    renders cannot draw into each other) and return a PNG data URI.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec["figsize"])
+    ax = fig.subplots()
+    CHART_TEMPLATES[spec["type"]](fig, ax, spec)
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode('utf-8')}"
+
+
+class ChartService:
+    """
+    Renders chart specs on a thread pool, off the request thread. With
+    chart_format "json" the specs are returned for the client to draw.
+    """
+
+    def __init__(self, workers=DEFAULT_CHART_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="chart")
+
+    def render(self, spec, chart_format="png"):
+        return self.render_many({"chart": spec}, chart_format)["chart"]
+
+    def render_many(self, specs, chart_format="png"):
+        """Render a {name: spec} dict in parallel; None specs are skipped."""
+        if chart_format not in CHART_FORMATS:
+            raise ValueError(f"Unsupported chart format '{chart_format}'. Use one of: {', '.join(CHART_FORMATS)}.")
+        specs = {name: spec for name, spec in specs.items() if spec is not None}
+        if chart_format == "json":
+            return specs
+        with span("render"):
+            futures = {name: self._executor.submit(render_png, spec) for name, spec in specs.items()}
+            return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,192 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+EPSILON = 1e-12
+
+# Same window sizes and default top-n as gensim's CoherenceModel.
+SLIDING_WINDOW_SIZES = {"c_v": 110, "c_npmi": 10}
+COHERENCE_MEASURES = ("c_v", "c_npmi", "u_mass")
+DEFAULT_TOPN = 20
+
+
+def _expand_ranges(starts, lengths):
+    # Concatenate arange(start, start + length) for every pair.
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(total, dtype=np.int64) + np.repeat(starts - offsets, lengths)
+
+
+class CoherenceIndex:
+    """
+    Topic coherence (c_v, c_npmi, u_mass) for many topic sets over one
+    tokenized corpus, giving the same numbers as gensim's CoherenceModel.
+
+    The corpus is encoded once as integer token ids with a positional
+    inverted index. For each candidate top word, the set of sliding windows
+    (or documents, for u_mass) it occurs in is derived directly from its
+    positions and cached as one column of a sparse window-by-word incidence
+    matrix. Scoring a topic set then only multiplies the columns of its
+    words, so a sweep over many k costs one small sparse product per k
+    instead of a pass over the corpus.
+
+    Window membership follows gensim's WordOccurrenceAccumulator exactly,
+    including the way it clears a word when one of its occurrences slides
+    out of the window even if another occurrence is still inside.
+    """
+
+    def __init__(self, tokenized_texts):
+        lengths = np.fromiter((len(text) for text in tokenized_texts), dtype=np.int64,
+                              count=len(tokenized_texts))
+        flat = np.fromiter(itertools.chain.from_iterable(tokenized_texts), dtype=object,
+                           count=int(lengths.sum()))
+        codes, uniques = pd.factorize(flat)
+        self._build(codes, lengths, uniques)
+
+    @classmethod
+    def from_codes(cls, codes, lengths, vocabulary):
+        """
+        Index a corpus that is already integer-encoded (e.g. a cached
+        TextArtifact), skipping tokenization and encoding.
+        """
+        index = cls.__new__(cls)
+        index._build(np.asarray(codes, dtype=np.int64), np.asarray(lengths, dtype=np.int64), vocabulary)
+        return index
+
+    def _build(self, codes, lengths, uniques):
+        self.token2id = {token: i for i, token in enumerate(uniques)}
+        self.num_docs = len(lengths)
+        self.num_tokens = len(codes)
+        self._doc_lengths = lengths
+        self._doc_starts = np.cumsum(lengths) - lengths
+        self._token_doc = np.repeat(np.arange(self.num_docs), lengths)
+        # Positions of each token id, in corpus order.
+        self._postings = np.argsort(codes, kind="stable")
+        self._posting_starts = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))))
+        self._layouts = {}
+        self._columns = {}
+
+    def _positions(self, word_id):
+        return self._postings[self._posting_starts[word_id]:self._posting_starts[word_id + 1]]
+
+    def _layout(self, window_size):
+        # Every document yields max(1, len - window_size + 1) windows, as in
+        # gensim.utils.iter_windows(ignore_below_size=False).
+        if window_size not in self._layouts:
+            per_doc = np.maximum(self._doc_lengths - window_size + 1, 1)
+            self._layouts[window_size] = (np.cumsum(per_doc) - per_doc, int(per_doc.sum()))
+        return self._layouts[window_size]
+
+    def _window_column(self, word_id, window_size):
+        positions = self._positions(word_id)
+        docs = self._token_doc[positions]
+        if window_size is None:
+            return np.unique(docs)
+        base, _ = self._layout(window_size)
+        local = positions - self._doc_starts[docs]
+        last = self._doc_lengths[docs] - window_size
+
+        # Documents no longer than the window are a single window.
+        short = last <= 0
+        short_windows = base[docs[short]]
+
+        docs, local, last = docs[~short], local[~short], last[~short]
+        # A token enters at the window where it becomes the right edge (or
+        # window 0) and clears the word when it leaves through the left
+        # edge. Within one window the clear happens before the entry.
+        entries = base[docs] + np.maximum(local - window_size + 1, 0)
+        doc_ends = base[docs] + last + 1
+        leaves = (base[docs] + local + 1)[local + 1 <= last]
+        next_leave = np.searchsorted(leaves, entries, side="right")
+        ends = np.append(leaves, np.iinfo(np.int64).max)[next_leave]
+        ends = np.minimum(ends, doc_ends)
+        # Entries and ends are both non-decreasing, so overlapping spans are
+        # trimmed against the previous end before expanding them.
+        starts = np.maximum(entries, np.concatenate(([0], ends[:-1])))
+        spans = np.maximum(ends - starts, 0)
+        long_windows = _expand_ranges(starts, spans)
+        return np.unique(np.concatenate((short_windows, long_windows)))
+
+    def _column(self, word_id, window_size):
+        key = (window_size, word_id)
+        if key not in self._columns:
+            self._columns[key] = self._window_column(word_id, window_size)
+        return self._columns[key]
+
+    def counts(self, word_ids, window_size=None):
+        """
+        Symmetric matrix of co-occurrence counts for word_ids (occurrence
+        counts on the diagonal) and the number of windows, or of documents
+        when window_size is None.
+        """
+        columns = [self._column(word_id, window_size) for word_id in word_ids]
+        num_windows = self.num_docs if window_size is None else self._layout(window_size)[1]
+        indptr = np.concatenate(([0], np.cumsum([len(column) for column in columns])))
+        indices = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        incidence = sparse.csc_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(num_windows, len(columns))
+        )
+        return (incidence.T @ incidence).toarray(), num_windows
+
+    def topic_ids(self, topics, topn=DEFAULT_TOPN):
+        # Like gensim: words missing from the corpus are dropped, and all
+        # topics are cut to topn when the first one is longer.
+        if topics and len(topics[0]) > topn:
+            topics = [topic[:topn] for topic in topics]
+        topic_ids = []
+        for topic in topics:
+            ids = [self.token2id[word] for word in topic if word in self.token2id]
+            if not ids:
+                raise ValueError("unable to interpret topic as either a list of tokens or a list of ids")
+            topic_ids.append(ids)
+        return topic_ids
+
+    def coherence_per_topic(self, topics, measure="c_v", topn=DEFAULT_TOPN):
+        if measure not in COHERENCE_MEASURES:
+            raise ValueError(f"Unsupported coherence measure '{measure}'.")
+        topic_ids = self.topic_ids(topics, topn)
+        word_ids = list(dict.fromkeys(itertools.chain.from_iterable(topic_ids)))
+        counts, num_windows = self.counts(word_ids, SLIDING_WINDOW_SIZES.get(measure))
+        column_of = {word_id: i for i, word_id in enumerate(word_ids)}
+
+        scores = []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for ids in topic_ids:
+                columns = [column_of[word_id] for word_id in ids]
+                co_occurrence = counts[np.ix_(columns, columns)] / float(num_windows)
+                occurrence = np.diag(co_occurrence)
+                if measure == "u_mass":
+                    # log P(w_i, w_j) / P(w_j) over pairs with j < i.
+                    rows, cols = np.tril_indices(len(ids), -1)
+                    segment_sims = np.log((co_occurrence[rows, cols] + EPSILON) / occurrence[cols])
+                else:
+                    npmi = (np.log((co_occurrence + EPSILON) / np.outer(occurrence, occurrence))
+                            / -np.log(co_occurrence + EPSILON))
+                    if measure == "c_npmi":
+                        segment_sims = npmi[~np.eye(len(ids), dtype=bool)]
+                    else:
+                        # Cosine between each word's NPMI context vector and
+                        # the summed vector of the whole topic.
+                        topic_vector = npmi.sum(axis=0)
+                        segment_sims = (npmi @ topic_vector) / (
+                            np.sqrt(np.sum(npmi ** 2, axis=1)) * np.sqrt(np.sum(topic_vector ** 2))
+                        )
+                scores.append(float(np.mean(segment_sims)))
+        return scores
+
+    def coherence(self, topics, measure="c_v", topn=DEFAULT_TOPN):
+        return float(np.mean(self.coherence_per_topic(topics, measure, topn)))
+
+    def stats(self):
+        return {
+            "documents": self.num_docs,
+            "tokens": self.num_tokens,
+            "vocabulary": len(self.token2id),
+            "windows": {str(size): layout[1] for size, layout in self._layouts.items()},
+            "cached_columns": len(self._columns)
+        }
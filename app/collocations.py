@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+from joblib import Parallel, delayed
+
+COLLOCATION_MEASURES = ("freq", "pmi", "likelihood_ratio")
+DEFAULT_COLLOCATION_JOBS = int(os.environ.get("SS_COLLOCATION_JOBS", -1))
+# Upper bound on n_jobs in this process (lowered in serve.py's workers).
+MAX_JOBS = os.cpu_count() or 1
+# Tokens per counting chunk; smaller corpora are counted in one pass.
+CHUNK_TOKENS = int(os.environ.get("SS_COLLOCATION_CHUNK_TOKENS", 2000000))
+
+_SMALL = 1e-20
+
+
+def _reduce(keys, counts, first_seen):
+    # Sum counts and keep the earliest position per distinct key.
+    order = np.lexsort((first_seen, keys))
+    keys, counts, first_seen = keys[order], counts[order], first_seen[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(counts, starts), first_seen[starts]
+
+
+def _count_chunk(codes, offsets, start, end, window_size, vocab_size):
+    """
+    Windowed bigram counts for tokens codes[start:end] (whole documents).
+    Returns (pair keys first * vocab_size + second, counts, first position),
+    where a position orders pairs like BigramCollocationFinder.from_words:
+    by token, then by distance within the window.
+    """
+    codes = codes[start:end].astype(np.int64)
+    doc_ends = np.repeat(offsets[1:], np.diff(offsets)) - start
+    positions = np.arange(len(codes), dtype=np.int64)
+    keys, first_seen = [], []
+    for distance in range(1, window_size):
+        valid = positions + distance < doc_ends
+        left = positions[valid]
+        keys.append(codes[left] * vocab_size + codes[left + distance])
+        first_seen.append((left + start) * (window_size - 1) + distance - 1)
+    if not keys:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    keys, first_seen = np.concatenate(keys), np.concatenate(first_seen)
+    return _reduce(keys, np.ones(len(keys), dtype=np.int64), first_seen)
+
+
+def _chunks(offsets, chunk_tokens):
+    # Document-aligned [start, end) token ranges of about chunk_tokens each.
+    breaks = offsets[1:][np.diff(offsets // max(chunk_tokens, 1)) > 0]
+    bounds = np.unique(np.concatenate(([0], breaks, [offsets[-1]])))
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def count_bigrams(codes, offsets, vocab_size, window_size=2, n_jobs=DEFAULT_COLLOCATION_JOBS,
+                  chunk_tokens=CHUNK_TOKENS):
+    """
+    Bigram counts over an integer-encoded corpus (flat codes plus document
+    offsets), pairing each token with the window_size - 1 tokens after it
+    in the same document, as BigramCollocationFinder.from_words does per
+    text. Chunks of whole documents are counted on n_jobs threads and
+    merged. Returns (first word ids, second word ids, counts, first
+    position), one entry per distinct bigram.
+    """
+    if window_size < 2:
+        raise ValueError("Specify window_size at least 2")
+    offsets = np.asarray(offsets, dtype=np.int64)
+    chunks = _chunks(offsets, chunk_tokens)
+    n_jobs = MAX_JOBS if n_jobs < 0 else min(n_jobs, MAX_JOBS)
+    jobs = (
+        delayed(_count_chunk)(
+            codes, offsets[(offsets >= start) & (offsets <= end)], start, end, window_size, vocab_size
+        )
+        for start, end in chunks
+    )
+    # numpy releases the GIL while sorting, so threads share the codes array.
+    parts = Parallel(n_jobs=min(n_jobs, len(chunks)) or 1, prefer="threads")(jobs)
+    if not parts:
+        keys = counts = first_seen = np.zeros(0, dtype=np.int64)
+    elif len(parts) == 1:
+        keys, counts, first_seen = parts[0]
+    else:
+        keys, counts, first_seen = _reduce(*(np.concatenate(arrays) for arrays in zip(*parts)))
+    return keys // vocab_size, keys % vocab_size, counts, first_seen
+
+
+def association_scores(measure, bigram_counts, first_counts, second_counts, num_tokens, window_size=2):
+    """
+    Vectorised nltk BigramAssocMeasures scores with the corpus-wide counts,
+    scaling bigram counts by 1 / (window_size - 1) like
+    BigramCollocationFinder.score_ngram.
+    """
+    n_ii = bigram_counts / (window_size - 1.0)
+    n_ix = first_counts.astype(np.float64)
+    n_xi = second_counts.astype(np.float64)
+    n_xx = float(num_tokens)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if measure == "pmi":
+            return np.log2(n_ii * n_xx) - np.log2(n_ix * n_xi)
+        if measure == "likelihood_ratio":
+            n_oi = n_xi - n_ii
+            n_io = n_ix - n_ii
+            cont = (n_ii, n_oi, n_io, n_xx - n_ii - n_oi - n_io)
+            total = sum(cont)
+            score = np.zeros(len(n_ii))
+            for i in range(4):
+                expected = (cont[i] + cont[i ^ 1]) * (cont[i] + cont[i ^ 2]) / total
+                score += cont[i] * np.log(cont[i] / (expected + _SMALL) + _SMALL)
+            return 2 * score
+    raise ValueError(f"Unsupported collocation measure '{measure}'.")
+
+
+def top_collocations(codes, offsets, vocabulary, window_size=2, max_words=500, measure="freq", min_freq=1,
+                     n_jobs=DEFAULT_COLLOCATION_JOBS):
+    """
+    The max_words highest-scoring bigrams as {"first_second": score}.
+    "freq" scores are raw counts; "pmi" and "likelihood_ratio" are computed
+    from the global counts for bigrams seen at least min_freq times, and
+    non-positive scores are dropped. Ties keep the order in which bigrams
+    first appear, and only the top entries are sorted.
+    """
+    if measure not in COLLOCATION_MEASURES:
+        raise ValueError(f"Unsupported collocation measure '{measure}'.")
+    first, second, counts, first_seen = count_bigrams(codes, offsets, len(vocabulary), window_size, n_jobs)
+    keep = counts >= max(min_freq, 1)
+    if measure == "freq":
+        scores = counts
+    else:
+        word_counts = np.bincount(codes, minlength=len(vocabulary))
+        scores = association_scores(
+            measure, counts, word_counts[first], word_counts[second], len(codes), window_size
+        )
+        keep &= np.isfinite(scores) & (scores > 0)
+    first, second, scores, first_seen = first[keep], second[keep], scores[keep], first_seen[keep]
+
+    if len(scores) > max_words:
+        # Partial selection of the top entries (ties at the cut-off included)
+        # before the full sort.
+        cutoff = np.partition(scores, len(scores) - max_words)[len(scores) - max_words]
+        candidates = np.flatnonzero(scores >= cutoff)
+        order = candidates[np.lexsort((first_seen[candidates], -scores[candidates]))][:max_words]
+    else:
+        order = np.argsort(first_seen, kind="stable")
+    cast = int if measure == "freq" else float
+    return {
+        f"{vocabulary[first[i]]}_{vocabulary[second[i]]}": cast(scores[i])
+        for i in order
+    }
@@ -0,0 +1,238 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from disk_cache import evict_oldest, remove, touch
+from metrics import span
+
+# Default location for the columnar copies of uploaded datasets
+DEFAULT_DATASET_DIR = os.environ.get(
+    "SS_DATASET_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "datasets")
+)
+# Parquet copies kept on disk; the least recently used are removed beyond this
+DEFAULT_DATASET_DISK_MB = int(os.environ.get("SS_DATASET_DISK_MB", 8192))
+
+
+class DatasetNotFound(LookupError):
+    pass
+
+
+_DATASET_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def compute_dataset_id(data_bytes):
+    return hashlib.sha256(data_bytes).hexdigest()[:32]
+
+
+def spool_upload(stream, spool_dir, block_size=1024 ** 2):
+    """
+    Copy an upload stream to a temporary file in fixed-size blocks while
+    hashing it, so large files never have to be held in memory.
+    Returns (dataset_id, temp_path, size_in_bytes).
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=spool_dir, suffix=".upload")
+    with os.fdopen(fd, "wb") as fh:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+            fh.write(block)
+            size += len(block)
+    return digest.hexdigest()[:32], tmp_path, size
+
+
+def frame_to_arrow(df):
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # Mixed-type object columns (e.g. numbers and strings in one XLSX
+        # column) cannot be typed by Arrow; store them as strings instead.
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+class DatasetStore:
+    """
+    Converts each uploaded dataset once to a Parquet file keyed by content
+    hash. Analysis routes then memory-map only the column they need, so a
+    repeat run on a known file never re-parses the CSV/XLSX and never loads
+    the other columns. Recently used columns are kept in an in-memory LRU
+    bounded by entry count and approximate size, and the Parquet files
+    themselves are capped at max_disk_bytes, oldest access (mtime) first.
+    """
+
+    def __init__(self, max_items=32, max_bytes=1024 ** 3, data_dir=DEFAULT_DATASET_DIR,
+                 max_disk_bytes=DEFAULT_DATASET_DISK_MB * 1024 ** 2):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.data_dir = data_dir
+        self._evict_callbacks = []
+        self._columns = OrderedDict()  # (dataset_id, column) -> (series, nbytes)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _validate(self, dataset_id):
+        if not isinstance(dataset_id, str) or not _DATASET_ID_RE.match(dataset_id):
+            raise DatasetNotFound(f"Invalid dataset ID '{dataset_id}'.")
+
+    def path(self, dataset_id):
+        return os.path.join(self.data_dir, f"{dataset_id}.parquet")
+
+    def __contains__(self, dataset_id):
+        try:
+            self._validate(dataset_id)
+        except DatasetNotFound:
+            return False
+        return os.path.exists(self.path(dataset_id))
+
+    def put(self, dataset_id, df):
+        self._validate(dataset_id)
+        path = self.path(dataset_id)
+        if os.path.exists(path):
+            return dataset_id
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            pq.write_table(frame_to_arrow(df), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            remove(tmp_path)
+        self._evict_disk(keep=dataset_id)
+        return dataset_id
+
+    def put_chunks(self, dataset_id, chunks):
+        """
+        Write an iterable of DataFrame chunks as one Parquet file, one row
+        group per chunk. All columns are stored as strings because a column's
+        type cannot be known until every chunk has been seen.
+        """
+        self._validate(dataset_id)
+        path = self.path(dataset_id)
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer = None
+        try:
+            try:
+                for chunk in chunks:
+                    chunk = chunk.copy()
+                    chunk.columns = [str(col) for col in chunk.columns]
+                    if writer is None:
+                        schema = pa.schema([(col, pa.string()) for col in chunk.columns])
+                        writer = pq.ParquetWriter(tmp_path, schema)
+                    writer.write_table(pa.Table.from_pandas(chunk.astype(object), schema=schema,
+                                                            preserve_index=False))
+            finally:
+                if writer is not None:
+                    writer.close()
+            if writer is None:
+                raise ValueError("No rows found in upload.")
+            os.replace(tmp_path, path)
+        finally:
+            # A failed or interrupted upload must not leave its partial file.
+            remove(tmp_path)
+        self._evict_disk(keep=dataset_id)
+        return dataset_id
+
+    def on_evict(self, callback):
+        """Call callback(dataset_id) whenever a dataset is evicted from disk."""
+        self._evict_callbacks.append(callback)
+
+    def _touch(self, dataset_id):
+        # Reads refresh the mtime that disk eviction orders by.
+        touch(self.path(dataset_id))
+
+    def _remove_dataset(self, path):
+        dataset_id = os.path.basename(path)[:-len(".parquet")]
+        remove(path)
+        remove(self._stats_path(dataset_id))
+        for callback in self._evict_callbacks:
+            callback(dataset_id)
+
+    def _evict_disk(self, keep):
+        evict_oldest(glob.glob(os.path.join(self.data_dir, "*.parquet")), self.max_disk_bytes,
+                     keep={self.path(keep)}, remove_fn=self._remove_dataset)
+
+    def _stats_path(self, dataset_id):
+        return os.path.join(self.data_dir, f"{dataset_id}.stats.json")
+
+    def get_stats(self, dataset_id):
+        if dataset_id not in self:
+            return None
+        try:
+            with open(self._stats_path(dataset_id), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def put_stats(self, dataset_id, stats):
+        self._validate(dataset_id)
+        os.makedirs(self.data_dir, exist_ok=True)
+        with open(self._stats_path(dataset_id), "w", encoding="utf-8") as fh:
+            json.dump(stats, fh)
+
+    def columns(self, dataset_id):
+        self._validate(dataset_id)
+        path = self.path(dataset_id)
+        if not os.path.exists(path):
+            raise DatasetNotFound(f"Dataset '{dataset_id}' not found. Please upload the file again.")
+        self._touch(dataset_id)
+        return pq.read_schema(path).names
+
+    def get_column(self, dataset_id, column):
+        key = (dataset_id, column)
+        with self._lock:
+            if key in self._columns:
+                self._columns.move_to_end(key)
+                self._touch(dataset_id)
+                return self._columns[key][0]
+        if column not in self.columns(dataset_id):
+            raise KeyError(column)
+        with span("decode"):
+            table = pq.read_table(self.path(dataset_id), columns=[column], memory_map=True)
+            series = table.column(0).to_pandas()
+            if series.dtype == object:
+                # Arrow hands back missing strings as None; keep pandas' NaN so
+                # downstream astype(str)/dropna behave as with read_csv.
+                series = series.where(series.notna(), np.nan)
+        series.name = column
+        nbytes = int(series.memory_usage(deep=True))
+        with self._lock:
+            if key in self._columns:
+                # Another thread read the same column meanwhile; keep its copy.
+                self._columns.move_to_end(key)
+                return self._columns[key][0]
+            self._columns[key] = (series, nbytes)
+            self._total_bytes += nbytes
+            while self._columns and (len(self._columns) > self.max_items or self._total_bytes > self.max_bytes):
+                _, (_, evicted_bytes) = self._columns.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+        return series
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_columns": len(self._columns),
+                "cached_bytes": self._total_bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "max_disk_bytes": self.max_disk_bytes
+            }
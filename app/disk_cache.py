@@ -0,0 +1,46 @@
+"""
+Size caps for the on-disk caches. Entries are plain files whose mtime is
+refreshed on every read (touch), so evicting the oldest mtime first keeps
+the most recently used ones across all worker processes.
+"""
+import os
+
+
+def touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict_oldest(paths, max_bytes, keep=(), remove_fn=remove):
+    """
+    Remove files of `paths` oldest first, except those in `keep`, until the
+    rest take at most max_bytes. remove_fn(path) deletes one entry (with any
+    files that belong to it). Returns the removed paths.
+    """
+    entries = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        remove_fn(path)
+        removed.append(path)
+        total -= size
+    return removed
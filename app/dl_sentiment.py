@@ -0,0 +1,178 @@
+"""
+Transformer sentiment: each distinct text is tokenized once, and texts are
+run in length buckets capped by padded tokens per batch. Backends are the
+plain torch model, "int8" (dynamically quantised Linear layers) and "onnx"
+(exported once to SS_ONNX_DIR and run with ONNX Runtime).
+"""
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+DL_BACKENDS = ("torch", "int8", "onnx")
+DEFAULT_DL_BACKEND = os.environ.get("SS_DL_BACKEND", "torch")
+# Padded tokens per forward pass (rows x longest row in the batch).
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("SS_DL_TOKEN_BUDGET", 8192))
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("SS_DL_MAX_BATCH", 64))
+DEFAULT_ONNX_DIR = os.environ.get(
+    "SS_ONNX_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "onnx")
+)
+
+
+def plan_batches(lengths, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Group row indices into batches of similar length. Rows are sorted by
+    token count and a batch is closed once adding the next row would push
+    rows x longest row past token_budget or the batch reaches
+    max_batch_size. A row longer than the budget gets a batch of its own.
+    """
+    batches = []
+    current = []
+    for i in np.argsort(lengths, kind="stable"):
+        # Sorted ascending, so the row being added is the longest so far.
+        if current and (int(lengths[i]) * (len(current) + 1) > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(int(i))
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _export_onnx(model, path):
+    import torch
+
+    # Dynamic batch and sequence axes, so one export serves every bucket.
+    dummy = torch.ones((2, 8), dtype=torch.long)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.onnx.export(
+        model,
+        (dummy, dummy),
+        tmp_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"}
+        },
+        opset_version=17,
+        dynamo=False
+    )
+    os.replace(tmp_path, path)
+
+
+class SentimentEngine:
+    """
+    Sequence-classification inference with the same labels and scores as a
+    HF "sentiment-analysis" pipeline, but batched: texts are tokenized once,
+    sorted into length buckets and run in batches capped by a token budget,
+    so short reviews are not padded to the longest text in the dataset.
+
+    backend "torch" runs the model as loaded, "int8" applies dynamic int8
+    quantisation to its Linear layers, and "onnx" exports the model once
+    (cached under onnx_dir) and runs it with ONNX Runtime.
+    """
+
+    def __init__(self, model_name, tokenizer, backend=DEFAULT_DL_BACKEND, max_length=512,
+                 onnx_dir=DEFAULT_ONNX_DIR):
+        if backend not in DL_BACKENDS:
+            raise ValueError(f"Unsupported backend '{backend}'. Use one of: {', '.join(DL_BACKENDS)}.")
+        self.model_name = model_name
+        self.tokenizer = tokenizer
+        self.backend = backend
+        self.max_length = max_length
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        self.id2label = model.config.id2label
+        self.num_labels = model.config.num_labels
+        self.multi_label = model.config.problem_type == "multi_label_classification"
+        self.session = None
+        if backend == "int8":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif backend == "onnx":
+            try:
+                import onnxruntime
+            except ImportError:
+                raise ValueError("The onnx backend requires the onnxruntime and onnx packages.")
+            os.makedirs(onnx_dir, exist_ok=True)
+            path = os.path.join(onnx_dir, re.sub(r"[^\w.-]", "_", model_name) + ".onnx")
+            if not os.path.exists(path):
+                _export_onnx(model, path)
+            self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+            model = None
+        self.model = model
+
+    def _logits(self, input_ids, attention_mask):
+        if self.session is not None:
+            return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+        import torch
+
+        with torch.inference_mode():
+            output = self.model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask))
+        return output.logits.float().numpy()
+
+    def _scores(self, logits):
+        # Same function_to_apply defaults as the text-classification pipeline.
+        if self.multi_label or self.num_labels == 1:
+            probs = 1.0 / (1.0 + np.exp(-logits))
+        else:
+            shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            probs = shifted / shifted.sum(axis=-1, keepdims=True)
+        best = probs.argmax(axis=-1)
+        return best, probs[np.arange(len(best)), best]
+
+    def predict(self, texts, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                on_progress=None):
+        """
+        Returns (labels, scores, report): the model's top label and its
+        probability per text, plus batch statistics. Identical texts are run
+        once. `on_progress(done, total)` counts distinct texts.
+        """
+        start = time.perf_counter()
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        with span("tokenize"):
+            encoded = self.tokenizer(list(uniques), truncation=True, max_length=self.max_length)["input_ids"]
+        lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+        batches = plan_batches(lengths, token_budget, max_batch_size)
+        pad_id = self.tokenizer.pad_token_id or 0
+
+        label_ids = np.zeros(len(encoded), dtype=np.int64)
+        scores = np.zeros(len(encoded), dtype=np.float64)
+        padded_tokens = 0
+        done = 0
+        for batch in batches:
+            width = int(lengths[batch].max())
+            input_ids = np.full((len(batch), width), pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                input_ids[row, :lengths[i]] = encoded[i]
+                attention_mask[row, :lengths[i]] = 1
+            label_ids[batch], scores[batch] = self._scores(self._logits(input_ids, attention_mask))
+            padded_tokens += input_ids.size
+            done += len(batch)
+            if on_progress is not None:
+                on_progress(done, len(encoded))
+
+        elapsed = time.perf_counter() - start
+        labels = np.array([self.id2label[i] for i in range(self.num_labels)], dtype=object)[label_ids]
+        report = {
+            "backend": self.backend,
+            "rows": len(texts),
+            "distinct_texts": len(encoded),
+            "batches": len(batches),
+            "tokens": int(lengths.sum()),
+            "padded_tokens": int(padded_tokens),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(len(texts) / elapsed, 2) if elapsed > 0 else None
+        }
+        return labels[codes], scores[codes], report
@@ -0,0 +1,238 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import span
+
+DEFAULT_EMBEDDING_DIR = os.environ.get(
+    "SS_EMBEDDING_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "embeddings")
+)
+# Shards on disk (all models) are deleted least recently used first past this.
+DEFAULT_EMBEDDING_DISK_MB = int(os.environ.get("SS_EMBEDDING_DISK_MB", 4096))
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _model_slug(model_name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+
+
+class EmbeddingStore:
+    """
+    Sentence-embedding cache keyed by (model name, text hash).
+
+    Vectors live on disk as float16 .npy shards per model (memory-mapped on
+    read), so only texts that have never been seen with a given model are
+    encoded. Whole matrices for recently requested text lists are also kept
+    in an in-memory LRU, which makes a repeat request on the same column a
+    dictionary lookup. The shard index is re-synced with the directory on
+    every lookup, so shards written or evicted by other processes (serve.py
+    workers) are seen. Past max_disk_bytes, the least recently read shards
+    are deleted. Texts are encoded outside the lock.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_EMBEDDING_DIR, max_bytes=512 * 1024 ** 2, shard_rows=65536,
+                 max_disk_bytes=DEFAULT_EMBEDDING_DISK_MB * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.shard_rows = shard_rows
+        self._indexes = {}  # model_name -> {text_hash: (shard_path, row)}
+        self._shards = {}  # model_name -> {shard_path: [text_hash, ...]}
+        self._matrices = OrderedDict()  # (model_name, texts digest) -> float32 matrix
+        self._matrix_bytes = 0
+        self._lock = threading.RLock()
+        self._build_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _model_dir(self, model_name):
+        return os.path.join(self.cache_dir, _model_slug(model_name))
+
+    def _load_index(self, model_name):
+        index = self._indexes.setdefault(model_name, {})
+        shards = self._shards.setdefault(model_name, {})
+        present = {}
+        for keys_path in sorted(glob.glob(os.path.join(self._model_dir(model_name), "shard_*.keys.npy"))):
+            shard_path = keys_path[:-len(".keys.npy")] + ".npy"
+            if os.path.exists(shard_path):
+                present[shard_path] = keys_path
+        for shard_path in set(shards) - set(present):
+            self._forget_shard(model_name, shard_path)
+        for shard_path, keys_path in present.items():
+            if shard_path in shards:
+                continue
+            try:
+                keys = [bytes(key) for key in np.load(keys_path)]
+            except (FileNotFoundError, ValueError):
+                continue  # evicted (or half-deleted) by another process meanwhile
+            shards[shard_path] = keys
+            for row, key in enumerate(keys):
+                index[key] = (shard_path, row)
+        return index
+
+    def _forget_shard(self, model_name, shard_path):
+        index = self._indexes.get(model_name, {})
+        for key in self._shards.get(model_name, {}).pop(shard_path, []):
+            if index.get(key, (None,))[0] == shard_path:
+                del index[key]
+
+    def _evict_disk(self, keep):
+        shards = []
+        for shard_path in glob.glob(os.path.join(self.cache_dir, "*", "shard_*.npy")):
+            if shard_path.endswith(".keys.npy"):
+                continue
+            try:
+                stat = os.stat(shard_path)
+            except FileNotFoundError:
+                continue
+            shards.append((stat.st_mtime, stat.st_size, shard_path))
+        total = sum(size for _, size, _ in shards)
+        for _, size, shard_path in sorted(shards):
+            if total <= self.max_disk_bytes:
+                break
+            if shard_path in keep:
+                continue
+            # Keys first: a shard without its keys file is ignored by every reader.
+            for path in (shard_path[:-len(".npy")] + ".keys.npy", shard_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            for model_name in [name for name, shards in self._shards.items() if shard_path in shards]:
+                self._forget_shard(model_name, shard_path)
+            total -= size
+
+    def _write_shards(self, model_name, keys, vectors):
+        model_dir = self._model_dir(model_name)
+        os.makedirs(model_dir, exist_ok=True)
+        index = self._indexes[model_name]
+        shards = self._shards[model_name]
+        written = set()
+        for start in range(0, len(keys), self.shard_rows):
+            shard_keys = keys[start:start + self.shard_rows]
+            shard_vectors = vectors[start:start + self.shard_rows].astype(np.float16)
+            fd, shard_path = tempfile.mkstemp(dir=model_dir, prefix="shard_", suffix=".npy")
+            with os.fdopen(fd, "wb") as fh:
+                np.save(fh, shard_vectors)
+            # The keys file is written last; a shard without one is ignored.
+            keys_path = shard_path[:-len(".npy")] + ".keys.npy"
+            with open(keys_path + ".tmp", "wb") as fh:
+                np.save(fh, np.array(shard_keys, dtype="S16"))
+            os.replace(keys_path + ".tmp", keys_path)
+            shards[shard_path] = list(shard_keys)
+            written.add(shard_path)
+            for row, key in enumerate(shard_keys):
+                index[key] = (shard_path, row)
+        return written
+
+    def _remember(self, key, matrix):
+        if key in self._matrices:
+            self._matrices.move_to_end(key)
+            return
+        self._matrices[key] = matrix
+        self._matrix_bytes += matrix.nbytes
+        while self._matrices and self._matrix_bytes > self.max_bytes:
+            _, evicted = self._matrices.popitem(last=False)
+            self._matrix_bytes -= evicted.nbytes
+
+    def encode(self, model_name, texts, encode_fn):
+        """
+        Return a float32 matrix of embeddings for `texts`, calling
+        `encode_fn(list_of_texts)` only for texts missing from the cache.
+        """
+        hashes = [text_hash(t) for t in texts]
+        digest = hashlib.blake2b(b"".join(hashes), digest_size=16).digest()
+        key = (model_name, digest)
+        # Concurrent requests for the same texts wait for one encode.
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                return self._encode(model_name, texts, hashes, key, encode_fn)
+        finally:
+            with self._lock:
+                self._build_locks.pop(key, None)
+
+    def _encode(self, model_name, texts, hashes, key, encode_fn):
+        # A shard can be evicted by another process between the lookup and
+        # the read; its texts are then encoded again on the next pass.
+        for _ in range(3):
+            with self._lock:
+                cached = self._matrices.get(key)
+                if cached is not None:
+                    self._matrices.move_to_end(key)
+                    self.hits += len(texts)
+                    return cached
+                index = self._load_index(model_name)
+                missing = {}
+                for h, t in zip(hashes, texts):
+                    if h not in index and h not in missing:
+                        missing[h] = t
+                self.hits += len(texts) - len(missing)
+                self.misses += len(missing)
+            written = set()
+            if missing:
+                with span("embed"):
+                    new_vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+                with self._lock:
+                    # Overlapping requests may have stored some of these
+                    # meanwhile; write only what is still missing.
+                    index = self._load_index(model_name)
+                    fresh = [pos for pos, h in enumerate(missing) if h not in index]
+                    if fresh:
+                        missing_keys = list(missing)
+                        written = self._write_shards(model_name, [missing_keys[pos] for pos in fresh],
+                                                     new_vectors[fresh])
+            with self._lock:
+                matrix = self._read(model_name, hashes)
+                if matrix is not None:
+                    self._remember(key, matrix)
+                    if written:
+                        self._evict_disk(keep=written)
+                    return matrix
+        raise RuntimeError(f"Embedding shards for '{model_name}' kept disappearing while being read.")
+
+    def _read(self, model_name, hashes):
+        # The matrix for hashes from the shards, or None if one was evicted.
+        index = self._indexes[model_name]
+        by_shard = {}
+        for pos, h in enumerate(hashes):
+            if h not in index:
+                return None
+            shard_path, row = index[h]
+            by_shard.setdefault(shard_path, ([], []))
+            by_shard[shard_path][0].append(pos)
+            by_shard[shard_path][1].append(row)
+        matrix = None
+        for shard_path, (positions, rows) in by_shard.items():
+            try:
+                shard = np.load(shard_path, mmap_mode="r")
+                os.utime(shard_path)  # recency for _evict_disk
+            except FileNotFoundError:
+                self._forget_shard(model_name, shard_path)
+                return None
+            if matrix is None:
+                matrix = np.empty((len(hashes), shard.shape[1]), dtype=np.float32)
+            matrix[positions] = shard[rows]
+        if matrix is None:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return matrix
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_matrices": len(self._matrices),
+                "cached_bytes": self._matrix_bytes
+            }
@@ -0,0 +1,278 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+_current = threading.local()
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobManagerClosed(RuntimeError):
+    pass
+
+
+def parse_concurrency_spec(spec):
+    # "llm=1,topic_modeling=2" -> {"llm": 1, "topic_modeling": 2}
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class Job:
+    def __init__(self, job_type, description):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.description = description
+        self.status = "queued"
+        self.done = 0
+        self.total = None
+        self.partial = None
+        self.result = None
+        self.status_code = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.version = 0
+        self.future = None
+
+    def eta_seconds(self):
+        if self.status != "running" or not self.total or not self.done or self.started_at is None:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / self.done * (self.total - self.done), 1)
+
+    def to_dict(self, include_result=True):
+        data = {
+            "jobId": self.id,
+            "type": self.type,
+            "description": self.description,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total, "etaSeconds": self.eta_seconds()},
+            "partial": self.partial,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.status in TERMINAL_STATES:
+            data["result"] = self.result
+            data["statusCode"] = self.status_code
+        return data
+
+
+class JobManager:
+    """
+    Runs long analyses off the request thread. Each job type gets its own
+    thread pool, so the per-type `limits` cap how many jobs of that type run
+    at once (a long ABSA run cannot starve word cloud requests). Workers
+    report progress through report_progress(); cancellation is cooperative and
+    takes effect at the next progress report.
+    """
+
+    def __init__(self, limits=None, default_limit=2, max_finished=200):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.max_finished = max_finished
+        self._executors = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+
+    def _executor(self, job_type):
+        if job_type not in self._executors:
+            self._executors[job_type] = ThreadPoolExecutor(
+                max_workers=self.limits.get(job_type, self.default_limit),
+                thread_name_prefix=f"job-{job_type}"
+            )
+        return self._executors[job_type]
+
+    def _notify(self, job):
+        job.version += 1
+        self._changed.notify_all()
+
+    def submit(self, job_type, description, fn):
+        """
+        Queue fn() as a job. fn returns (result, status_code); a status code
+        of 400 or above marks the job as failed.
+        """
+        job = Job(job_type, description)
+        with self._lock:
+            if self._closed:
+                raise JobManagerClosed("The server is shutting down and not accepting new jobs.")
+            self._jobs[job.id] = job
+            self._trim()
+            job.future = self._executor(job_type).submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        with self._lock:
+            if job.cancel_event.is_set():
+                return
+            job.status = "running"
+            job.started_at = time.time()
+            self._notify(job)
+        _current.job = job
+        _current.manager = self
+        try:
+            result, status_code = fn()
+            with self._lock:
+                job.result = result
+                job.status_code = status_code
+                if job.cancel_event.is_set():
+                    job.status = "cancelled"
+                elif status_code >= 400:
+                    job.status = "failed"
+                    job.error = (result or {}).get("error") if isinstance(result, dict) else None
+                else:
+                    job.status = "succeeded"
+        except JobCancelled:
+            with self._lock:
+                job.status = "cancelled"
+        except Exception as e:
+            with self._lock:
+                job.status = "failed"
+                job.error = str(e)
+                job.status_code = 500
+        finally:
+            _current.job = None
+            _current.manager = None
+            with self._lock:
+                job.finished_at = time.time()
+                self._notify(job)
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in TERMINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict(include_result=False) for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in TERMINAL_STATES:
+                return job
+            job.cancel_event.set()
+            if job.status == "queued" and job.future is not None and job.future.cancel():
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            self._notify(job)
+            return job
+
+    def queue_depth(self):
+        with self._lock:
+            depth = {}
+            for job in self._jobs.values():
+                if job.status in ("queued", "running"):
+                    depth.setdefault(job.type, {"queued": 0, "running": 0})
+                    depth[job.type][job.status] += 1
+            return depth
+
+    def update_progress(self, job, done, total=None, partial=None):
+        with self._lock:
+            job.done = done
+            if total is not None:
+                job.total = total
+            if partial is not None:
+                job.partial = partial
+            self._notify(job)
+
+    def shutdown(self, timeout=None):
+        """
+        Stop accepting jobs and wait up to `timeout` seconds (None waits for
+        all) for queued and running jobs to finish. Jobs still unfinished
+        after that are cancelled. Returns the number cancelled.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            self._closed = True
+            while True:
+                unfinished = [job.id for job in self._jobs.values() if job.status not in TERMINAL_STATES]
+                remaining = None if deadline is None else deadline - time.time()
+                if not unfinished or (remaining is not None and remaining <= 0):
+                    break
+                self._changed.wait(timeout=remaining)
+        for job_id in unfinished:
+            self.cancel(job_id)
+        for executor in list(self._executors.values()):
+            executor.shutdown(wait=False, cancel_futures=True)
+        return len(unfinished)
+
+    def events(self, job_id, heartbeat_seconds=15):
+        """Yield Server-Sent Event frames for a job until it finishes."""
+        last_version = -1
+        while True:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                if job.version == last_version:
+                    self._changed.wait(timeout=heartbeat_seconds)
+                if job.version == last_version:
+                    payload = None
+                else:
+                    last_version = job.version
+                    payload = job.to_dict(include_result=job.status in TERMINAL_STATES)
+                finished = job.status in TERMINAL_STATES
+            if payload is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {payload['status']}\ndata: {json.dumps(payload)}\n\n"
+            if finished:
+                return
+
+
+def current_job():
+    """The Job running on this thread, or None outside jobs."""
+    return getattr(_current, "job", None)
+
+
+@contextmanager
+def job_context(job, manager):
+    """
+    Route report_progress() calls on this thread to manager.update_progress
+    for `job`, e.g. in a process that runs a job on behalf of another one.
+    """
+    _current.job = job
+    _current.manager = manager
+    try:
+        yield
+    finally:
+        _current.job = None
+        _current.manager = None
+
+
+def report_progress(done, total=None, partial=None):
+    """
+    Record progress for the job running on this thread (a no-op outside
+    jobs). Raises JobCancelled if the job has been cancelled.
+    """
+    job = getattr(_current, "job", None)
+    if job is None:
+        return
+    if job.cancel_event.is_set():
+        raise JobCancelled()
+    _current.manager.update_progress(job, done, total, partial)
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_LLM_CACHE_PATH = os.environ.get(
+    "SS_LLM_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "llm_labels.sqlite3")
+)
+
+_SQL_BATCH = 500
+
+
+def label_cache_key(model, prompt_version, aspect, text):
+    text_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    raw = "\x1f".join([str(model), str(prompt_version), str(aspect or ""), text_digest])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMLabelCache:
+    """
+    SQLite-backed cache of LLM labels keyed by (model, prompt template
+    version, aspect, text hash). Labels are written as soon as each request
+    finishes, so an interrupted run resumes from where it stopped. When the
+    table grows past `max_entries`, the least recently used rows are deleted.
+    """
+
+    def __init__(self, path=DEFAULT_LLM_CACHE_PATH, max_entries=1000000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._pid = None
+        self._conn = None
+        self._inherited = []
+        self._connection()
+        # Approximate row count (replacements are over-counted); the exact
+        # count is only taken once this passes max_entries.
+        self._approx_entries = self._conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        # SQLite connections must not be used across fork: a forked process
+        # (serve.py's analysis workers) opens its own. The inherited one is
+        # kept referenced, since closing it in the child would release the
+        # parent's locks on the database file.
+        if self._pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "key TEXT PRIMARY KEY, label TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS labels_last_used ON labels(last_used)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get_many(self, keys):
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(unique_keys), _SQL_BATCH):
+                batch = unique_keys[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, label FROM labels WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    conn.executemany(
+                        "UPDATE labels SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                    )
+            conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO labels (key, label, last_used) VALUES (?, ?, ?)",
+                [(key, label, now) for key, label in items]
+            )
+            conn.commit()
+            self._approx_entries += len(items)
+            if self._approx_entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+        self._approx_entries = count
+        if count > self.max_entries:
+            # Trim to 90% so the next few inserts do not trigger another pass.
+            target = int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM labels WHERE key IN (SELECT key FROM labels ORDER BY last_used LIMIT ?)",
+                (count - target,)
+            )
+            self._conn.commit()
+            self._approx_entries = target
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": self._approx_entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
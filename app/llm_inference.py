@@ -0,0 +1,159 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from metrics import span
+
+SENTIMENT_LABELS = ["Positive", "Negative", "Neutral"]
+
+DEFAULT_PARALLELISM = int(os.environ.get("SS_LLM_PARALLELISM", 4))
+DEFAULT_PACK_SIZE = int(os.environ.get("SS_LLM_PACK_SIZE", 1))
+
+
+def normalize_label(raw):
+    label = str(raw).strip().capitalize()
+    return label if label in SENTIMENT_LABELS else "Neutral"
+
+
+def parse_label_list(content, expected):
+    # Packed prompts ask for a JSON list of labels; tolerate text around it.
+    match = re.search(r"\[.*\]", content, re.DOTALL)
+    if not match:
+        return None
+    try:
+        labels = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(labels, list) or len(labels) != expected:
+        return None
+    return [normalize_label(label) for label in labels]
+
+
+class LLMBatchRunner:
+    """
+    Runs one Ollama chat request per row (or per pack of rows) with bounded
+    concurrency so the server is never idle between round trips.
+
+    With pack_size > 1 several texts go into one prompt and a JSON list of
+    labels is parsed back; packs whose reply cannot be parsed are retried row
+    by row. Every request is retried with exponential backoff before the run
+    fails. run() returns the labels in input order plus a throughput report.
+    """
+
+    def __init__(self, model, parallelism=DEFAULT_PARALLELISM, pack_size=DEFAULT_PACK_SIZE,
+                 max_retries=3, backoff_seconds=0.5, host=None):
+        self.model = model
+        self.parallelism = max(1, int(parallelism))
+        self.pack_size = max(1, int(pack_size))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_seconds = backoff_seconds
+        import ollama
+
+        self._response_error = ollama.ResponseError
+        self.client = ollama.Client(host=host or os.environ.get("OLLAMA_HOST"))
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+
+    def _chat(self, prompt):
+        attempt = 0
+        while True:
+            try:
+                response = self.client.chat(
+                    model=self.model,
+                    messages=[{'role': 'user', 'content': prompt}]
+                )
+                with self._lock:
+                    self._requests += 1
+                    self._prompt_tokens += getattr(response, "prompt_eval_count", None) or 0
+                    self._completion_tokens += getattr(response, "eval_count", None) or 0
+                return response.message.content
+            except Exception as e:
+                # A missing model or bad request will not succeed on retry.
+                if isinstance(e, self._response_error) and e.status_code in (400, 404):
+                    raise
+                if attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    self._retries += 1
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+                attempt += 1
+
+    def _run_pack(self, texts, build_prompt, build_packed_prompt):
+        if len(texts) > 1 and build_packed_prompt is not None:
+            labels = parse_label_list(self._chat(build_packed_prompt(texts)), len(texts))
+            if labels is not None:
+                return labels
+        return [normalize_label(self._chat(build_prompt(text))) for text in texts]
+
+    def run(self, texts, build_prompt, build_packed_prompt=None, desc="Processing LLM labels",
+            on_progress=None, cache=None, cache_key_fn=None):
+        """
+        With a cache (see llm_cache.LLMLabelCache) and `cache_key_fn(text)`,
+        cached rows are filled in up front and only the remaining rows are
+        sent to the model; new labels are stored as each request completes.
+        `on_progress(done, total, new_labels)` is called after every request.
+        """
+        start = time.perf_counter()
+        labels = [None] * len(texts)
+        keys = None
+        cache_hits = 0
+        if cache is not None:
+            keys = [cache_key_fn(text) for text in texts]
+            found = cache.get_many(keys)
+            for i, key in enumerate(keys):
+                if key in found:
+                    labels[i] = found[key]
+                    cache_hits += 1
+            if on_progress is not None and cache_hits:
+                on_progress(cache_hits, len(texts), [label for label in labels if label is not None])
+        pending = [i for i, label in enumerate(labels) if label is None]
+        packs = [pending[i:i + self.pack_size] for i in range(0, len(pending), self.pack_size)]
+        done = cache_hits
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor, \
+                tqdm(total=len(texts), initial=done, desc=desc, unit="text") as progress, span("llm"):
+            futures = {
+                executor.submit(self._run_pack, [texts[i] for i in pack], build_prompt, build_packed_prompt): pack
+                for pack in packs
+            }
+            try:
+                for future in as_completed(futures):
+                    pack = futures[future]
+                    pack_labels = future.result()
+                    for i, label in zip(pack, pack_labels):
+                        labels[i] = label
+                    if cache is not None:
+                        cache.put_many([(keys[i], label) for i, label in zip(pack, pack_labels)])
+                    done += len(pack)
+                    progress.update(len(pack))
+                    if on_progress is not None:
+                        on_progress(done, len(texts), pack_labels)
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        elapsed = time.perf_counter() - start
+        return labels, self.report(len(texts), elapsed, cache_hits)
+
+    def report(self, rows, elapsed, cache_hits=0):
+        with self._lock:
+            return {
+                "rows": rows,
+                "cache_hits": cache_hits,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / elapsed, 2) if elapsed > 0 else None,
+                "requests": self._requests,
+                "retries": self._retries,
+                "prompt_tokens": self._prompt_tokens,
+                "completion_tokens": self._completion_tokens,
+                "tokens_per_second": round(self._completion_tokens / elapsed, 2) if elapsed > 0 else None,
+                "parallelism": self.parallelism,
+                "pack_size": self.pack_size
+            }
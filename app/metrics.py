@@ -0,0 +1,255 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import psutil
+
+# Send the X-Timing breakdown on every response, not only to requests that
+# ask for it with an X-Timing request header.
+DEFAULT_TIMING_HEADER = os.environ.get("SS_TIMING_HEADER", "0") == "1"
+DEFAULT_SAMPLE_SECONDS = float(os.environ.get("SS_SYSTEM_SAMPLE_SECONDS", 1.0))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_timing = contextvars.ContextVar("timing", default=None)
+
+
+class Timing:
+    """
+    Seconds spent per pipeline stage while handling one request. Spans
+    nest, and each stage is charged only its own time: an embedding step
+    inside an index build counts as "embed", not twice. The stages
+    therefore add up to at most the request's total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = OrderedDict()
+        self._open = []  # [stage, started, seconds spent in nested spans]
+
+    def enter(self, stage):
+        self._open.append([stage, time.perf_counter(), 0.0])
+
+    def exit(self):
+        stage, started, nested = self._open.pop()
+        elapsed = time.perf_counter() - started
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed - nested
+        if self._open:
+            self._open[-1][2] += elapsed
+
+    def merge(self, stages):
+        # Stages measured elsewhere (an analysis worker process) during this request.
+        for stage, seconds in stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            if self._open:
+                self._open[-1][2] += seconds
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        # Server-Timing syntax: "tokenize;dur=12.3, render;dur=80.1, total;dur=95.0" (milliseconds).
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        return ", ".join(parts + [f"total;dur={self.total() * 1000:.1f}"])
+
+
+@contextmanager
+def span(stage):
+    """Charge the enclosed block to `stage` of the current request, if any."""
+    timing = _timing.get()
+    if timing is None:
+        yield
+        return
+    timing.enter(stage)
+    try:
+        yield
+    finally:
+        timing.exit()
+
+
+def current_timing():
+    return _timing.get()
+
+
+def start_timing():
+    """Start timing a request on this context; returns the token for stop_timing."""
+    return _timing.set(Timing())
+
+
+def stop_timing(token):
+    _timing.reset(token)
+
+
+@contextmanager
+def timed():
+    token = start_timing()
+    try:
+        yield _timing.get()
+    finally:
+        stop_timing(token)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in self._series.items():
+                labels = dict(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, series):
+                    samples.append((f"{self.name}_bucket", {**labels, "le": repr(float(bound))}, count))
+                samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, series[-1]))
+                samples.append((f"{self.name}_sum", labels, series[-2]))
+                samples.append((f"{self.name}_count", labels, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms updated as requests run, plus collectors called
+    at scrape time for values that already live elsewhere (cache hit
+    counts, job queue depth, process memory). render() produces the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        collector() returns (name, type, documentation, [(labels, value)])
+        tuples, e.g. ("ss_job_queue_depth", "gauge", "...", [({"type": "llm"}, 2)]).
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += [f"# HELP {metric.name} {metric.documentation}", f"# TYPE {metric.name} {metric.type}"]
+            lines += [f"{name}{_format_labels(labels)} {value}" for name, labels, value in metric.samples()]
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+                lines += [f"{name}{_format_labels(labels)} {value}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+class SystemSampler:
+    """
+    CPU, RAM and resident memory of this process and its children (analysis
+    workers, sentiment pools), sampled every `interval` seconds on a
+    background thread so /system_stats and /metrics return at once instead
+    of measuring for a second per request.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_SECONDS):
+        self.interval = interval
+        self._sample = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # The first interval-less cpu_percent() call only sets the baseline.
+        psutil.cpu_percent(interval=None)
+
+    def start(self):
+        # Started on first use rather than at import, so serve.py forks its
+        # workers before this thread exists.
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._take()
+            time.sleep(self.interval)
+
+    def _take(self):
+        process = psutil.Process()
+        children = []
+        for child in process.children(recursive=True):
+            try:
+                children.append({"pid": child.pid, "rss_bytes": child.memory_info().rss})
+            except psutil.Error:
+                pass
+        ram = psutil.virtual_memory()
+        sample = {
+            "cpu_utilization_percent": psutil.cpu_percent(interval=None),
+            "ram_utilization_percent": ram.percent,
+            "process_rss_bytes": process.memory_info().rss,
+            "children": children,
+            "sampled_at": time.time()
+        }
+        self._sample = sample
+        return sample
+
+    def latest(self):
+        self.start()
+        return self._sample or self._take()
@@ -0,0 +1,179 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import psutil
+
+from metrics import span
+
+# Estimated memory of loaded models above which the least recently used are
+# dropped. SS_MODEL_BUDGET_MB is the older name for the same setting.
+DEFAULT_MODEL_CACHE_MB = int(os.environ.get("SS_MODEL_CACHE_MB", os.environ.get("SS_MODEL_BUDGET_MB", 4096)))
+
+
+def estimate_model_bytes(model):
+    # Torch-backed models (sentence-transformers, HF pipelines) report their
+    # parameter and buffer sizes; anything else falls back to the RSS delta.
+    torch_module = getattr(model, "model", model)
+    if hasattr(torch_module, "parameters"):
+        try:
+            total = sum(p.numel() * p.element_size() for p in torch_module.parameters())
+            if hasattr(torch_module, "buffers"):
+                total += sum(b.numel() * b.element_size() for b in torch_module.buffers())
+            return int(total)
+        except Exception:
+            pass
+    return None
+
+
+class ModelRegistry:
+    """
+    Process-wide cache for heavy models (sentence-transformers, HF sentiment
+    pipelines, tokenizers). Each (kind, name) is loaded once behind its own
+    lock, so concurrent first requests wait for a single load instead of
+    loading twice. When the estimated memory of loaded models exceeds
+    `max_bytes`, the least recently used models are dropped.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MODEL_CACHE_MB * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._loaders = {}
+        self._models = OrderedDict()  # key -> entry dict
+        self._key_locks = {}
+        self._load_history = {}  # (kind, name) -> {"loads": n, "total_seconds": t}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def register_loader(self, kind, loader):
+        self._loaders[kind] = loader
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            entry["hits"] += 1
+            entry["last_used"] = time.time()
+            return entry["model"]
+
+    def get(self, kind, name, **kwargs):
+        if kind not in self._loaders:
+            raise ValueError(f"No loader registered for model kind '{kind}'.")
+        key = (kind, name, tuple(sorted(kwargs.items())))
+        model = self._touch(key)
+        if model is not None:
+            return model
+        with self._key_lock(key):
+            # Another request may have finished loading while we waited.
+            model = self._touch(key)
+            if model is not None:
+                return model
+            process = psutil.Process()
+            rss_before = process.memory_info().rss
+            start = time.perf_counter()
+            with span("load"):
+                model = self._loaders[kind](name, **kwargs)
+            load_seconds = time.perf_counter() - start
+            size = estimate_model_bytes(model)
+            if size is None:
+                size = max(process.memory_info().rss - rss_before, 0)
+            with self._lock:
+                self._models[key] = {
+                    "model": model,
+                    "bytes": size,
+                    "load_seconds": load_seconds,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "hits": 0
+                }
+                history = self._load_history.setdefault((kind, name), {"loads": 0, "total_seconds": 0.0})
+                history["loads"] += 1
+                history["total_seconds"] += load_seconds
+                self._evict(keep=key)
+            return model
+
+    def _evict(self, keep):
+        if self.max_bytes is None:
+            return
+        candidates = [key for key in self._models if key != keep]
+        evicted = False
+        while candidates and self._total_bytes() > self.max_bytes:
+            del self._models[candidates.pop(0)]
+            self.evictions += 1
+            evicted = True
+        if evicted:
+            gc.collect()
+
+    def _total_bytes(self):
+        return sum(entry["bytes"] for entry in self._models.values())
+
+    def preload(self, specs, background=True):
+        """
+        Load `(kind, name)` pairs ahead of the first request. With
+        background=True the server can start accepting requests immediately;
+        a request for a model that is still loading waits on its lock.
+        """
+        def _load_all():
+            for kind, name in specs:
+                try:
+                    self.get(kind, name)
+                except Exception as e:
+                    print(f"Warm-up failed for {kind} '{name}': {e}")
+
+        if background:
+            thread = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+            thread.start()
+            return thread
+        _load_all()
+        return None
+
+    def stats(self):
+        with self._lock:
+            models = []
+            for (kind, name, _), entry in self._models.items():
+                models.append({
+                    "kind": kind,
+                    "name": name,
+                    "bytes": entry["bytes"],
+                    "cold_start_seconds": round(entry["load_seconds"], 3),
+                    "hits": entry["hits"],
+                    "idle_seconds": round(time.time() - entry["last_used"], 1)
+                })
+            cold_starts = [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "loads": history["loads"],
+                    "avg_seconds": round(history["total_seconds"] / history["loads"], 3)
+                }
+                for (kind, name), history in self._load_history.items()
+            ]
+            return {
+                "models": models,
+                "cold_starts": cold_starts,
+                "total_bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions
+            }
+
+
+def parse_preload_spec(spec):
+    # "sentence-transformer:all-MiniLM-L6-v2,sentiment:distilbert-base-uncased-finetuned-sst-2-english"
+    pairs = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kind, _, name = item.partition(":")
+        if name:
+            pairs.append((kind.strip(), name.strip()))
+    return pairs
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+
+# NLTK data bundled with the app; searched before NLTK's default locations.
+DEFAULT_NLTK_DATA_DIR = os.environ.get(
+    "SS_NLTK_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data")
+)
+# With SS_NLTK_DOWNLOAD=0 a missing resource is an error instead of a download.
+DOWNLOAD_MISSING = os.environ.get("SS_NLTK_DOWNLOAD", "1") != "0"
+
+# Resource name -> path nltk.data.find resolves it by.
+NLTK_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab/english/",
+    "stopwords": "corpora/stopwords",
+    "vader_lexicon": "sentiment/vader_lexicon.zip"
+}
+
+_found = set()
+_lock = threading.Lock()
+
+
+def configure_nltk_data(data_dir=DEFAULT_NLTK_DATA_DIR):
+    """
+    Put data_dir first on NLTK's search path. NLTK reads NLTK_DATA when it is
+    first imported (here, and in child processes that inherit the
+    environment), so this runs before any nltk import.
+    """
+    paths = [path for path in os.environ.get("NLTK_DATA", "").split(os.pathsep) if path]
+    if data_dir not in paths:
+        os.environ["NLTK_DATA"] = os.pathsep.join([data_dir] + paths)
+    if "nltk.data" in sys.modules:
+        nltk_paths = sys.modules["nltk.data"].path
+        if data_dir not in nltk_paths:
+            nltk_paths.insert(0, data_dir)
+
+
+def ensure_nltk_resource(name, data_dir=DEFAULT_NLTK_DATA_DIR):
+    """
+    Resolve an NLTK resource from the local data paths without touching the
+    network; download it into data_dir only when it is missing and
+    downloads are allowed.
+    """
+    if name in _found:
+        return
+    configure_nltk_data(data_dir)
+    import nltk
+
+    with _lock:
+        if name in _found:
+            return
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            if not DOWNLOAD_MISSING:
+                raise LookupError(
+                    f"NLTK resource '{name}' not found in {data_dir}. Run `python nltk_resources.py` "
+                    "with network access, or set SS_NLTK_DATA to a directory that has it."
+                )
+            print(f"Downloading NLTK resource '{name}' to {data_dir}")
+            if not nltk.download(name, download_dir=data_dir, quiet=True):
+                raise LookupError(f"Could not download NLTK resource '{name}'.")
+        _found.add(name)
+
+
+def english_stopwords():
+    ensure_nltk_resource("stopwords")
+    from nltk.corpus import stopwords
+
+    return stopwords.words("english")
+
+
+def nltk_word_tokenize():
+    # Returns the tokenizer itself so per-text loops skip the resource check.
+    ensure_nltk_resource("punkt_tab")
+    from nltk import word_tokenize
+
+    return word_tokenize
+
+
+if __name__ == "__main__":
+    # Fetch every resource into the data dir, e.g. while building an image.
+    import nltk
+
+    os.makedirs(DEFAULT_NLTK_DATA_DIR, exist_ok=True)
+    for resource in NLTK_RESOURCES:
+        print(resource, nltk.download(resource, download_dir=DEFAULT_NLTK_DATA_DIR, quiet=True))
@@ -0,0 +1,120 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for exercising the ABSA and
+zero-shot sentiment routes without a model server.
+
+    python ollama_stub.py --port 11435 --latency 0.05
+    OLLAMA_HOST=http://127.0.0.1:11435 python app.py
+
+Implements POST /api/chat (non-streaming) and GET /api/tags. Labels come
+from a small keyword heuristic; packed prompts (numbered, JSON-quoted texts)
+get a JSON list of labels back.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POSITIVE_WORDS = {"good", "great", "love", "excellent", "works", "perfect", "fast", "happy", "recommend"}
+NEGATIVE_WORDS = {"bad", "poor", "broken", "terrible", "slow", "failed", "stopped", "waste", "return"}
+_PACKED_LINE_RE = re.compile(r'^\d+\. (".*")$', re.MULTILINE)
+
+
+def stub_label(text):
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    score = len(words & POSITIVE_WORDS) - len(words & NEGATIVE_WORDS)
+    if score > 0:
+        return "Positive"
+    if score < 0:
+        return "Negative"
+    return "Neutral"
+
+
+def stub_reply(prompt):
+    packed = _PACKED_LINE_RE.findall(prompt)
+    if packed:
+        return json.dumps([stub_label(json.loads(text)) for text in packed])
+    match = re.search(r'Text: "(.*)"', prompt, re.DOTALL)
+    return stub_label(match.group(1) if match else prompt)
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    fail_first = 0
+    requests_received = 0
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"model": "stub", "name": "stub"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+        with OllamaStubHandler._lock:
+            type(self).requests_received += 1
+            received = type(self).requests_received
+        if received <= self.fail_first or (self.fail_rate and random.random() < self.fail_rate):
+            self._send_json(503, {"error": "stub overloaded"})
+            return
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        content = stub_reply(prompt)
+        with OllamaStubHandler._lock:
+            type(self).requests_served += 1
+        self._send_json(200, {
+            "model": payload.get("model") or "stub",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": len(prompt.split()),
+            "eval_count": len(content.split())
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0, fail_first=0):
+    # Returns (server, base_url); port=0 picks a free port. Request counts
+    # are kept on server.RequestHandlerClass, per server.
+    handler = type("ConfiguredStubHandler", (OllamaStubHandler,),
+                   {"latency": latency, "fail_rate": fail_rate, "fail_first": fail_first})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency, args.fail_rate)
+    print(f"Ollama stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter over 64-bit hashes (2**p registers,
+    ~1.04 / sqrt(2**p) relative error). Hashes are added in NumPy batches.
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rest < 2**50, so it converts to float64 exactly and frexp's exponent
+        # is its bit length (0 for rest == 0).
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class ColumnProfile:
+    """
+    Incremental version of the per-column stats computed on upload: running
+    mean/variance (Chan's parallel update) for numeric columns and streaming
+    length min/max/mean plus a distinct count for textual ones. Distinct
+    values are counted exactly until `exact_limit`, then by HyperLogLog.
+    """
+
+    def __init__(self, exact_limit=1 << 16):
+        self.exact_limit = exact_limit
+        self.is_numeric = True
+        self.num_count = 0
+        self.num_mean = 0.0
+        self.num_m2 = 0.0
+        self.len_count = 0
+        self.len_sum = 0
+        self.len_min = None
+        self.len_max = None
+        self.exact_hashes = set()
+        self.hll = HyperLogLog()
+
+    def update(self, series):
+        if self.is_numeric:
+            values = pd.to_numeric(series, errors="coerce")
+            if values.notna().sum() != series.notna().sum():
+                self.is_numeric = False
+            else:
+                values = values.dropna().to_numpy(dtype=np.float64)
+                if values.size:
+                    n_b = values.size
+                    mean_b = float(values.mean())
+                    m2_b = float(((values - mean_b) ** 2).sum())
+                    n = self.num_count + n_b
+                    delta = mean_b - self.num_mean
+                    self.num_mean += delta * n_b / n
+                    self.num_m2 += m2_b + delta * delta * self.num_count * n_b / n
+                    self.num_count = n
+
+        series_str = series.astype(str)
+        lengths = series_str.str.len().dropna()
+        if len(lengths):
+            self.len_count += len(lengths)
+            self.len_sum += int(lengths.sum())
+            chunk_min, chunk_max = int(lengths.min()), int(lengths.max())
+            self.len_min = chunk_min if self.len_min is None else min(self.len_min, chunk_min)
+            self.len_max = chunk_max if self.len_max is None else max(self.len_max, chunk_max)
+
+        hashes = pd.util.hash_pandas_object(series_str.dropna(), index=False).to_numpy()
+        self.hll.add_hashes(hashes)
+        if self.exact_hashes is not None:
+            self.exact_hashes.update(hashes.tolist())
+            if len(self.exact_hashes) > self.exact_limit:
+                self.exact_hashes = None
+
+    def unique_count(self):
+        if self.exact_hashes is not None:
+            return len(self.exact_hashes)
+        return self.hll.count()
+
+    def stats(self):
+        if self.is_numeric:
+            # An all-missing column is float64 to read_csv, so it stays
+            # Numeric with NaN stats as in compute_column_stats.
+            mean = float(self.num_mean) if self.num_count else float("nan")
+            std = math.sqrt(self.num_m2 / (self.num_count - 1)) if self.num_count > 1 else float("nan")
+            return {
+                'type': 'Numeric',
+                'mean': mean,
+                'stdDev': float(std)
+            }
+        return {
+            'type': 'Textual',
+            'avgLen': float(self.len_sum / self.len_count) if self.len_count else 0.0,
+            'maxLen': int(self.len_max or 0),
+            'minLen': int(self.len_min or 0),
+            'uniqueCount': int(self.unique_count())
+        }
+
+
+class StreamingProfiler:
+    def __init__(self):
+        self.columns = {}
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile()
+            self.columns[col].update(chunk[col])
+
+    def stats(self):
+        return {col: profile.stats() for col, profile in self.columns.items()}
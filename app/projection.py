@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+from metrics import span
+
+# Documents drawn in a clustering scatter plot (and returned as coordinates).
+DEFAULT_POINT_BUDGET = int(os.environ.get("SS_PROJECTION_POINTS", 5000))
+
+
+def stratified_sample(labels, budget, random_state=0):
+    """
+    Sorted row indices of at most `budget` rows, split across the distinct
+    labels in proportion to their size (largest remainder), with every
+    label keeping at least one row while the budget allows it.
+    """
+    labels = np.asarray(labels)
+    if len(labels) <= budget:
+        return np.arange(len(labels))
+    values, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    quotas = np.minimum(counts, 1) if budget >= len(values) else np.zeros(len(values), dtype=np.int64)
+    remaining = budget - int(quotas.sum())
+    share = (counts - quotas) * remaining / max(int((counts - quotas).sum()), 1)
+    extra = np.floor(share).astype(np.int64)
+    leftover = remaining - int(extra.sum())
+    extra[np.argsort(-(share - extra), kind="stable")[:leftover]] += 1
+    quotas = np.minimum(quotas + extra, counts)
+
+    rng = np.random.default_rng(random_state)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)))
+    picked = [
+        rng.choice(order[starts[i]:starts[i + 1]], size=int(quotas[i]), replace=False)
+        for i in range(len(values)) if quotas[i] > 0
+    ]
+    return np.sort(np.concatenate(picked))
+
+
+def project_2d(X, labels, budget=DEFAULT_POINT_BUDGET, random_state=0):
+    """
+    2-D PCA coordinates for a stratified sample of the rows of X. Returns
+    (coordinates, sampled row indices, info). The components are always
+    fitted on every row; only the sample is transformed and plotted.
+    """
+    from sklearn.decomposition import PCA
+
+    X = np.asarray(X)
+    rows = stratified_sample(labels, budget, random_state)
+    # Two components only: randomised SVD costs a few passes over X
+    # whatever its shape, and the solver is fixed so it can be reported.
+    solver = "randomized"
+    pca = PCA(n_components=2, svd_solver=solver, random_state=random_state)
+    with span("project"):
+        if len(rows) == len(X):
+            coordinates = pca.fit_transform(X)
+        else:
+            coordinates = pca.fit(X).transform(X[rows])
+    return coordinates, rows, {"solver": solver, "documents": len(X), "points": len(rows)}
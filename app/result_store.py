@@ -0,0 +1,237 @@
+import glob
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from disk_cache import evict_oldest, touch
+
+DEFAULT_RESULT_DIR = os.environ.get(
+    "SS_RESULT_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "results")
+)
+DEFAULT_RESULT_CACHE_MB = int(os.environ.get("SS_RESULT_CACHE_MB", 256))
+# Stored results on disk; the least recently read are removed beyond this
+DEFAULT_RESULT_DISK_MB = int(os.environ.get("SS_RESULT_DISK_MB", 2048))
+# Runs with at most this many rows still return their rows inline by default.
+DEFAULT_INLINE_ROWS = int(os.environ.get("SS_INLINE_RESULT_ROWS", 10000))
+DEFAULT_PAGE_ROWS = 1000
+MAX_PAGE_ROWS = int(os.environ.get("SS_RESULT_PAGE_MAX", 10000))
+EXPORT_FORMATS = ("csv", "parquet", "ndjson")
+EXPORT_CHUNK_ROWS = 50000
+
+_RESULT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ResultNotFound(LookupError):
+    pass
+
+
+class ResultSet:
+    """
+    Per-row output of a sentiment run stored as columns: the row position
+    in the dataset column, a label code into `labels` and an optional
+    float32 score. Texts are not copied; they are joined from the dataset
+    when a page or export asks for them. `constants` are per-run values
+    (e.g. the ABSA aspect) repeated on every output row.
+    """
+
+    def __init__(self, dataset_id, column, rows, label_codes, labels, scores=None, constants=None):
+        self.dataset_id = dataset_id
+        self.column = column
+        self.rows = rows
+        self.label_codes = label_codes
+        self.labels = list(labels)
+        self.scores = scores
+        self.constants = constants or {}
+
+    @classmethod
+    def from_labels(cls, dataset_id, column, rows, labels, scores=None, constants=None):
+        codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+        rows = np.asarray(rows)
+        return cls(
+            dataset_id,
+            column,
+            rows.astype(np.int32 if len(rows) == 0 or rows.max() < 2 ** 31 else np.int64),
+            codes.astype(np.int8 if len(uniques) < 128 else np.int32),
+            [str(label) for label in uniques],
+            None if scores is None else np.asarray(scores, dtype=np.float32),
+            constants
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.label_codes.nbytes + (0 if self.scores is None else self.scores.nbytes)
+
+    def columns(self, start=0, end=None, texts=None):
+        """
+        {name: list} for rows [start, end), with "text" taken from the
+        dataset column `texts` (a Series) when given.
+        """
+        end = len(self) if end is None else min(end, len(self))
+        rows = self.rows[start:end]
+        columns = {"row": rows.tolist()}
+        if texts is not None:
+            columns["text"] = texts.iloc[rows].astype(str).tolist()
+        for name, value in self.constants.items():
+            columns[name] = [value] * len(rows)
+        columns["sentiment"] = np.asarray(self.labels, dtype=object)[self.label_codes[start:end]].tolist()
+        if self.scores is not None:
+            # Shortest float32 repr, so 0.1 is sent as 0.1 and not 0.10000000149011612.
+            columns["score"] = self.scores[start:end].astype(str).astype(np.float64).tolist()
+        return columns
+
+    def frames(self, texts=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        for start in range(0, len(self), chunk_rows):
+            yield pd.DataFrame(self.columns(start, start + chunk_rows, texts))
+
+    def iter_csv(self, texts=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        header = True
+        for frame in self.frames(texts, chunk_rows):
+            yield frame.to_csv(index=False, header=header)
+            header = False
+        if header:
+            yield pd.DataFrame(self.columns(0, 0, texts)).to_csv(index=False)
+
+    def iter_ndjson(self, start=0, end=None, texts=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        end = len(self) if end is None else min(end, len(self))
+        for chunk_start in range(start, end, chunk_rows):
+            columns = self.columns(chunk_start, min(chunk_start + chunk_rows, end), texts)
+            names = list(columns)
+            yield "".join(
+                json.dumps(dict(zip(names, values))) + "\n"
+                for values in zip(*columns.values())
+            )
+
+    def iter_parquet(self, texts=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        # One row group per chunk, handed to the client as soon as it is written.
+        sink = _DrainingSink()
+        writer = None
+        for frame in self.frames(texts, chunk_rows):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+            yield sink.drain()
+        if writer is None:
+            writer = pq.ParquetWriter(sink, pa.Table.from_pandas(
+                pd.DataFrame(self.columns(0, 0, texts)), preserve_index=False
+            ).schema)
+        writer.close()
+        yield sink.drain()
+
+
+class _DrainingSink(io.RawIOBase):
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class ResultStore:
+    """
+    ResultSets by result ID: recently used ones in an in-memory LRU bounded
+    by max_bytes, every one as an .npz under result_dir so pages and exports
+    can be served by any worker process and after a restart. The files are
+    capped at max_disk_bytes, least recently read first.
+    """
+
+    def __init__(self, result_dir=DEFAULT_RESULT_DIR, max_bytes=DEFAULT_RESULT_CACHE_MB * 1024 ** 2,
+                 max_disk_bytes=DEFAULT_RESULT_DISK_MB * 1024 ** 2):
+        self.result_dir = result_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(result_dir, exist_ok=True)
+        self._results = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, result_id):
+        return os.path.join(self.result_dir, f"{result_id}.npz")
+
+    def _files(self):
+        # Stored results only, not another thread's .tmp.npz still being written.
+        return [path for path in glob.glob(os.path.join(self.result_dir, "*.npz"))
+                if _RESULT_ID_RE.match(os.path.basename(path)[:-len(".npz")])]
+
+    def _remember(self, result_id, result):
+        with self._lock:
+            if result_id in self._results:
+                return
+            self._results[result_id] = result
+            self._total_bytes += result.nbytes
+            while len(self._results) > 1 and self._total_bytes > self.max_bytes:
+                _, evicted = self._results.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+
+    def put(self, result):
+        result_id = uuid.uuid4().hex
+        meta = {
+            "dataset_id": result.dataset_id,
+            "column": result.column,
+            "labels": result.labels,
+            "constants": result.constants
+        }
+        arrays = {"rows": result.rows, "label_codes": result.label_codes, "meta": np.array(json.dumps(meta))}
+        if result.scores is not None:
+            arrays["scores"] = result.scores
+        path = self._path(result_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self._remember(result_id, result)
+        evict_oldest(self._files(), self.max_disk_bytes, keep={path})
+        return result_id
+
+    def get(self, result_id):
+        if not _RESULT_ID_RE.match(result_id or ""):
+            raise ResultNotFound(f"Invalid result ID '{result_id}'.")
+        with self._lock:
+            if result_id in self._results:
+                self._results.move_to_end(result_id)
+                touch(self._path(result_id))
+                return self._results[result_id]
+        path = self._path(result_id)
+        if not os.path.exists(path):
+            raise ResultNotFound(f"Result '{result_id}' not found.")
+        touch(path)
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            result = ResultSet(
+                meta["dataset_id"],
+                meta["column"],
+                data["rows"],
+                data["label_codes"],
+                meta["labels"],
+                data["scores"] if "scores" in data else None,
+                meta["constants"]
+            )
+        self._remember(result_id, result)
+        return result
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+RULE_BASED_MODELS = ("textblob", "vader")
+SENTIMENT_LABELS = ("Positive", "Neutral", "Negative")
+
+DEFAULT_SENTIMENT_JOBS = int(os.environ.get("SS_SENTIMENT_JOBS", -1))
+# Below this many distinct texts the pool costs more than it saves.
+PARALLEL_MIN_TEXTS = int(os.environ.get("SS_SENTIMENT_PARALLEL_MIN", 5000))
+CHUNK_SIZE = 2000
+# Upper bound on n_jobs in this process. serve.py lowers it in each analysis
+# worker so that workers x pool size stays near the number of cores.
+MAX_JOBS = os.cpu_count() or 1
+
+_analyzers = {}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _analyzer(model):
+    # One analyzer per process, created on first use.
+    if model not in _analyzers:
+        if model == "vader":
+            from nltk_resources import ensure_nltk_resource
+            ensure_nltk_resource("vader_lexicon")
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            _analyzers[model] = SentimentIntensityAnalyzer().polarity_scores
+        else:
+            from textblob import TextBlob
+            _analyzers[model] = TextBlob
+    return _analyzers[model]
+
+
+def _score_chunk(model, texts):
+    analyze = _analyzer(model)
+    scores = np.empty(len(texts), dtype=np.float64)
+    if model == "vader":
+        for i, text in enumerate(texts):
+            scores[i] = analyze(text)["compound"]
+    else:
+        for i, text in enumerate(texts):
+            scores[i] = analyze(text).sentiment.polarity
+    return scores
+
+
+def _get_pool():
+    # Spawned rather than forked: the parent holds torch and Flask threads.
+    # Sized once to MAX_JOBS; a request wanting fewer workers keeps fewer
+    # chunks in flight instead of resizing the pool under other requests.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_JOBS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def score_texts(texts, model, n_jobs=DEFAULT_SENTIMENT_JOBS, on_progress=None):
+    """
+    Rule-based sentiment scores (TextBlob polarity or VADER compound) for
+    texts. Each distinct text is scored once; large batches are split into
+    chunks and scored in a process pool. Returns (float64 scores aligned
+    with texts, number of distinct texts); `on_progress(done, total)`
+    counts distinct texts.
+    """
+    if model not in RULE_BASED_MODELS:
+        raise ValueError(f"Unsupported rule-based model '{model}'")
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+    uniques = list(uniques)
+    n_jobs = MAX_JOBS if n_jobs < 0 else min(n_jobs, MAX_JOBS)
+    workers = min(n_jobs, -(-len(uniques) // CHUNK_SIZE))
+
+    if workers <= 1 or len(uniques) < PARALLEL_MIN_TEXTS:
+        unique_scores = np.empty(len(uniques), dtype=np.float64)
+        for start in range(0, len(uniques), CHUNK_SIZE):
+            chunk = uniques[start:start + CHUNK_SIZE]
+            unique_scores[start:start + len(chunk)] = _score_chunk(model, chunk)
+            if on_progress is not None:
+                on_progress(start + len(chunk), len(uniques))
+    else:
+        unique_scores = np.empty(len(uniques), dtype=np.float64)
+        pool = _get_pool()
+        starts = iter(range(0, len(uniques), CHUNK_SIZE))
+        futures = {}
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                futures[pool.submit(_score_chunk, model, uniques[start:start + CHUNK_SIZE])] = start
+
+        for _ in range(workers):
+            submit_next()
+        done = 0
+        try:
+            while futures:
+                future = next(as_completed(futures))
+                start = futures.pop(future)
+                chunk_scores = future.result()
+                unique_scores[start:start + len(chunk_scores)] = chunk_scores
+                done += len(chunk_scores)
+                submit_next()
+                if on_progress is not None:
+                    on_progress(done, len(uniques))
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+    return unique_scores[codes], len(uniques)
+
+
+def label_scores(scores, model):
+    # TextBlob: sign of the polarity. VADER: the usual +/-0.05 compound cut-offs.
+    if model == "vader":
+        positive, negative = scores >= 0.05, scores <= -0.05
+    else:
+        positive, negative = scores > 0, scores < 0
+    return np.select([positive, negative], ["Positive", "Negative"], default="Neutral")
+
+
+def summarize_sentiment(labels, scores):
+    """
+    Per-label counts, mean scores (rounded to 4 places, None when empty)
+    and percentages of all rows.
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores, dtype=np.float64)
+    summary = {}
+    for label in SENTIMENT_LABELS:
+        mask = labels == label
+        count = int(mask.sum())
+        summary[label] = {
+            "Count": count,
+            "Average Score": round(float(scores[mask].sum() / count), 4) if count > 0 else None
+        }
+    total_count = sum(item["Count"] for item in summary.values())
+    if total_count > 0:
+        percentages = {label: summary[label]["Count"] * 100 / total_count for label in SENTIMENT_LABELS}
+    else:
+        percentages = {label: 0 for label in SENTIMENT_LABELS}
+    return summary, percentages
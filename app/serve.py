@@ -0,0 +1,372 @@
+"""
+Production server: loads the app, the preloaded models and backends once,
+then forks analysis worker processes that share those pages copy-on-write.
+
+    python serve.py --workers 4
+
+The server process handles uploads, results, jobs and the Ollama-bound
+routes on threads; SS_PROCESS_ROUTES run in the workers, whether they
+arrive directly or through /jobs, with progress and cancels forwarded.
+Each worker caps its own inner parallelism (sentiment, sweep and
+collocation pools, BLAS threads) at cpu_count // workers. On SIGTERM the
+server stops taking new work and drains for SS_DRAIN_SECONDS.
+"""
+import argparse
+import ctypes
+import gc
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+from jobs import current_job, job_context
+from metrics import current_timing, timed
+
+DEFAULT_HOST = os.environ.get("SS_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("SS_PORT", 5000))
+# Analysis worker processes; 0 runs every route in the server process.
+DEFAULT_WORKERS = int(os.environ.get("SS_WORKERS", os.cpu_count() or 1))
+DEFAULT_DRAIN_SECONDS = float(os.environ.get("SS_DRAIN_SECONDS", 30))
+# CPU-bound routes handed to the worker processes. ABSA and zero-shot stay on
+# server threads: they mostly wait on Ollama, which batches them itself.
+DEFAULT_PROCESS_ROUTES = os.environ.get(
+    "SS_PROCESS_ROUTES",
+    "/process/wordcloud,/process/semantic_wordcloud,/process/sentiment,/process/topic_modeling"
+)
+# Imported before the workers are forked so they share the pages instead of
+# importing again. torch is left out by default: it starts OpenMP threads
+# that do not survive fork.
+DEFAULT_PRELOAD_BACKENDS = os.environ.get(
+    "SS_PRELOAD_BACKENDS",
+    "sklearn.feature_extraction.text,sklearn.decomposition,wordcloud,textblob,nltk.sentiment.vader"
+)
+
+# Per-worker state, set by _init_worker after fork.
+_worker = {}
+
+
+class CancelledJobs:
+    """
+    IDs of cancelled jobs in a ring of shared memory, so a worker process
+    running a job sees a cancel issued in the server process at its next
+    report_progress().
+    """
+
+    ID_SIZE = 32
+
+    def __init__(self, ctx, slots=64):
+        self.slots = slots
+        self._ids = ctx.Array(ctypes.c_char, self.ID_SIZE * slots)
+        self._next = ctx.Value(ctypes.c_int, 0, lock=False)
+
+    def add(self, job_id):
+        with self._ids.get_lock():
+            start = self._next.value * self.ID_SIZE
+            self._ids[start:start + self.ID_SIZE] = job_id.encode("ascii")[:self.ID_SIZE].ljust(self.ID_SIZE)
+            self._next.value = (self._next.value + 1) % self.slots
+
+    def __contains__(self, job_id):
+        key = job_id.encode("ascii")[:self.ID_SIZE].ljust(self.ID_SIZE)
+        with self._ids.get_lock():
+            raw = self._ids.raw
+        return any(raw[i:i + self.ID_SIZE] == key for i in range(0, len(raw), self.ID_SIZE))
+
+
+class _CancelFlag:
+    def __init__(self, job_id, cancelled):
+        self._job_id = job_id
+        self._cancelled = cancelled
+
+    def is_set(self):
+        return self._job_id in self._cancelled
+
+
+class _ForwardedJob:
+    # Stands in for the server process's Job inside a worker.
+    def __init__(self, job_id, cancelled):
+        self.id = job_id
+        self.cancel_event = _CancelFlag(job_id, cancelled)
+
+
+class _ProgressForwarder:
+    def __init__(self, queue):
+        self._queue = queue
+
+    def update_progress(self, job, done, total=None, partial=None):
+        self._queue.put((job.id, done, total, partial))
+
+
+def _limit_inner_jobs(jobs):
+    # Each worker gets its share of the cores for its own pools (sentiment
+    # processes, sweep fits, collocation threads) and BLAS/OpenMP threads,
+    # instead of every worker sizing them to the whole machine.
+    from threadpoolctl import threadpool_limits
+
+    import collocations
+    import sentiment_engine
+    import topic_sweep
+
+    sentiment_engine.MAX_JOBS = topic_sweep.MAX_JOBS = collocations.MAX_JOBS = jobs
+    _worker["threadpool_limits"] = threadpool_limits(limits=jobs)
+
+
+def _init_worker(progress_queue, cancelled, inner_jobs):
+    # Ctrl-C reaches the whole process group; the server process decides
+    # when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    import app as app_module
+
+    _limit_inner_jobs(inner_jobs)
+
+    app_module.analysis_pool = None
+    _worker.update(app=app_module, progress=progress_queue, cancelled=cancelled)
+
+
+def _run_view(path, params, job_id):
+    # Returns the view's (body, status code) plus its stage timings and this
+    # worker's cache/model counters for the server's /metrics.
+    app_module = _worker["app"]
+    with timed() as timing:
+        if job_id is None:
+            body, status_code = app_module.run_view_as_job(path, params)
+        else:
+            job = _ForwardedJob(job_id, _worker["cancelled"])
+            with job_context(job, _ProgressForwarder(_worker["progress"])):
+                body, status_code = app_module.run_view_as_job(path, params)
+    return body, status_code, dict(timing.stages), (os.getpid(), app_module.process_snapshot(llm_labels=False))
+
+
+class AnalysisPool:
+    """
+    Runs CPU-heavy routes in `workers` processes forked from the server
+    process after the app (and SS_PRELOAD_MODELS) is loaded, so models and
+    imported backends are shared copy-on-write rather than loaded per worker.
+    Jobs, results and caches on disk stay valid in every process; progress
+    reports and cancels are forwarded between the job's thread in the server
+    process and the worker running it.
+    """
+
+    def __init__(self, workers, routes, job_manager):
+        self.workers = workers
+        self.routes = frozenset(routes)
+        self.job_manager = job_manager
+        self._ctx = multiprocessing.get_context("fork")
+        self._progress = self._ctx.SimpleQueue()
+        self._cancelled = CancelledJobs(self._ctx)
+        self._running = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._progress_thread = None
+
+    def handles(self, rule):
+        return rule in self.routes
+
+    def worker_snapshots(self):
+        # {pid: process_snapshot()} as of each live worker's latest result.
+        with self._lock:
+            executor = self._executor
+            live = set((executor._processes or {}).keys()) if executor is not None else set()
+            return {pid: snapshot for pid, snapshot in self._snapshots.items() if pid in live}
+
+    def _finish(self, result):
+        body, status_code, stages, (pid, snapshot) = result
+        with self._lock:
+            self._snapshots[pid] = snapshot
+        timing = current_timing()
+        if timing is not None:
+            timing.merge(stages)
+        return body, status_code
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._progress, self._cancelled, max(1, (os.cpu_count() or 1) // self.workers))
+        )
+
+    def start(self):
+        # With fork, the executor forks every worker on its first task;
+        # do that now, before the server starts its request threads.
+        gc.collect()
+        gc.freeze()
+        self._executor = self._new_executor()
+        self._executor.submit(os.getpid).result()
+        gc.unfreeze()
+        self._progress_thread = threading.Thread(target=self._forward_progress, name="analysis-progress", daemon=True)
+        self._progress_thread.start()
+        return self
+
+    def _forward_progress(self):
+        while True:
+            item = self._progress.get()
+            if item is None:
+                return
+            job_id, done, total, partial = item
+            with self._lock:
+                job = self._running.get(job_id)
+            if job is not None:
+                self.job_manager.update_progress(job, done, total, partial)
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._executor is not broken:
+                return
+            print("Analysis worker exited unexpectedly; restarting the pool")
+            self._executor = self._new_executor()
+
+    def run(self, path, params):
+        """
+        Run the route for path in a worker and return (JSON body, status
+        code). Called from a server thread, possibly inside a job.
+        """
+        job = current_job()
+        executor = self._executor
+        try:
+            future = executor.submit(_run_view, path, params, None if job is None else job.id)
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._executor
+            future = executor.submit(_run_view, path, params, None if job is None else job.id)
+        if job is None:
+            try:
+                return self._finish(future.result())
+            except BrokenProcessPool:
+                self._restart(executor)
+                return {"error": "The analysis worker exited unexpectedly."}, 500
+        with self._lock:
+            self._running[job.id] = job
+        forwarded_cancel = False
+        try:
+            while True:
+                try:
+                    return self._finish(future.result(timeout=0.25))
+                except TimeoutError:
+                    if job.cancel_event.is_set() and not forwarded_cancel:
+                        self._cancelled.add(job.id)
+                        forwarded_cancel = True
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    return {"error": "The analysis worker exited unexpectedly."}, 500
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+
+    def shutdown(self, timeout=None):
+        # Lets running tasks finish within `timeout`, then kills the workers.
+        executor = self._executor
+        if executor is None:
+            return
+        stopper = threading.Thread(target=executor.shutdown, kwargs={"cancel_futures": True}, daemon=True)
+        stopper.start()
+        stopper.join(timeout)
+        if stopper.is_alive():
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+            stopper.join(5)
+        self._progress.put(None)
+
+
+class InFlightRequests:
+    """WSGI middleware counting requests whose response is not finished yet."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.count = 0
+        self._changed = threading.Condition()
+
+    def _finished(self):
+        with self._changed:
+            self.count -= 1
+            self._changed.notify_all()
+
+    def __call__(self, environ, start_response):
+        with self._changed:
+            self.count += 1
+        try:
+            return ClosingIterator(self.wsgi_app(environ, start_response), self._finished)
+        except BaseException:
+            self._finished()
+            raise
+
+    def wait_idle(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._changed:
+            while self.count:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return self.count
+
+
+def preload_backends(spec):
+    for name in [name.strip() for name in spec.split(",") if name.strip()]:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Could not preload {name}: {e}")
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, drain_seconds=DEFAULT_DRAIN_SECONDS,
+          process_routes=DEFAULT_PROCESS_ROUTES, preload=DEFAULT_PRELOAD_BACKENDS):
+    import app as app_module
+
+    preload_backends(preload)
+    # Models must be in memory before fork for the workers to share them.
+    if app_module.model_warmup is not None:
+        app_module.model_warmup.join()
+    pool = None
+    if workers > 0:
+        routes = [route.strip() for route in process_routes.split(",") if route.strip()]
+        pool = AnalysisPool(workers, routes, app_module.job_manager).start()
+        app_module.analysis_pool = pool
+
+    in_flight = InFlightRequests(app_module.app.wsgi_app)
+    app_module.app.wsgi_app = in_flight
+    server = make_server(host, port, app_module.app, threaded=True)
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if stopping.is_set():
+            return
+        stopping.set()
+        print(f"Received signal {signum}; draining for up to {drain_seconds:g}s")
+        # shutdown() waits for serve_forever to return, so not on this thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving on http://{host}:{server.server_port} with {workers} analysis worker(s)")
+    server.serve_forever()
+
+    # Closed to new connections; let queued jobs and open requests finish.
+    deadline = time.time() + drain_seconds
+    cancelled = app_module.job_manager.shutdown(timeout=drain_seconds)
+    unfinished = in_flight.wait_idle(timeout=max(0.0, deadline - time.time()))
+    if pool is not None:
+        pool.shutdown(timeout=max(0.0, deadline - time.time()))
+    print(f"Stopped: {cancelled} job(s) cancelled, {unfinished} request(s) cut off")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Semantic Sapience with analysis worker processes")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--drain-seconds", type=float, default=DEFAULT_DRAIN_SECONDS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.drain_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import sys
+import time
+from collections import OrderedDict
+
+import psutil
+
+# Analysis backends that should only be imported by the routes that use them.
+HEAVY_MODULES = (
+    "bertopic", "umap", "hdbscan", "sentence_transformers", "transformers", "torch", "gensim",
+    "matplotlib", "wordcloud", "ollama", "textblob", "nltk", "sklearn"
+)
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of app startup. Each mark() closes a phase that
+    started at the previous mark; the first phase starts when the
+    interpreter process was created, so interpreter and site-packages
+    start-up are counted too.
+    """
+
+    def __init__(self):
+        self._process_start = psutil.Process().create_time()
+        self._last = time.time()
+        self.phases = OrderedDict([("interpreter", self._last - self._process_start)])
+        self.ready_at = None
+
+    def mark(self, phase):
+        now = time.time()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self):
+        self.ready_at = time.time()
+
+    def report(self):
+        return {
+            "total_seconds": round((self.ready_at or time.time()) - self._process_start, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            # Backends imported so far, at startup or by a request since.
+            "loaded_backends": [name for name in HEAVY_MODULES if name in sys.modules]
+        }
+
+
+startup_profile = StartupProfile()
@@ -5,6 +5,7 @@ const statsCardsWrapper = document.getElementById('statsCardsWrapper');
 let currentFile = null;        // Uploaded file
 let currentFileBase64 = null;  // Base64 file contents
 let currentFileName = null;    // File name
+let currentDatasetId = null;   // Server-side dataset ID returned by /upload
 let datasetColumns = [];       // CSV/XLSX header names
 let allModals = {};            // Open/minimized modals with checkpoints
 
@@ -87,6 +88,33 @@ function hideLoading() {
   document.getElementById('loadingOverlay').style.display = 'none';
 }
 
+function datasetRef() {
+  if (currentDatasetId) {
+    return { datasetId: currentDatasetId };
+  }
+  return {
+    base64: currentFileBase64,
+    fileType: currentFileName && currentFileName.toLowerCase().endsWith('.xlsx') ? 'xlsx' : 'csv'
+  };
+}
+
+// POST an analysis request by dataset ID. If the server no longer holds the
+// dataset (e.g. after a restart), resend it once inline so it is re-registered.
+async function postAnalysis(endpoint, payload) {
+  const send = (body) => fetch(endpoint, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body)
+  });
+  const response = await send(payload);
+  if (response.status === 404 && payload.datasetId && currentFileBase64) {
+    currentDatasetId = null;
+    const { datasetId, ...rest } = payload;
+    return send({ ...rest, ...datasetRef() });
+  }
+  return response;
+}
+
 async function fileToBase64(file) {
   return new Promise((resolve, reject) => {
     const reader = new FileReader();
@@ -96,6 +124,34 @@ async function fileToBase64(file) {
   });
 }
 
+function blobToDataUrl(blob) {
+  return new Promise((resolve, reject) => {
+    const reader = new FileReader();
+    reader.onload = () => resolve(reader.result);
+    reader.onerror = reject;
+    reader.readAsDataURL(blob);
+  });
+}
+
+// Shows the preview returned by a word cloud request, then swaps in the
+// full-size render. Checkpoints keep the full image inline so exported
+// projects stay self-contained.
+async function showWordCloud(modalEl, data, altText, checkpointConfig) {
+  const previewSection = modalEl.querySelector(".preview-section");
+  previewSection.innerHTML = "";
+  const img = document.createElement("img");
+  img.src = data.image;
+  img.alt = altText;
+  previewSection.appendChild(img);
+  if (data.preview && data.imageUrl) {
+    const response = await fetch(data.imageUrl);
+    if (response.ok) {
+      img.src = await blobToDataUrl(await response.blob());
+    }
+  }
+  createCheckpoint(modalEl, checkpointConfig, previewSection.innerHTML);
+}
+
 function triggerFileUpload() {
   const fileInput = document.getElementById('fileInput');
   fileInput.value = "";
@@ -118,6 +174,7 @@ async function handleFileUpload(event) {
     currentFile = file;
     currentFileName = file.name;
     currentFileBase64 = await fileToBase64(file);
+    currentDatasetId = null;
     const formData = new FormData();
     formData.append("file", file);
     const response = await fetch("/upload", {
@@ -132,6 +189,7 @@ async function handleFileUpload(event) {
       renderStats([]);
       return;
     }
+    currentDatasetId = data.datasetId || null;
     if (data.stats) {
       datasetColumns = Object.keys(data.stats);
       currentDatasetStats = data.stats;
@@ -410,6 +468,7 @@ async function setProjectConfig(config) {
   if (config.dataset) {
     currentFileName = config.dataset.fileName;
     currentFileBase64 = config.dataset.base64;
+    currentDatasetId = null;
     currentDatasetStats = config.dataset.stats;
     if (currentDatasetStats) {
       datasetColumns = Object.keys(currentDatasetStats);
@@ -1030,22 +1089,19 @@ async function regenerateWordCloud(modalEl, methodId) {
     }
     const payload = {
       method: methodId,
-      base64: currentFileBase64,
+      ...datasetRef(),
       fileName: currentFileName,
       column: fields.textColumn,
       maxWords: parseInt(fields.maxWords) || 500,
       stopwords: !!fields.stopwords,
-      excludeWords: fields.excludeWords ? fields.excludeWords.split(",").map(word => word.trim()).filter(word => word) : []
+      excludeWords: fields.excludeWords ? fields.excludeWords.split(",").map(word => word.trim()).filter(word => word) : [],
+      preview: true
     };
     if (methodId === 'collocation') {
       payload.windowSize = parseInt(fields.windowSize) || 2;
     }
     showModalLoading(modalEl);
-    const response = await fetch("/process/wordcloud", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload)
-    });
+    const response = await postAnalysis("/process/wordcloud", payload);
     const data = await response.json();
     hideModalLoading(modalEl);
     if (!response.ok) {
@@ -1053,18 +1109,11 @@ async function regenerateWordCloud(modalEl, methodId) {
       return;
     }
     if (data.image) {
-      const previewSection = modalEl.querySelector(".preview-section");
-      previewSection.innerHTML = "";
-      const img = document.createElement("img");
-      img.src = data.image;
-      img.alt = "Word Cloud Preview";
-      previewSection.appendChild(img);
-      const outputData = previewSection.innerHTML;
       const checkpointConfig = {
         methodId: methodId,
         fields: fields
       };
-      createCheckpoint(modalEl, checkpointConfig, outputData);
+      await showWordCloud(modalEl, data, "Word Cloud Preview", checkpointConfig);
     } else {
       alert(data.error || "No image returned from server.");
     }
@@ -1100,19 +1149,16 @@ async function generateSemanticWordCloud(modalEl) {
     const payload = {
       query: fields.query,
       embeddingModel: fields.embeddingModel,
-      base64: currentFileBase64,
+      ...datasetRef(),
       fileName: currentFileName,
       column: fields.textColumn,
       maxWords: parseInt(fields.maxWords) || 500,
       stopwords: !!fields.stopwords,
-      excludeWords: fields.excludeWords ? fields.excludeWords.split(",").map(word => word.trim()).filter(word => word) : []
+      excludeWords: fields.excludeWords ? fields.excludeWords.split(",").map(word => word.trim()).filter(word => word) : [],
+      preview: true
     };
     showModalLoading(modalEl);
-    const response = await fetch("/process/semantic_wordcloud", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload)
-    });
+    const response = await postAnalysis("/process/semantic_wordcloud", payload);
     const data = await response.json();
     hideModalLoading(modalEl);
     if (!response.ok) {
@@ -1120,18 +1166,11 @@ async function generateSemanticWordCloud(modalEl) {
       return;
     }
     if (data.image) {
-      const previewSection = modalEl.querySelector(".preview-section");
-      previewSection.innerHTML = "";
-      const img = document.createElement("img");
-      img.src = data.image;
-      img.alt = "Semantic Word Cloud Preview";
-      previewSection.appendChild(img);
-      const outputData = previewSection.innerHTML;
       const checkpointConfig = {
         methodId: 'semanticwc',
         fields: fields
       };
-      createCheckpoint(modalEl, checkpointConfig, outputData);
+      await showWordCloud(modalEl, data, "Semantic Word Cloud Preview", checkpointConfig);
     } else {
       alert(data.error || "No image returned from server.");
     }
@@ -1151,7 +1190,7 @@ async function runTopicModeling(modalEl, methodId) {
       }
       const payload = {
         method: methodId,
-        base64: currentFileBase64,
+        ...datasetRef(),
         column: fields.textColumn,
         numTopics: parseInt(fields.numTopics) || 5,
         wordsPerTopic: parseInt(fields.wordsPerTopic) || 5,
@@ -1166,11 +1205,7 @@ async function runTopicModeling(modalEl, methodId) {
         payload.step = parseInt(fields.step) || 1;
       }
       showModalLoading(modalEl);
-      const response = await fetch("/process/topic_modeling", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload)
-      });
+      const response = await postAnalysis("/process/topic_modeling", payload);
       const data = await response.json();
       hideModalLoading(modalEl);
       if (!response.ok) {
@@ -1272,9 +1307,9 @@ async function runSentimentAnalysis(modalEl, methodId) {
     }
     const payload = {
       method: methodId,
-      base64: currentFileBase64,
-      fileType: currentFileName.toLowerCase().endsWith('.xlsx') ? 'xlsx' : 'csv',
+      ...datasetRef(),
       column: fields.textColumn,
+      inlineResults: false,
     };
     switch (methodId) {
       case 'rulebasedsa':
@@ -1301,12 +1336,11 @@ async function runSentimentAnalysis(modalEl, methodId) {
       'zeroshotSentiment': "/process/zero_shot_sentiment"
     };
     const endpoint = endpointMap[methodId] || "/process/sentiment";
-    const response = await fetch(endpoint, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload)
-    });
+    const response = await postAnalysis(endpoint, payload);
     const data = await response.json();
+    if (response.ok) {
+      await loadResultPreview(data);
+    }
     hideModalLoading(modalEl);
     if (!response.ok) {
       alert(data.error || "Error running sentiment analysis.");
@@ -1334,6 +1368,56 @@ async function runSentimentAnalysis(modalEl, methodId) {
   }
 }
 
+const RESULT_PREVIEW_ROWS = 500;
+
+// Per-row results stay on the server; fetch the first page (with texts)
+// as data.results for the detailed tables.
+async function loadResultPreview(data) {
+  if (data.results || !data.resultsUrl) {
+    return data;
+  }
+  const response = await fetch(`${data.resultsUrl}?includeText=true&limit=${RESULT_PREVIEW_ROWS}`);
+  const page = await response.json();
+  if (!response.ok) {
+    throw new Error(page.error || "Could not load results.");
+  }
+  const names = Object.keys(page.columns);
+  data.results = page.columns.row.map((_, i) => {
+    const record = {};
+    names.forEach(name => { record[name] = page.columns[name][i]; });
+    return record;
+  });
+  return data;
+}
+
+function sentimentCountsFrom(data) {
+  if (data.stats) {
+    const counts = {};
+    Object.entries(data.stats).forEach(([sentiment, values]) => { counts[sentiment] = values.Count; });
+    return counts;
+  }
+  return data.results.reduce((acc, curr) => {
+    acc[curr.sentiment] = (acc[curr.sentiment] || 0) + 1;
+    return acc;
+  }, {});
+}
+
+function appendResultExport(previewSection, data) {
+  if (!data.exportUrl) {
+    return;
+  }
+  const note = document.createElement("p");
+  note.style.marginTop = "1rem";
+  if (data.rowCount > data.results.length) {
+    note.textContent = `Showing the first ${data.results.length} of ${data.rowCount} rows. `;
+  }
+  const link = document.createElement("a");
+  link.href = `${data.exportUrl}?format=csv&includeText=true`;
+  link.textContent = "Download all rows (CSV)";
+  note.appendChild(link);
+  previewSection.appendChild(note);
+}
+
 function renderABSAResults(previewSection, data) {
   if (data.results && Array.isArray(data.results) && data.results.length > 0) {
     // Create summary heading and table.
@@ -1342,11 +1426,8 @@ function renderABSAResults(previewSection, data) {
     summaryHeading.style.marginTop = "1rem";
     previewSection.appendChild(summaryHeading);
     
-    const sentimentCounts = data.results.reduce((acc, curr) => {
-      acc[curr.sentiment] = (acc[curr.sentiment] || 0) + 1;
-      return acc;
-    }, {});
-    const total = data.results.length;
+    const sentimentCounts = sentimentCountsFrom(data);
+    const total = Object.values(sentimentCounts).reduce((sum, count) => sum + count, 0);
     const sentiments = ["Positive", "Neutral", "Negative"];
     
     const summaryTable = document.createElement("table");
@@ -1418,6 +1499,7 @@ function renderABSAResults(previewSection, data) {
     downloadDetailedBtn.addEventListener("click", () => {
       downloadTableAsHTML(detailedTable, "absa_detailed_results.html");
     });
+    appendResultExport(previewSection, data);
   } else {
     const message = document.createElement("p");
     message.textContent = "No ABSA results available.";
@@ -1434,11 +1516,8 @@ function renderZeroShotSentimentResults(previewSection, data) {
     summaryHeading.style.marginTop = "1rem";
     previewSection.appendChild(summaryHeading);
     
-    const sentimentCounts = data.results.reduce((acc, curr) => {
-      acc[curr.sentiment] = (acc[curr.sentiment] || 0) + 1;
-      return acc;
-    }, {});
-    const total = data.results.length;
+    const sentimentCounts = sentimentCountsFrom(data);
+    const total = Object.values(sentimentCounts).reduce((sum, count) => sum + count, 0);
     const sentiments = ["Positive", "Neutral", "Negative"];
     const summaryTable = document.createElement("table");
     summaryTable.className = "summary-table";
@@ -1507,6 +1586,7 @@ function renderZeroShotSentimentResults(previewSection, data) {
     downloadDetailedBtn.addEventListener("click", () => {
       downloadTableAsHTML(detailedTable, "zero_shot_detailed_results.html");
     });
+    appendResultExport(previewSection, data);
   } else {
     const message = document.createElement("p");
     message.textContent = "No sentiment analysis results available.";
@@ -1593,6 +1673,7 @@ function renderOtherSentimentResults(previewSection, data) {
     downloadDetailedBtn.addEventListener("click", () => {
       downloadTableAsHTML(detailedTable, "other_sentiment_detailed_results.html");
     });
+    appendResultExport(previewSection, data);
   } else if (!data.stats) {
     const message = document.createElement("p");
     message.textContent = "No sentiment analysis results available.";
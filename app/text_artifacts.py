@@ -0,0 +1,322 @@
+import glob
+import hashlib
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from disk_cache import evict_oldest, touch
+from metrics import span
+from nltk_resources import nltk_word_tokenize
+
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    "SS_ARTIFACT_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "artifacts")
+)
+DEFAULT_ARTIFACT_CACHE_MB = int(os.environ.get("SS_ARTIFACT_CACHE_MB", 1024))
+# Artifacts on disk; the least recently used are removed beyond this
+DEFAULT_ARTIFACT_DISK_MB = int(os.environ.get("SS_ARTIFACT_DISK_MB", 4096))
+
+# "regex" is the CountVectorizer/TfidfVectorizer analyzer used by the word
+# cloud and topic routes; "nltk" and "nltk_lower" are word_tokenize on the
+# raw and on the lowercased text.
+TOKENIZERS = ("regex", "nltk", "nltk_lower")
+
+_TOKEN_RE = re.compile(r"(?u)\b\w+\b")
+
+
+def regex_tokenize(text):
+    # CountVectorizer(token_pattern=r"(?u)\b\w+\b").build_analyzer() without sklearn.
+    return _TOKEN_RE.findall(text.lower())
+
+
+def get_tokenizer(name):
+    if name == "regex":
+        return regex_tokenize
+    word_tokenize = nltk_word_tokenize()
+    if name == "nltk":
+        return word_tokenize
+    return lambda text: word_tokenize(text.lower())
+
+_DATASET_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def column_texts(series):
+    return series.astype(str).dropna().tolist()
+
+
+def _pack_vocabulary(vocabulary):
+    # One UTF-8 blob plus byte offsets; a fixed-width "<U" array would pad
+    # every token to the longest one.
+    encoded = [token.encode("utf-8") for token in vocabulary]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(token) for token in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_vocabulary(blob, offsets):
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return np.array([data[start:end].decode("utf-8") for start, end in zip(bounds[:-1], bounds[1:])],
+                    dtype=object)
+
+
+class TextArtifact:
+    """
+    One tokenized text column: every row's tokens as int32 codes into a
+    sorted vocabulary (flat, with row offsets) and the document-term count
+    matrix built from them.
+
+    The matrix holds the full vocabulary. Stop words are removed by dropping
+    columns, which gives the same matrix as a CountVectorizer fitted with
+    those stop words, and TF-IDF is derived from the counts with the same
+    defaults as TfidfVectorizer.
+    """
+
+    def __init__(self, codes, offsets, vocabulary):
+        self.codes = codes
+        self.offsets = offsets
+        self.vocabulary = vocabulary
+        self.num_docs = len(offsets) - 1
+        lengths = np.diff(offsets)
+        rows = np.repeat(np.arange(self.num_docs), lengths)
+        self.counts = sparse.csr_matrix(
+            (np.ones(len(codes), dtype=np.int64), (rows, codes)),
+            shape=(self.num_docs, len(vocabulary))
+        )
+        self.counts.sum_duplicates()
+
+    @classmethod
+    def from_texts(cls, texts, tokenize):
+        tokenized = [tokenize(text) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(tokenized))
+        flat = np.fromiter(itertools.chain.from_iterable(tokenized), dtype=object, count=int(lengths.sum()))
+        codes, uniques = pd.factorize(flat)
+        # Sorted like CountVectorizer.get_feature_names_out().
+        order = np.argsort(np.asarray(uniques, dtype=str), kind="stable")
+        remap = np.empty(len(order), dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        vocabulary = np.asarray(uniques, dtype=object)[order]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        return cls(remap[codes] if len(codes) else codes.astype(np.int32), offsets, vocabulary)
+
+    @property
+    def nbytes(self):
+        vocabulary_bytes = sum(len(token) for token in self.vocabulary) + 56 * len(self.vocabulary)
+        return (self.codes.nbytes + self.offsets.nbytes + vocabulary_bytes
+                + self.counts.data.nbytes + self.counts.indices.nbytes + self.counts.indptr.nbytes)
+
+    def vocabulary_mask(self, exclude=None, alpha_only=False, lowercase=False):
+        """
+        Boolean mask over the vocabulary: False for tokens in `exclude`
+        (compared after lowercasing when `lowercase` is set) and, with
+        `alpha_only`, for tokens that are not purely alphabetic.
+        """
+        keep = np.ones(len(self.vocabulary), dtype=bool)
+        if alpha_only:
+            keep &= np.fromiter((token.isalpha() for token in self.vocabulary), dtype=bool,
+                                count=len(self.vocabulary))
+        if exclude:
+            names = self.lowercase_vocabulary() if lowercase else self.vocabulary
+            keep &= ~pd.Index(names).isin(list(exclude))
+        return keep
+
+    def lowercase_vocabulary(self):
+        return np.array([token.lower() for token in self.vocabulary], dtype=object)
+
+    def documents(self, rows=None, keep=None, names=None):
+        """
+        Token lists for `rows` (all rows by default), dropping tokens where
+        the vocabulary mask `keep` is False and spelling tokens with `names`
+        (e.g. lowercase_vocabulary()) instead of the vocabulary.
+        """
+        names = self.vocabulary if names is None else names
+        rows = range(self.num_docs) if rows is None else rows
+        docs = []
+        for row in rows:
+            codes = self.codes[self.offsets[row]:self.offsets[row + 1]]
+            if keep is not None:
+                codes = codes[keep[codes]]
+            docs.append(names[codes].tolist())
+        return docs
+
+    def encode(self, keep=None, names=None):
+        """
+        (codes, offsets, vocabulary) of the stream with the tokens dropped
+        where `keep` is False and re-encoded by `names`, so tokens that share
+        a name (e.g. "The" and "the" under lowercase_vocabulary()) share a
+        code.
+        """
+        with span("vectorize"):
+            codes = self.codes if keep is None else self.codes[keep[self.codes]]
+            if keep is None:
+                offsets = self.offsets
+            else:
+                kept = np.concatenate(([0], np.cumsum(keep[self.codes], dtype=np.int64)))
+                offsets = kept[self.offsets]
+            if names is None:
+                return codes, offsets, self.vocabulary
+            name_codes, vocabulary = pd.factorize(pd.Series(names, dtype=object))
+            return name_codes.astype(np.int32)[codes], offsets, np.asarray(vocabulary, dtype=object)
+
+    def term_counts(self, exclude=None):
+        """
+        (X, vocabulary) without the columns of `exclude`, equal to
+        CountVectorizer(stop_words=exclude).fit_transform on the same texts.
+        """
+        with span("vectorize"):
+            columns = np.flatnonzero(self.vocabulary_mask(exclude))
+            if len(columns) == 0:
+                raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+            if len(columns) == len(self.vocabulary):
+                return self.counts, self.vocabulary
+            return self.counts[:, columns], self.vocabulary[columns]
+
+    def tfidf(self, exclude=None):
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        X, vocabulary = self.term_counts(exclude)
+        with span("vectorize"):
+            return TfidfTransformer().fit_transform(X), vocabulary
+
+    def frequencies(self, exclude=None):
+        X, vocabulary = self.term_counts(exclude)
+        with span("vectorize"):
+            return vocabulary, np.asarray(X.sum(axis=0)).ravel()
+
+
+class TextArtifactCache:
+    """
+    TextArtifacts keyed by (dataset ID, column, tokenizer). Recently used
+    artifacts stay in memory up to max_bytes; every artifact is also written
+    to `<artifact_dir>/<dataset_id>/` as an .npz of its codes, offsets and
+    vocabulary, so other worker processes and restarts load it instead of
+    tokenizing again. Concurrent requests for the same key build it once.
+    The files are capped at max_disk_bytes, least recently used first, and
+    drop_dataset() removes all of a dataset's artifacts.
+    """
+
+    def __init__(self, artifact_dir=DEFAULT_ARTIFACT_DIR, max_bytes=DEFAULT_ARTIFACT_CACHE_MB * 1024 ** 2,
+                 max_disk_bytes=DEFAULT_ARTIFACT_DISK_MB * 1024 ** 2):
+        self.artifact_dir = artifact_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._artifacts = OrderedDict()
+        self._total_bytes = 0
+        self._build_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, dataset_id, column, tokenizer):
+        if not _DATASET_ID_RE.match(dataset_id or ""):
+            return None
+        column_digest = hashlib.blake2b(str(column).encode("utf-8"), digest_size=8).hexdigest()
+        return os.path.join(self.artifact_dir, dataset_id, f"{column_digest}.{tokenizer}.npz")
+
+    def _remember(self, key, artifact):
+        with self._lock:
+            if key in self._artifacts:
+                return
+            nbytes = artifact.nbytes
+            self._artifacts[key] = (artifact, nbytes)
+            self._total_bytes += nbytes
+            while len(self._artifacts) > 1 and self._total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._artifacts.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+
+    def peek(self, dataset_id, column, tokenizer):
+        """The in-memory artifact for the key, or None. Never tokenizes."""
+        key = (dataset_id, column, tokenizer)
+        with self._lock:
+            if key in self._artifacts:
+                self._artifacts.move_to_end(key)
+                self.hits += 1
+                return self._artifacts[key][0]
+        return None
+
+    def get(self, dataset_id, column, tokenizer, texts_fn):
+        """
+        The artifact for the key, loaded from disk or built by tokenizing
+        texts_fn() (the column's texts, see column_texts) on first use.
+        """
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unsupported tokenizer '{tokenizer}'.")
+        key = (dataset_id, column, tokenizer)
+        path = self._path(dataset_id, column, tokenizer)
+        artifact = self.peek(*key)
+        if artifact is not None:
+            if path:
+                touch(path)
+            return artifact
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            artifact = self.peek(*key)
+            if artifact is not None:
+                return artifact
+            artifact = self._load(path) if path and os.path.exists(path) else None
+            if artifact is not None:
+                touch(path)
+                with self._lock:
+                    self.hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                texts = texts_fn()
+                with span("tokenize"):
+                    artifact = TextArtifact.from_texts(texts, get_tokenizer(tokenizer))
+                if path:
+                    self._save(path, artifact)
+            self._remember(key, artifact)
+        with self._lock:
+            self._build_locks.pop(key, None)
+        return artifact
+
+    def _load(self, path):
+        with span("decode"), np.load(path, allow_pickle=False) as data:
+            if "vocab_blob" not in data.files:
+                # Written before the vocabulary was stored as a blob.
+                return None
+            vocabulary = _unpack_vocabulary(data["vocab_blob"], data["vocab_offsets"])
+            return TextArtifact(data["codes"], data["offsets"], vocabulary)
+
+    def _save(self, path, artifact):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        vocab_blob, vocab_offsets = _pack_vocabulary(artifact.vocabulary)
+        np.savez(tmp_path, codes=artifact.codes, offsets=artifact.offsets,
+                 vocab_blob=vocab_blob, vocab_offsets=vocab_offsets)
+        os.replace(tmp_path, path)
+        # Another thread's .tmp.npz is still being written; leave it alone.
+        files = [name for name in glob.glob(os.path.join(self.artifact_dir, "*", "*.npz"))
+                 if not name.endswith(".tmp.npz")]
+        evict_oldest(files, self.max_disk_bytes, keep={path})
+
+    def drop_dataset(self, dataset_id):
+        """Forget every artifact of a dataset, in memory and on disk."""
+        if not _DATASET_ID_RE.match(dataset_id or ""):
+            return
+        with self._lock:
+            for key in [key for key in self._artifacts if key[0] == dataset_id]:
+                _, nbytes = self._artifacts.pop(key)
+                self._total_bytes -= nbytes
+        shutil.rmtree(os.path.join(self.artifact_dir, dataset_id), ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_artifacts": len(self._artifacts),
+                "cached_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
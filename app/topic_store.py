@@ -0,0 +1,306 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+import joblib
+import numpy as np
+
+from topic_sweep import top_words_per_topic
+
+TOPIC_MODEL_METHODS = ("lda", "nmf", "lsa")
+# TruncatedSVD has no partial_fit, so persisted LSA models are transform-only.
+INCREMENTAL_METHODS = ("lda", "nmf")
+VOCABULARY_MODES = ("frozen", "hashing")
+# LDA's topic-word prior puts mass on every hash bucket, which swamps the
+# observed words and collapses the topics, so LDA keeps a frozen vocabulary.
+HASHING_METHODS = ("nmf", "lsa")
+DEFAULT_HASH_FEATURES = 2 ** 16
+
+# Models are pickles, so they live in a per-user directory (mode 0700) rather
+# than the shared temp directory, where another local user could plant one.
+DEFAULT_TOPIC_MODEL_DIR = os.environ.get(
+    "SS_TOPIC_MODEL_DIR",
+    os.path.join(
+        os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+        "semantic_sapience", "topic_models"
+    )
+)
+
+_MODEL_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class TopicModelNotFound(LookupError):
+    pass
+
+
+def _writable_by_others(stat_result):
+    # Not owned by this user, or group/world writable.
+    return (hasattr(os, "getuid") and stat_result.st_uid != os.getuid()) or stat_result.st_mode & 0o022
+
+
+def _private_dir(path):
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat_result = os.stat(path)
+    if hasattr(os, "getuid") and stat_result.st_uid != os.getuid():
+        raise PermissionError(f"Topic model directory {path} is owned by another user.")
+    if stat_result.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def build_vectorizer(method, vocabulary, stop_words=None, n_features=DEFAULT_HASH_FEATURES):
+    from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfVectorizer
+
+    token_pattern = r"(?u)\b\w+\b"
+    if vocabulary == "hashing":
+        # No fitted vocabulary means no idf: l2-normalised term frequencies.
+        return HashingVectorizer(
+            stop_words=stop_words,
+            token_pattern=token_pattern,
+            n_features=n_features,
+            alternate_sign=False,
+            norm="l2"
+        )
+    if method == "lda":
+        return CountVectorizer(stop_words=stop_words, token_pattern=token_pattern)
+    return TfidfVectorizer(stop_words=stop_words, token_pattern=token_pattern)
+
+
+def build_topic_model(method, num_topics, random_state):
+    from sklearn.decomposition import LatentDirichletAllocation, NMF, TruncatedSVD
+
+    # The first fit matches /process/topic_modeling: batch EM for LDA and
+    # plain NMF. Updates apply online variational Bayes (LDA) or continue
+    # in a MiniBatchNMF started from the fitted components.
+    if method == "lda":
+        return LatentDirichletAllocation(n_components=num_topics, random_state=random_state)
+    if method == "nmf":
+        return NMF(n_components=num_topics, random_state=random_state)
+    if method == "lsa":
+        return TruncatedSVD(n_components=num_topics, random_state=random_state)
+    raise ValueError(f"Unsupported method '{method}'.")
+
+
+class PersistedTopicModel:
+    """
+    A vectorizer and topic model fitted once and then updated with new rows
+    (online LDA, or MiniBatchNMF partial_fit after an NMF first fit).
+
+    With the "frozen" vocabulary the vectorizer (and its idf weights) is
+    fitted on the first batch; later rows are mapped onto that vocabulary
+    and unseen words are ignored. With "hashing" (NMF and LSA) new words
+    get features too, and topic words are named after the most frequent
+    token seen in each hash bucket.
+    """
+
+    def __init__(self, method, num_topics, vocabulary="frozen", stop_words=None, random_state=42,
+                 n_features=DEFAULT_HASH_FEATURES):
+        if method not in TOPIC_MODEL_METHODS:
+            raise ValueError(f"Unsupported method '{method}'.")
+        if vocabulary not in VOCABULARY_MODES:
+            raise ValueError(f"Unsupported vocabulary '{vocabulary}'. Use one of: {', '.join(VOCABULARY_MODES)}.")
+        if vocabulary == "hashing" and method not in HASHING_METHODS:
+            raise ValueError(f"The hashing vocabulary is only supported for {', '.join(HASHING_METHODS).upper()}.")
+        self.model_id = uuid.uuid4().hex
+        self.method = method
+        self.num_topics = num_topics
+        self.vocabulary = vocabulary
+        self.vectorizer = build_vectorizer(method, vocabulary, stop_words, n_features)
+        self.model = build_topic_model(method, num_topics, random_state)
+        self.token_counts = Counter()
+        self.documents = 0
+        self.updates = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._feature_names = None
+
+    def _count_tokens(self, texts):
+        # Tokens per hash bucket name; nothing to count with a frozen vocabulary.
+        counts = Counter()
+        if self.vocabulary == "hashing":
+            analyze = self.vectorizer.build_analyzer()
+            for text in texts:
+                counts.update(analyze(text))
+        return counts
+
+    def fit(self, texts):
+        X = self.vectorizer.fit_transform(texts)
+        token_counts = self._count_tokens(texts)
+        self.model.fit(X)
+        self.token_counts = token_counts
+        self.documents = len(texts)
+        self._feature_names = None
+        return self
+
+    def partial_fit(self, texts):
+        if self.method not in INCREMENTAL_METHODS:
+            raise ValueError(f"{self.method.upper()} models cannot be updated incrementally; refit instead.")
+        from sklearn.decomposition import MiniBatchNMF, NMF
+
+        # The update is fitted into a new model and only then committed, so
+        # a failed fit leaves this (cached) model as it was.
+        X = self.vectorizer.transform(texts)
+        token_counts = self._count_tokens(texts)
+        documents = self.documents + len(texts)
+        if isinstance(self.model, NMF):
+            model = MiniBatchNMF(n_components=self.model.n_components, init="custom",
+                                 random_state=self.model.random_state)
+            model.partial_fit(X, W=self.model.transform(X), H=self.model.components_.copy())
+        else:
+            model = copy.deepcopy(self.model)
+            if self.method == "lda":
+                # Online LDA scales each minibatch by the corpus size.
+                model.total_samples = documents
+            model.partial_fit(X)
+        self.model = model
+        self.documents = documents
+        if token_counts:
+            self.token_counts.update(token_counts)
+            self._feature_names = None
+        self.updates += 1
+        self.updated_at = time.time()
+        return self
+
+    def transform(self, texts):
+        return self.model.transform(self.vectorizer.transform(texts))
+
+    def feature_names(self):
+        if self._feature_names is None:
+            if self.vocabulary == "frozen":
+                self._feature_names = self.vectorizer.get_feature_names_out()
+            else:
+                names = np.full(self.vectorizer.n_features, "", dtype=object)
+                if self.token_counts:
+                    tokens = np.array(list(self.token_counts), dtype=object)
+                    counts = np.fromiter(self.token_counts.values(), dtype=np.int64, count=len(tokens))
+                    hashed = self.vectorizer.transform(tokens).tocsr()
+                    has_bucket = np.diff(hashed.indptr) > 0
+                    buckets = hashed.indices[hashed.indptr[:-1][has_bucket]]
+                    tokens, counts = tokens[has_bucket], counts[has_bucket]
+                    # Ascending counts, so the most frequent token is written last.
+                    order = np.argsort(counts, kind="stable")
+                    names[buckets[order]] = tokens[order]
+                self._feature_names = names
+        return self._feature_names
+
+    def topics(self, words_per_topic):
+        return top_words_per_topic(self.model.components_, self.feature_names(), words_per_topic)
+
+    def info(self):
+        return {
+            "modelId": self.model_id,
+            "method": self.method,
+            "numTopics": self.num_topics,
+            "vocabulary": self.vocabulary,
+            "documents": self.documents,
+            "updates": self.updates,
+            "incremental": self.method in INCREMENTAL_METHODS,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at
+        }
+
+
+class TopicModelStore:
+    """
+    Persists PersistedTopicModel objects as `<model_id>.joblib` (plus a
+    small `.json` summary for listing) and keeps the most recently used
+    ones in memory. Updates and transforms of one model are serialised by
+    a per-model lock; files are replaced atomically.
+    """
+
+    def __init__(self, model_dir=DEFAULT_TOPIC_MODEL_DIR, max_cached=8):
+        self.model_dir = _private_dir(model_dir)
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, model_id, suffix):
+        if not _MODEL_ID_RE.match(model_id or ""):
+            raise TopicModelNotFound(f"Topic model '{model_id}' not found.")
+        return os.path.join(self.model_dir, f"{model_id}{suffix}")
+
+    def _model_lock(self, model_id):
+        with self._lock:
+            return self._locks.setdefault(model_id, threading.Lock())
+
+    def _remember(self, topic_model):
+        with self._lock:
+            self._cache[topic_model.model_id] = topic_model
+            self._cache.move_to_end(topic_model.model_id)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def _save(self, topic_model):
+        for suffix, write in ((".joblib", lambda f: joblib.dump(topic_model, f)),
+                              (".json", lambda f: f.write(json.dumps(topic_model.info()).encode("utf-8")))):
+            path = self._path(topic_model.model_id, suffix)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        self._remember(topic_model)
+
+    def _load(self, model_id):
+        path = self._path(model_id, ".joblib")
+        with self._lock:
+            if model_id in self._cache:
+                self._cache.move_to_end(model_id)
+                return self._cache[model_id]
+        if not os.path.exists(path):
+            raise TopicModelNotFound(f"Topic model '{model_id}' not found.")
+        # Unpickling runs code: only load files this user wrote and nobody else can change.
+        if _writable_by_others(os.stat(path)) or _writable_by_others(os.stat(self.model_dir)):
+            raise PermissionError(f"Refusing to load topic model '{model_id}': writable by other users.")
+        topic_model = joblib.load(path)
+        self._remember(topic_model)
+        return topic_model
+
+    def create(self, texts, method, num_topics, **kwargs):
+        topic_model = PersistedTopicModel(method, num_topics, **kwargs).fit(texts)
+        self._save(topic_model)
+        return topic_model
+
+    def get(self, model_id):
+        return self._load(model_id)
+
+    def update(self, model_id, texts):
+        with self._model_lock(model_id):
+            topic_model = self._load(model_id)
+            topic_model.partial_fit(texts)
+            self._save(topic_model)
+            return topic_model
+
+    def transform(self, model_id, texts):
+        with self._model_lock(model_id):
+            topic_model = self._load(model_id)
+            return topic_model, topic_model.transform(texts)
+
+    def delete(self, model_id):
+        with self._model_lock(model_id):
+            found = False
+            for suffix in (".joblib", ".json"):
+                path = self._path(model_id, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+                    found = True
+            with self._lock:
+                found = self._cache.pop(model_id, None) is not None or found
+        if not found:
+            raise TopicModelNotFound(f"Topic model '{model_id}' not found.")
+
+    def list(self):
+        models = []
+        for name in sorted(os.listdir(self.model_dir)):
+            if name.endswith(".json") and _MODEL_ID_RE.match(name[:-5]):
+                try:
+                    with open(os.path.join(self.model_dir, name)) as f:
+                        models.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return models
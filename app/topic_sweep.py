@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+
+DEFAULT_SWEEP_JOBS = int(os.environ.get("SS_SWEEP_JOBS", -1))
+# Upper bound on n_jobs in this process (lowered in serve.py's workers).
+MAX_JOBS = os.cpu_count() or 1
+
+
+def top_words_per_topic(components, vocab, words_per_topic):
+    topics = []
+    for comp in components:
+        top_indices = comp.argsort()[::-1][:words_per_topic]
+        topics.append([vocab[i] for i in top_indices])
+    return topics
+
+
+def lsa_sse(X, svd_model):
+    """
+    Squared reconstruction error ||X - X V V^T||_F^2 of a TruncatedSVD
+    without densifying X. The rows of V^T (components_) are orthonormal, so
+    it equals ||X||_F^2 - ||X V||_F^2.
+    """
+    Z = svd_model.transform(X)
+    return float(X.multiply(X).sum() - np.sum(Z ** 2))
+
+
+def fit_sweep_point(method, X, k, random_state, vocab, words_per_topic):
+    from sklearn.decomposition import LatentDirichletAllocation, NMF, TruncatedSVD
+
+    start = time.perf_counter()
+    if method == "lda":
+        model_k = LatentDirichletAllocation(n_components=k, random_state=random_state)
+        model_k.fit(X)
+        metric = float(model_k.perplexity(X))
+    elif method == "nmf":
+        model_k = NMF(n_components=k, random_state=random_state)
+        model_k.fit(X)
+        metric = float(model_k.reconstruction_err_)
+    elif method == "lsa":
+        model_k = TruncatedSVD(n_components=k, random_state=random_state)
+        model_k.fit(X)
+        metric = lsa_sse(X, model_k)
+    else:
+        raise ValueError(f"Unsupported method '{method}'.")
+    return {
+        "k": k,
+        "topics": top_words_per_topic(model_k.components_, vocab, words_per_topic),
+        "metric": metric,
+        "fit_seconds": time.perf_counter() - start
+    }
+
+
+def run_topic_sweep(method, X, vocab, topics_range, random_state, words_per_topic, n_jobs=DEFAULT_SWEEP_JOBS):
+    """
+    Fit one model per k on an already vectorised matrix X and yield sweep
+    points as they finish (in completion order, not k order). With n_jobs
+    other than 1 the fits run in a joblib process pool; X is shared with
+    the workers instead of being re-vectorised per k.
+    """
+    vocab = list(vocab)
+    if n_jobs == 1 or len(topics_range) == 1:
+        for k in topics_range:
+            yield fit_sweep_point(method, X, k, random_state, vocab, words_per_topic)
+        return
+    n_jobs = min(MAX_JOBS if n_jobs < 0 else n_jobs, MAX_JOBS, len(topics_range))
+    # Largest k first: they take longest, so the pool drains more evenly.
+    ordered = sorted(topics_range, reverse=True)
+    yield from Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(fit_sweep_point)(method, X, k, random_state, vocab, words_per_topic) for k in ordered
+    )
@@ -0,0 +1,158 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Columns at least this large use the approximate (IVF) search in "auto" mode
+APPROXIMATE_MIN_ROWS = 200000
+_SCORE_BLOCK_ROWS = 65536
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over a fixed set of embeddings.
+
+    Rows are L2-normalised once at build time (optionally stored as float16
+    to halve memory), so a query is one matrix-vector product plus an
+    argpartition top-k. For very large corpora an inverted-file (IVF) layer
+    can be built: rows are bucketed by their nearest k-means centroid and a
+    query only scores the `nprobe` closest buckets. `nprobe` is the
+    recall/latency knob — more probes, higher recall, slower queries.
+    The IVF layer is built at most once and published as one
+    (centroids, list order, list offsets) tuple, so concurrent searches
+    see either all of it or none.
+    """
+
+    def __init__(self, embeddings, dtype=np.float32):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = (vectors / (norms + 1e-10)).astype(dtype)
+        self.ivf = None
+        self._ivf_lock = threading.Lock()
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def has_ivf(self):
+        return self.ivf is not None
+
+    @property
+    def nbytes(self):
+        ivf = self.ivf
+        return self.vectors.nbytes + (sum(array.nbytes for array in ivf) if ivf is not None else 0)
+
+    def build_ivf(self, n_lists=None, sample_size=100000, random_state=0):
+        with self._ivf_lock:
+            if self.ivf is None:
+                self.ivf = self._fit_ivf(n_lists, sample_size, random_state)
+        return self
+
+    def _fit_ivf(self, n_lists, sample_size, random_state):
+        from sklearn.cluster import MiniBatchKMeans
+
+        n = len(self)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(random_state)
+        sample = self.vectors
+        if n > sample_size:
+            sample = self.vectors[rng.choice(n, sample_size, replace=False)]
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=random_state, n_init=1, batch_size=4096)
+        kmeans.fit(sample.astype(np.float32))
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-10
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, _SCORE_BLOCK_ROWS):
+            block = self.vectors[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        list_order = np.argsort(assignments, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        return centroids, list_order, list_offsets
+
+    def _scores(self, rows, query):
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if vectors.dtype == np.float32:
+            return vectors @ query
+        scores = np.empty(vectors.shape[0], dtype=np.float32)
+        for start in range(0, vectors.shape[0], _SCORE_BLOCK_ROWS):
+            block = vectors[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    @staticmethod
+    def _top_k(scores, k):
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k < scores.shape[0]:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(scores[top])[::-1]]
+
+    def search(self, query, k, mode="exact", nprobe=8):
+        """Return (row indices, similarities) of the k most similar rows, best first."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) + 1e-10)
+        ivf = self.ivf
+        if mode == "approximate" and ivf is not None:
+            centroids, list_order, list_offsets = ivf
+            nprobe = max(1, min(int(nprobe), centroids.shape[0]))
+            probes = self._top_k(centroids @ query, nprobe)
+            rows = np.concatenate([list_order[list_offsets[p]:list_offsets[p + 1]] for p in probes])
+            if rows.shape[0] >= k:
+                scores = self._scores(rows, query)
+                top = self._top_k(scores, k)
+                return rows[top], scores[top]
+        scores = self._scores(None, query)
+        top = self._top_k(scores, k)
+        return top, scores[top]
+
+
+class VectorIndexCache:
+    """
+    LRU of built indexes keyed by (dataset ID, column, embedding model).
+    Concurrent first requests for a key wait for one build.
+    """
+
+    def __init__(self, max_bytes=1024 ** 3):
+        self.max_bytes = max_bytes
+        self._indexes = OrderedDict()
+        self._build_locks = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def get_or_build(self, key, embeddings_fn, mode="auto", dtype=np.float32):
+        index = self._cached(key)
+        if index is None:
+            with self._lock:
+                build_lock = self._build_locks.setdefault(key, threading.Lock())
+            try:
+                with build_lock:
+                    index = self._cached(key)
+                    if index is None:
+                        index = VectorIndex(embeddings_fn(), dtype=dtype)
+                        self._remember(key, index)
+            finally:
+                with self._lock:
+                    self._build_locks.pop(key, None)
+        if mode in ("auto", "approximate") and not index.has_ivf and (
+                mode == "approximate" or len(index) >= APPROXIMATE_MIN_ROWS):
+            index.build_ivf()
+            # Its size changed; re-check the budget.
+            self._remember(key, index)
+        return index
+
+    def _remember(self, key, index):
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > 1 and sum(i.nbytes for i in self._indexes.values()) > self.max_bytes:
+                self._indexes.popitem(last=False)
+        return index
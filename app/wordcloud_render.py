@@ -0,0 +1,230 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from disk_cache import evict_oldest, touch
+
+DEFAULT_WORDCLOUD_DIR = os.environ.get(
+    "SS_WORDCLOUD_DIR",
+    os.path.join(tempfile.gettempdir(), "semantic_sapience", "wordclouds")
+)
+DEFAULT_WORDCLOUD_CACHE_MB = int(os.environ.get("SS_WORDCLOUD_CACHE_MB", 256))
+# PNGs on disk; the least recently served are removed beyond this
+DEFAULT_WORDCLOUD_DISK_MB = int(os.environ.get("SS_WORDCLOUD_DISK_MB", 1024))
+DEFAULT_WORDCLOUD_WORKERS = int(os.environ.get("SS_WORDCLOUD_WORKERS", 2))
+FULL_SIZE = 1500
+PREVIEW_SIZE = int(os.environ.get("SS_WORDCLOUD_PREVIEW_SIZE", 500))
+PREVIEW_MAX_WORDS = int(os.environ.get("SS_WORDCLOUD_PREVIEW_WORDS", 100))
+# A .pending marker older than this is left over from a process that died mid-render.
+PENDING_MARKER_SECONDS = 600
+
+_IMAGE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def render_key(word_freq, max_words, width, height, background_color, colormap):
+    # Insertion order is part of the key: WordCloud breaks frequency ties by it.
+    payload = json.dumps(
+        [[str(word), float(freq)] for word, freq in word_freq.items()]
+        + [int(max_words), int(width), int(height), background_color, colormap]
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_png(word_freq, max_words, width, height, background_color, colormap):
+    from wordcloud import WordCloud
+
+    wc = WordCloud(
+        width=width,
+        height=height,
+        max_words=max_words,
+        background_color=background_color,
+        colormap=colormap
+    ).generate_from_frequencies(word_freq)
+    img_buffer = io.BytesIO()
+    wc.to_image().save(img_buffer, format="PNG")
+    return img_buffer.getvalue()
+
+
+class WordCloudRenderer:
+    """
+    Rendered word cloud PNGs keyed by a hash of (word frequencies,
+    max_words, size, colours), so an identical cloud (a repeated request or
+    a checkpoint restore) is laid out once. Images are kept in an in-memory
+    LRU bounded by max_bytes and written to image_dir, where /wordcloud_images
+    serves them by ID. submit() renders in a small thread pool and
+    deduplicates renders that are already in flight, and marks them with a
+    .pending file so get() in another worker process waits for the image
+    instead of reporting it unknown. The PNGs are capped at max_disk_bytes,
+    least recently served first.
+    """
+
+    def __init__(self, image_dir=DEFAULT_WORDCLOUD_DIR, max_bytes=DEFAULT_WORDCLOUD_CACHE_MB * 1024 ** 2,
+                 workers=DEFAULT_WORDCLOUD_WORKERS, max_disk_bytes=DEFAULT_WORDCLOUD_DISK_MB * 1024 ** 2):
+        self.image_dir = image_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(image_dir, exist_ok=True)
+        self._images = OrderedDict()
+        self._total_bytes = 0
+        self._pending = {}
+        # Reentrant: a render that finishes before add_done_callback runs
+        # calls _forget on the submitting thread, which holds the lock.
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="wordcloud")
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, image_id):
+        return os.path.join(self.image_dir, f"{image_id}.png")
+
+    def _pending_path(self, image_id):
+        return f"{self._path(image_id)}.pending"
+
+    def _remember(self, image_id, png):
+        with self._lock:
+            if image_id in self._images:
+                return
+            self._images[image_id] = png
+            self._total_bytes += len(png)
+            while len(self._images) > 1 and self._total_bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def _cached(self, image_id):
+        with self._lock:
+            if image_id in self._images:
+                self._images.move_to_end(image_id)
+                touch(self._path(image_id))
+                return self._images[image_id]
+        path = self._path(image_id)
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+        except FileNotFoundError:
+            return None
+        touch(path)
+        self._remember(image_id, png)
+        return png
+
+    def _render(self, image_id, args):
+        png = render_png(*args)
+        tmp_path = f"{self._path(image_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, self._path(image_id))
+        self._remember(image_id, png)
+        evict_oldest(glob.glob(os.path.join(self.image_dir, "*.png")), self.max_disk_bytes,
+                     keep={self._path(image_id)})
+        return png
+
+    def _render_pending(self, image_id, args):
+        try:
+            return self._render(image_id, args)
+        finally:
+            try:
+                os.remove(self._pending_path(image_id))
+            except FileNotFoundError:
+                pass
+
+    def submit(self, word_freq, max_words=500, width=FULL_SIZE, height=FULL_SIZE, background_color="white",
+               colormap=None):
+        """
+        Start rendering in the pool (unless cached or already running) and
+        return (image_id, future resolving to the PNG bytes).
+        """
+        args = (dict(word_freq), max_words, width, height, background_color, colormap)
+        image_id = render_key(*args)
+        png = self._cached(image_id)
+        with self._lock:
+            if png is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(png)
+            elif image_id in self._pending:
+                self.hits += 1
+                future = self._pending[image_id]
+            else:
+                self.misses += 1
+                open(self._pending_path(image_id), "wb").close()
+                future = self._executor.submit(self._render_pending, image_id, args)
+                self._pending[image_id] = future
+                future.add_done_callback(lambda _: self._forget(image_id))
+        return image_id, future
+
+    def _forget(self, image_id):
+        with self._lock:
+            self._pending.pop(image_id, None)
+
+    def render(self, word_freq, max_words=500, width=FULL_SIZE, height=FULL_SIZE, background_color="white",
+               colormap=None):
+        """
+        Render (or fetch) on the calling thread; returns (image_id, PNG
+        bytes). Waits for the pool if the same image is already in flight.
+        """
+        args = (dict(word_freq), max_words, width, height, background_color, colormap)
+        image_id = render_key(*args)
+        png = self._cached(image_id)
+        with self._lock:
+            future = None if png is not None else self._pending.get(image_id)
+            if png is not None or future is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if png is not None:
+            return image_id, png
+        if future is not None:
+            return image_id, future.result()
+        return image_id, self._render(image_id, args)
+
+    def get(self, image_id, timeout=None):
+        """
+        PNG bytes for image_id, waiting up to `timeout` seconds (None waits
+        until done) for a render in flight. Raises KeyError for unknown IDs
+        and TimeoutError while a render is still running.
+        """
+        if not _IMAGE_ID_RE.match(image_id or ""):
+            raise KeyError(image_id)
+        with self._lock:
+            future = self._pending.get(image_id)
+        if future is not None:
+            return future.result(timeout=timeout)
+        png = self._cached(image_id)
+        if png is None:
+            png = self._wait_for_marked(image_id, timeout)
+        return png
+
+    def _wait_for_marked(self, image_id, timeout):
+        # Rendering in another process: poll until its PNG lands on disk.
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                marked_at = os.path.getmtime(self._pending_path(image_id))
+            except FileNotFoundError:
+                marked_at = None
+            png = self._cached(image_id)
+            if png is not None:
+                return png
+            if marked_at is None or time.time() - marked_at > PENDING_MARKER_SECONDS:
+                raise KeyError(image_id)
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(image_id)
+            time.sleep(0.05)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_images": len(self._images),
+                "cached_bytes": self._total_bytes,
+                "pending": len(self._pending),
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
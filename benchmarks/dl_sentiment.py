@@ -0,0 +1,98 @@
+"""
+Rows/s of the batched transformer sentiment engine against the plain HF
+pipeline call the app used before (whole list, no batch_size).
+
+    python benchmarks/dl_sentiment.py --rows 1000 --backends torch,int8,onnx
+
+Reads the bundled test/amazon_review_29012025.csv by default.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from transformers import AutoTokenizer, pipeline  # noqa: E402
+from dl_sentiment import SentimentEngine, DEFAULT_TOKEN_BUDGET, DEFAULT_MAX_BATCH_SIZE  # noqa: E402
+
+
+def load_texts(path, column, rows):
+    series = pd.read_csv(path)[column].dropna().astype(str)
+    series = series[series.str.strip() != ""]
+    return series.tolist()[:rows] if rows else series.tolist()
+
+
+def run_pipeline(model, tokenizer, texts):
+    pipe = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, truncation=True, max_length=512)
+    pipe(texts[:2])  # warm-up
+    start = time.perf_counter()
+    results = pipe(texts)
+    elapsed = time.perf_counter() - start
+    labels = np.array([r["label"] for r in results], dtype=object)
+    scores = np.array([r["score"] for r in results])
+    return labels, scores, elapsed
+
+
+def run_engine(model, tokenizer, texts, backend, token_budget, max_batch_size):
+    engine = SentimentEngine(model, tokenizer, backend=backend)
+    engine.predict(texts[:2])  # warm-up (and ONNX export on first use)
+    labels, scores, report = engine.predict(texts, token_budget=token_budget, max_batch_size=max_batch_size)
+    return labels, scores, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DL sentiment inference")
+    parser.add_argument("--model", default="distilbert-base-uncased-finetuned-sst-2-english")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "test", "amazon_review_29012025.csv"))
+    parser.add_argument("--column", default="reviewText")
+    parser.add_argument("--rows", type=int, default=1000, help="0 for all rows")
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    texts = load_texts(args.csv, args.column, args.rows)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    print(f"{len(texts)} rows from {os.path.basename(args.csv)}, model {args.model}")
+
+    ref_labels, ref_scores, ref_elapsed = run_pipeline(args.model, tokenizer, texts)
+    baseline = len(texts) / ref_elapsed
+    results = [{"backend": "pipeline", "rows_per_second": round(baseline, 2), "speedup": 1.0}]
+    print(f"{'pipeline':>10}: {baseline:8.1f} rows/s")
+
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            labels, scores, report = run_engine(
+                args.model, tokenizer, texts, backend, args.token_budget, args.max_batch_size
+            )
+        except ValueError as e:
+            print(f"{backend:>10}: skipped ({e})")
+            continue
+        row = {
+            "backend": backend,
+            "rows_per_second": report["rows_per_second"],
+            "speedup": round(report["rows_per_second"] / baseline, 2),
+            "label_agreement": round(float(np.mean(labels == ref_labels)), 4),
+            "max_score_diff": float(np.abs(scores - ref_scores).max()),
+            "batches": report["batches"],
+            "padded_tokens": report["padded_tokens"],
+            "tokens": report["tokens"]
+        }
+        results.append(row)
+        print(f"{backend:>10}: {row['rows_per_second']:8.1f} rows/s  x{row['speedup']:<5} "
+              f"labels agree {row['label_agreement']:.2%}  max score diff {row['max_score_diff']:.2e}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "rows": len(texts), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
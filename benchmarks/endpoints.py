@@ -0,0 +1,370 @@
+"""
+Wall time, peak memory and rows/s of every analysis route on synthetic
+review corpora (benchmarks/synthetic_corpus.py), written to a JSON baseline
+so that two commits can be compared.
+
+    python benchmarks/endpoints.py --sizes 10k,100k --json baseline.json
+    python benchmarks/endpoints.py --sizes 10k --cases wordcloud_freq,topics_lda --compare baseline.json
+
+Every (case, size) runs in a fresh process that imports the app, sends the
+request through the Flask test client and records the wall time, the
+X-Timing stage breakdown, the process's peak RSS and the peak RSS of the
+process tree (sentiment and sweep worker pools included). Each case starts
+with empty caches: only the uploaded dataset is shared between the cases of
+one size. Use --repeat to also time warm requests. ABSA and zero-shot run
+against the stub Ollama server in app/ollama_stub.py. Embedding routes need
+the sentence-transformer model; --offline-embeddings swaps in a hashing
+embedder so that semantic word clouds and BERTopic can be timed without it
+(their "embed" stage is then meaningless). A route that fails, for example
+because a model cannot be downloaded, is recorded with its error and the run
+goes on.
+
+With --compare, cases whose wall time or peak RSS grew by more than
+--threshold over the baseline are listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+import numpy as np
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from synthetic_corpus import DEFAULT_DATA_DIR, TEXT_COLUMN, corpus_path, parse_rows  # noqa: E402
+
+COHERENCE = {"coherence_analysis": True, "min_topics": 2, "max_topics": 10, "step": 2}
+LLM_ROUTES = {"/process/absa", "/process/zero_shot_sentiment"}
+
+# BERTopic has no coherence sweep in /process/topic_modeling (the route
+# ignores coherence_analysis for it), so it has a single case.
+CASES = {
+    "wordcloud_freq": ("/process/wordcloud", {"method": "freq", "stopwords": True}),
+    "wordcloud_tfidf": ("/process/wordcloud", {"method": "tfidf", "stopwords": True}),
+    "wordcloud_collocation": ("/process/wordcloud", {"method": "collocation", "stopwords": True}),
+    "wordcloud_semantic": ("/process/semantic_wordcloud", {"query": "battery life", "stopwords": True}),
+    "topics_lda": ("/process/topic_modeling", {"method": "lda", "numTopics": 5, "stopwords": True}),
+    "topics_lda_coherence": ("/process/topic_modeling", {"method": "lda", "numTopics": 5, "stopwords": True, **COHERENCE}),
+    "topics_nmf": ("/process/topic_modeling", {"method": "nmf", "numTopics": 5, "stopwords": True}),
+    "topics_nmf_coherence": ("/process/topic_modeling", {"method": "nmf", "numTopics": 5, "stopwords": True, **COHERENCE}),
+    "topics_lsa": ("/process/topic_modeling", {"method": "lsa", "numTopics": 5, "stopwords": True}),
+    "topics_lsa_coherence": ("/process/topic_modeling", {"method": "lsa", "numTopics": 5, "stopwords": True, **COHERENCE}),
+    "topics_bertopic": ("/process/topic_modeling", {"method": "bertopic", "numTopics": 5, "stopwords": True}),
+    "sentiment_vader": ("/process/sentiment", {"method": "rulebasedsa", "ruleBasedModel": "vader"}),
+    "sentiment_textblob": ("/process/sentiment", {"method": "rulebasedsa", "ruleBasedModel": "textblob"}),
+    "sentiment_dl": ("/process/sentiment", {"method": "dlbasedsa"}),
+    "absa": ("/process/absa", {"aspect": "battery", "model": "llama3"}),
+    "zero_shot": ("/process/zero_shot_sentiment", {"model": "llama3"})
+}
+PACKAGES = ("numpy", "pandas", "scikit-learn", "wordcloud", "nltk", "textblob", "vaderSentiment", "bertopic",
+            "sentence-transformers", "transformers", "torch", "umap-learn", "faiss-cpu")
+
+
+class HashingEmbedder:
+    """Stand-in sentence embedder for --offline-embeddings: hashed, L2-normalised word counts."""
+
+    def __init__(self, dimensions=384):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self._vectorizer = HashingVectorizer(n_features=dimensions, alternate_sign=False)
+
+    def encode(self, texts, show_progress_bar=False, **kwargs):
+        return self._vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+class PeakRSS:
+    """Samples the RSS of this process plus its children on a background thread."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak = max(self.peak, total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def parse_timing(header):
+    # "tokenize;dur=12.3, render;dur=80.1, total;dur=95.0" -> {"tokenize": 0.0123, ...}
+    stages = {}
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            stages[name] = round(float(duration) / 1000, 4)
+    return stages
+
+
+def last_line(path):
+    with open(path, errors="replace") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines[-1] if lines else ""
+
+
+def megabytes(nbytes):
+    return round(nbytes / 1024 ** 2, 1)
+
+
+def run_case(case, corpus, dataset_id, repeat, offline_embeddings, llm_latency):
+    """Child process side: one case against a fresh app, returns the raw measurements."""
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    path, params = ("/upload", {}) if case == "upload" else CASES[case]
+    if path in LLM_ROUTES:
+        from ollama_stub import start_stub_server
+
+        _, os.environ["OLLAMA_HOST"] = start_stub_server(latency=llm_latency)
+    import app as app_module
+
+    if offline_embeddings:
+        app_module.model_registry.register_loader("sentence-transformer", lambda name: HashingEmbedder())
+    client = app_module.app.test_client()
+    start_rss = psutil.Process().memory_info().rss
+    runs = []
+    with PeakRSS() as peak:
+        for _ in range(repeat if case != "upload" else 1):
+            start = time.perf_counter()
+            if case == "upload":
+                with open(corpus, "rb") as f:
+                    response = client.post("/upload", data={"file": (f, os.path.basename(corpus))},
+                                           headers={"X-Timing": "1"})
+            else:
+                response = client.post(path, json=dict(params, datasetId=dataset_id, column=TEXT_COLUMN),
+                                       headers={"X-Timing": "1"})
+            seconds = time.perf_counter() - start
+            body = response.get_json(silent=True) or {}
+            runs.append({
+                "seconds": seconds,
+                "status_code": response.status_code,
+                "stages": parse_timing(response.headers.get("X-Timing")),
+                "error": body.get("error") if response.status_code != 200 else None,
+                "dataset_id": body.get("datasetId")
+            })
+            if response.status_code != 200:
+                break
+    return {
+        "runs": runs,
+        "start_rss": start_rss,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "peak_tree_rss": peak.peak
+    }
+
+
+def spawn_case(case, rows, corpus, dataset_id, dataset_dir, work_dir, args):
+    """Run one case in a child process with its own cache directories and summarise it."""
+    case_dir = os.path.join(work_dir, f"{case}-{rows}")
+    os.makedirs(case_dir, exist_ok=True)
+    result_path = os.path.join(case_dir, "result.json")
+    log_path = os.path.join(case_dir, "output.log")
+    # Every cache defaults to a directory under the temp dir; pointing TMPDIR
+    # at the case directory (and dropping explicit overrides) starts it cold.
+    env = {key: value for key, value in os.environ.items()
+           if not (key.startswith("SS_") and key.endswith(("_DIR", "_PATH")))}
+    env.update(TMPDIR=case_dir, SS_DATASET_DIR=dataset_dir)
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run-case", case, "--corpus", corpus,
+        "--dataset-id", dataset_id or "", "--repeat", str(args.repeat), "--llm-latency", str(args.llm_latency),
+        "--result", result_path
+    ] + (["--offline-embeddings"] if args.offline_embeddings else [])
+    path, params = ("/upload", {}) if case == "upload" else CASES[case]
+    summary = {"case": case, "rows": rows, "route": path, "params": params}
+    with open(log_path, "w") as log:
+        # A session of its own, so a timeout also kills the worker pools it started.
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        try:
+            process.wait(args.timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+            return dict(summary, status="timeout", error=f"No result after {args.timeout:g}s")
+    if process.returncode != 0 or not os.path.exists(result_path):
+        return dict(summary, status="crashed", error=f"Exited with {process.returncode}: {last_line(log_path)}")
+    with open(result_path) as f:
+        raw = json.load(f)
+
+    first = raw["runs"][0]
+    summary.update(
+        status="ok" if first["status_code"] == 200 else "error",
+        status_code=first["status_code"],
+        wall_seconds=round(first["seconds"], 3),
+        rows_per_second=round(rows / first["seconds"], 1),
+        stages=first["stages"],
+        start_rss_mb=megabytes(raw["start_rss"]),
+        peak_rss_mb=megabytes(raw["peak_rss"]),
+        peak_tree_rss_mb=megabytes(max(raw["peak_tree_rss"], raw["peak_rss"]))
+    )
+    warm = [run["seconds"] for run in raw["runs"][1:] if run["status_code"] == 200]
+    if warm:
+        summary["warm_seconds"] = round(float(np.median(warm)), 3)
+    if first["error"]:
+        summary["error"] = first["error"]
+    if first["dataset_id"]:
+        summary["dataset_id"] = first["dataset_id"]
+    return summary
+
+
+def environment(args):
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return None
+
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "memory_mb": megabytes(psutil.virtual_memory().total),
+        "packages": {package: version(package) for package in PACKAGES},
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "offline_embeddings": args.offline_embeddings,
+        "llm_latency": args.llm_latency
+    }
+
+
+def compare(baseline, report, threshold):
+    """Print new vs. baseline per (case, rows); returns the regressed entries."""
+    old = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nAgainst {baseline['meta'].get('commit', '?')[:12]} (threshold x{threshold:g}):")
+    for result in report["results"]:
+        before = old.get((result["case"], result["rows"]))
+        if before is None or before.get("status") != "ok" or result.get("status") != "ok":
+            continue
+        time_ratio = result["wall_seconds"] / max(before["wall_seconds"], 1e-9)
+        rss_ratio = result["peak_tree_rss_mb"] / max(before["peak_tree_rss_mb"], 1e-9)
+        flag = "REGRESSION" if time_ratio > threshold or rss_ratio > threshold else ""
+        if flag:
+            regressions.append(result)
+        print(f"  {result['case']:<24} {result['rows']:>8}  {before['wall_seconds']:8.2f}s -> "
+              f"{result['wall_seconds']:8.2f}s (x{time_ratio:.2f})  {before['peak_tree_rss_mb']:7.0f} -> "
+              f"{result['peak_tree_rss_mb']:7.0f} MB (x{rss_ratio:.2f})  {flag}")
+    return regressions
+
+
+def print_result(result):
+    if result["status"] != "ok":
+        print(f"  {result['case']:<24} {result['rows']:>8}  {result['status']}: {str(result.get('error')).splitlines()[0]}")
+        return
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["stages"].items() if stage != "total")
+    print(f"  {result['case']:<24} {result['rows']:>8}  {result['wall_seconds']:8.2f}s "
+          f"{result['rows_per_second']:10.0f} rows/s  peak {result['peak_tree_rss_mb']:7.0f} MB  [{stages}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every analysis route on synthetic corpora")
+    parser.add_argument("--sizes", default="10k,100k,1M", help="corpus sizes in rows")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"any of: {', '.join(CASES)}")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic corpus seed")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated corpora are kept")
+    parser.add_argument("--repeat", type=int, default=1, help="requests per case; the first one is cold")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="seconds before a case is killed")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub Ollama seconds per request")
+    parser.add_argument("--offline-embeddings", action="store_true",
+                        help="use a hashing embedder instead of the sentence-transformer model")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare the results with")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown/growth ratio counted as a regression")
+    parser.add_argument("--keep", action="store_true", help="keep the per-case cache directories and logs")
+    # Internal: run a single case in this process (used by the parent run).
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--dataset-id", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        raw = run_case(args.run_case, args.corpus, args.dataset_id, args.repeat, args.offline_embeddings,
+                       args.llm_latency)
+        with open(args.result, "w") as f:
+            json.dump(raw, f)
+        # Skip interpreter teardown (pools, model threads); it is not part of the measurement.
+        os._exit(0)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"Unknown case(s) {', '.join(unknown)}. Use: {', '.join(CASES)}")
+    report = {"meta": environment(args), "corpora": {}, "results": []}
+    work_dir = tempfile.mkdtemp(prefix="ss-bench-")
+    try:
+        for rows in [parse_rows(size) for size in args.sizes.split(",") if size.strip()]:
+            corpus = corpus_path(rows, args.seed, args.data_dir)
+            dataset_dir = os.path.join(work_dir, f"datasets-{rows}")
+            upload = spawn_case("upload", rows, corpus, None, dataset_dir, work_dir, args)
+            print_result(upload)
+            report["corpora"][str(rows)] = {
+                "path": os.path.relpath(corpus, ROOT),
+                "bytes": os.path.getsize(corpus),
+                **{key: upload.get(key) for key in ("dataset_id", "status", "wall_seconds", "peak_tree_rss_mb")}
+            }
+            report["results"].append(upload)
+            if upload["status"] != "ok":
+                continue
+            for case in cases:
+                result = spawn_case(case, rows, corpus, upload["dataset_id"], dataset_dir, work_dir, args)
+                print_result(result)
+                report["results"].append(result)
+    finally:
+        if args.keep:
+            print(f"Case directories kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Requests/s and latency of the production server (app/serve.py) under mixed
+word cloud + sentiment traffic, for one or more analysis worker counts.
+
+    python benchmarks/load_test.py --workers 0,1,2 --concurrency 4 --duration 30
+
+Starts serve.py on a free port for each worker count (or drives a running
+server with --url), uploads the bundled test/amazon_review_29012025.csv and
+keeps `concurrency` clients posting requests picked by --mix. Word cloud
+requests vary maxWords, so most of them lay out a new image while the word
+counts come from the cached text artifacts. After each run the server is
+sent SIGTERM and the time it takes to drain is reported.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REQUESTS = {
+    "wordcloud": (
+        "/process/wordcloud",
+        lambda i: {"method": "freq", "stopwords": True, "maxWords": 100 + (i * 7) % 400, "inlineImage": False}
+    ),
+    "sentiment": (
+        "/process/sentiment",
+        lambda i: {"method": "rulebasedsa", "ruleBasedModel": "vader", "n_jobs": 1, "inlineResults": False}
+    )
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request_json(url, payload=None, data=None, headers=None, timeout=600):
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+    req = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+
+
+def upload(base_url, path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        content = f.read()
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+        f"filename=\"{os.path.basename(path)}\"\r\nContent-Type: text/csv\r\n\r\n"
+    ).encode("utf-8") + content + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    status, payload = request_json(
+        f"{base_url}/upload", data=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    if status != 200:
+        raise RuntimeError(f"Upload failed ({status}): {payload}")
+    return payload["datasetId"]
+
+
+def start_server(workers, port, startup_timeout=300):
+    env = dict(os.environ, SS_WORKERS=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+        cwd=os.path.join(ROOT, "app"),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with {process.returncode}")
+        try:
+            request_json(f"{base_url}/startup_stats", timeout=5)
+            return process, base_url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("serve.py did not start in time")
+
+
+def stop_server(process, timeout=120):
+    start = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return time.perf_counter() - start
+
+
+def parse_mix(spec):
+    # "wordcloud=1,sentiment=1" -> ["wordcloud", "sentiment"]
+    routes = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in REQUESTS:
+            raise ValueError(f"Unknown request type '{name.strip()}'. Use: {', '.join(REQUESTS)}")
+        routes += [name.strip()] * int(weight or 1)
+    return routes
+
+
+def drive(base_url, dataset_id, column, mix, concurrency, duration, seed=0):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counter = [0]
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            with lock:
+                i = counter[0]
+                counter[0] += 1
+                kind = rng.choice(mix)
+            path, params = REQUESTS[kind]
+            payload = dict(params(i), datasetId=dataset_id, column=column)
+            start = time.perf_counter()
+            status, _ = request_json(base_url + path, payload)
+            with lock:
+                samples.append((kind, status, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    ok = [sample for sample in samples if sample[1] == 200]
+    summary = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(ok) / elapsed, 3),
+        "routes": {}
+    }
+    for kind in sorted({sample[0] for sample in samples}):
+        latencies = np.array([sample[2] for sample in ok if sample[0] == kind])
+        summary["routes"][kind] = {
+            "requests": int(sum(1 for sample in samples if sample[0] == kind)),
+            "p50_seconds": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+            "p95_seconds": round(float(np.percentile(latencies, 95)), 3) if len(latencies) else None
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test serve.py with mixed word cloud + sentiment traffic")
+    parser.add_argument("--workers", default="0,1,2", help="analysis worker counts to start serve.py with")
+    parser.add_argument("--url", help="drive this running server instead of starting serve.py")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "test", "amazon_review_29012025.csv"))
+    parser.add_argument("--column", default="reviewText")
+    parser.add_argument("--mix", default="wordcloud=1,sentiment=1")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic per run")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    runs = []
+    targets = [(None, args.url)] if args.url else [(int(w), None) for w in args.workers.split(",") if w.strip()]
+    for workers, url in targets:
+        process = None
+        if url is None:
+            process, url = start_server(workers, free_port())
+        try:
+            dataset_id = upload(url, args.csv)
+            # One request of each kind first, so tokenisation and imports are not timed.
+            for kind in set(mix):
+                path, params = REQUESTS[kind]
+                request_json(url + path, dict(params(0), datasetId=dataset_id, column=args.column))
+            samples, elapsed = drive(url, dataset_id, args.column, mix, args.concurrency, args.duration)
+        finally:
+            drain = stop_server(process) if process is not None else None
+        run = {"workers": workers, "concurrency": args.concurrency, **summarize(samples, elapsed)}
+        if drain is not None:
+            run["drain_seconds"] = round(drain, 2)
+        runs.append(run)
+        routes = "  ".join(
+            f"{kind} p50 {stats['p50_seconds']}s p95 {stats['p95_seconds']}s" for kind, stats in run["routes"].items()
+        )
+        print(f"workers={workers if workers is not None else '-':>2}: {run['requests_per_second']:6.2f} req/s  "
+              f"{run['requests']} requests, {run['errors']} errors  {routes}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mix": args.mix, "duration": args.duration, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Synthetic review corpora of any size drawn from the distribution of the
+bundled test/amazon_review_29012025.csv, for benchmarking at 10k-1M rows.
+
+    python benchmarks/synthetic_corpus.py --rows 100000 --out reviews_100k.csv
+
+Each synthetic row copies the metadata (rating, product, dates, votes) of a
+randomly drawn source row, so the column distributions match the source. Its
+reviewText has that source review's word count but is generated by a word
+bigram chain fitted on reviews with the same rating. The vocabulary, word
+frequencies, document lengths and rating/wording correlation therefore
+follow the source, while the texts do not repeat it verbatim (repeats would
+let the per-text caches and deduplication flatter the results). The same
+--rows and --seed always produce the same file.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_CSV = os.path.join(ROOT, "test", "amazon_review_29012025.csv")
+DEFAULT_DATA_DIR = os.path.join(ROOT, "benchmarks", "data")
+TEXT_COLUMN = "reviewText"
+CHUNK_ROWS = 50000
+
+
+class BigramChain:
+    """
+    Word bigram model of a set of documents. Successors of every word are
+    stored as one sorted array of cumulative probabilities offset by the
+    word's ID, so the next word for many documents at once is a single
+    searchsorted.
+    """
+
+    def __init__(self, docs):
+        vocab = {}
+        starts, pairs = [], []
+        for doc in docs:
+            ids = [vocab.setdefault(word, len(vocab)) for word in doc]
+            starts.append(ids[0])
+            pairs += zip(ids[:-1], ids[1:])
+        self.vocabulary = np.array(list(vocab), dtype=object)
+        start_ids, start_counts = np.unique(np.array(starts, dtype=np.int64), return_counts=True)
+        self._start_ids = start_ids
+        self._start_cdf = np.cumsum(start_counts) / start_counts.sum()
+
+        unique_pairs, counts = np.unique(np.array(pairs, dtype=np.int64).reshape(-1, 2), axis=0, return_counts=True)
+        prev, nxt = unique_pairs[:, 0], unique_pairs[:, 1]
+        totals = np.bincount(prev, weights=counts, minlength=len(vocab))
+        # Running count within each word's successors, ending at its total.
+        first = np.flatnonzero(np.diff(prev, prepend=-1))
+        running = np.cumsum(counts)
+        running -= np.repeat(running[first] - counts[first], np.diff(np.append(first, len(prev))))
+        self._cdf = prev + running / totals[prev]
+        self._next = nxt
+        self._has_next = totals > 0
+
+    def sample_starts(self, rng, n):
+        return self._start_ids[np.searchsorted(self._start_cdf, rng.random(n), side="right")]
+
+    def sample_next(self, rng, current):
+        nxt = self._next[np.minimum(np.searchsorted(self._cdf, current + rng.random(len(current)), side="right"),
+                                    len(self._next) - 1)]
+        # Words only ever seen last in a review start a new sentence.
+        dead = ~self._has_next[current]
+        if dead.any():
+            nxt[dead] = self.sample_starts(rng, int(dead.sum()))
+        return nxt
+
+    def generate(self, rng, lengths):
+        """One text per entry of `lengths`, with that many words."""
+        lengths = np.asarray(lengths, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        words = np.empty(offsets[-1], dtype=np.int64)
+        active = np.flatnonzero(lengths > 0)
+        current = self.sample_starts(rng, len(active))
+        step = 0
+        while len(active):
+            words[offsets[active] + step] = current
+            step += 1
+            alive = lengths[active] > step
+            active, current = active[alive], current[alive]
+            if len(active):
+                current = self.sample_next(rng, current)
+        tokens = self.vocabulary[words].tolist()
+        return [" ".join(tokens[offsets[i]:offsets[i + 1]]) for i in range(len(lengths))]
+
+
+def load_source(path=SOURCE_CSV):
+    frame = pd.read_csv(path)
+    texts = frame[TEXT_COLUMN]
+    chains = {}
+    for rating, group in texts.groupby(frame["overall"].fillna(0)):
+        docs = [text.split() for text in group.dropna().astype(str) if text.split()]
+        chains[rating] = BigramChain(docs)
+    return frame, chains
+
+
+def generate_frame(frame, chains, rows, rng, first_row=0):
+    picked = frame.iloc[rng.integers(0, len(frame), rows)].reset_index(drop=True)
+    source_texts = picked[TEXT_COLUMN]
+    lengths = source_texts.fillna("").astype(str).str.split().str.len().to_numpy()
+    ratings = picked["overall"].fillna(0).to_numpy()
+    texts = np.empty(rows, dtype=object)
+    for rating, chain in chains.items():
+        idx = np.flatnonzero(ratings == rating)
+        texts[idx] = chain.generate(rng, lengths[idx])
+    picked[TEXT_COLUMN] = np.where(source_texts.isna().to_numpy(), None, texts)
+    picked["reviewerID"] = [f"SYN{i:09d}" for i in range(first_row, first_row + rows)]
+    return picked
+
+
+def write_corpus(path, rows, seed=0, source=SOURCE_CSV):
+    """Write a `rows`-row synthetic corpus to path (CSV), in chunks."""
+    frame, chains = load_source(source)
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    for first_row in range(0, rows, CHUNK_ROWS):
+        chunk = generate_frame(frame, chains, min(CHUNK_ROWS, rows - first_row), rng, first_row)
+        chunk.to_csv(tmp_path, mode="a" if first_row else "w", header=not first_row, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def corpus_path(rows, seed=0, data_dir=DEFAULT_DATA_DIR):
+    """Path of the cached corpus for (rows, seed), generated on first use."""
+    path = os.path.join(data_dir, f"reviews_{rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {rows} synthetic reviews into {path}")
+        write_corpus(path, rows, seed)
+    return path
+
+
+def parse_rows(value):
+    # "10k" -> 10000, "1M" -> 1000000
+    value = value.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic review corpus")
+    parser.add_argument("--rows", type=parse_rows, default=10000, help="e.g. 10k, 100k, 1M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=SOURCE_CSV)
+    parser.add_argument("--out", help="defaults to benchmarks/data/reviews_<rows>_seed<seed>.csv")
+    args = parser.parse_args()
+    path = args.out or os.path.join(DEFAULT_DATA_DIR, f"reviews_{args.rows}_seed{args.seed}.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_corpus(path, args.rows, args.seed, args.source)
+    print(f"Wrote {args.rows} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
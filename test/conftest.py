@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's caches out of the shared temp directory while testing.
+_cache_dir = tempfile.mkdtemp(prefix="ss-test-")
+for name in ("SS_DATASET_DIR", "SS_ARTIFACT_DIR", "SS_EMBEDDING_DIR", "SS_RESULT_DIR", "SS_WORDCLOUD_DIR",
+             "SS_BERTOPIC_DIR", "SS_TOPIC_MODEL_DIR", "SS_ONNX_DIR"):
+    os.environ.setdefault(name, os.path.join(_cache_dir, name[3:].lower()))
+os.environ.setdefault("SS_LLM_CACHE_PATH", os.path.join(_cache_dir, "llm_labels.sqlite3"))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from coherence import COHERENCE_MEASURES, CoherenceIndex
+
+gensim = pytest.importorskip("gensim")
+
+
+def make_corpus(num_docs=60, vocab_size=40, seed=0):
+    # Lengths from 1 to 250 tokens, so documents both shorter and longer
+    # than the 110-token c_v window are covered; skewed word frequencies
+    # give the topic words varied co-occurrence counts.
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"w{i}" for i in range(vocab_size)]
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    lengths = rng.integers(1, 250, num_docs)
+    return [list(rng.choice(vocabulary, size=length, p=weights / weights.sum())) for length in lengths]
+
+
+TOPICS = [
+    ["w0", "w1", "w2", "w3", "w4"],
+    ["w5", "w0", "w7", "w11", "w13"],
+    ["w20", "w3", "w30", "w1", "w39"],
+]
+
+
+@pytest.mark.parametrize("measure", COHERENCE_MEASURES)
+def test_coherence_matches_gensim(measure):
+    from gensim.corpora import Dictionary
+    from gensim.models.coherencemodel import CoherenceModel
+
+    texts = make_corpus()
+    vocabulary, codes = np.unique(np.concatenate(texts), return_inverse=True)
+    index = CoherenceIndex.from_codes(codes, [len(text) for text in texts], vocabulary)
+
+    dictionary = Dictionary(texts)
+    expected = CoherenceModel(
+        topics=TOPICS, texts=texts, corpus=[dictionary.doc2bow(text) for text in texts],
+        dictionary=dictionary, coherence=measure, processes=1
+    )
+    assert index.coherence_per_topic(TOPICS, measure) == pytest.approx(
+        expected.get_coherence_per_topic(), abs=1e-12
+    )
+    assert index.coherence(TOPICS, measure) == pytest.approx(expected.get_coherence(), abs=1e-12)
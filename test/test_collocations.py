@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from collocations import association_scores, top_collocations
+from nltk_resources import english_stopwords, nltk_word_tokenize
+from text_artifacts import TextArtifact, column_texts, get_tokenizer
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "amazon_review_29012025.csv")
+
+
+@pytest.fixture(scope="module")
+def reviews():
+    texts = column_texts(pd.read_csv(CSV_PATH)["reviewText"])
+    return texts, TextArtifact.from_texts(texts, get_tokenizer("nltk"))
+
+
+@pytest.fixture(scope="module")
+def baseline_counts(reviews):
+    # Counts from the per-text loop that /process/wordcloud ran before the
+    # column-wide count (without its max_words cut), per window size.
+    from nltk.collocations import BigramCollocationFinder
+
+    texts, _ = reviews
+    word_tokenize = nltk_word_tokenize()
+    stops = set(english_stopwords())
+    tokenized = [[t for t in (t.lower() for t in word_tokenize(text) if t.isalpha()) if t not in stops]
+                 for text in texts]
+    counts = {}
+
+    def get(window_size):
+        if window_size not in counts:
+            word_freq = {}
+            for tokens in tokenized:
+                finder = BigramCollocationFinder.from_words(tokens, window_size=window_size)
+                for bigram, freq in finder.ngram_fd.items():
+                    bigram_str = "_".join(bigram)
+                    word_freq[bigram_str] = word_freq.get(bigram_str, 0) + freq
+            counts[window_size] = word_freq
+        return counts[window_size]
+
+    return get
+
+
+@pytest.mark.parametrize("window_size", [2, 3])
+@pytest.mark.parametrize("max_words", [500, 10 ** 7])
+def test_freq_matches_per_text_finder(reviews, baseline_counts, window_size, max_words):
+    _, artifact = reviews
+    expected = baseline_counts(window_size)
+    if len(expected) > max_words:
+        expected = dict(sorted(expected.items(), key=lambda x: x[1], reverse=True)[:max_words])
+    stops = set(english_stopwords())
+    keep = artifact.vocabulary_mask(stops, alpha_only=True, lowercase=True)
+    codes, offsets, vocabulary = artifact.encode(keep, artifact.lowercase_vocabulary())
+    result = top_collocations(codes, offsets, vocabulary, window_size=window_size, max_words=max_words)
+    # Same bigrams, counts and order (ties keep first appearance).
+    assert list(result.items()) == list(expected.items())
+
+
+@pytest.mark.parametrize("measure", ["pmi", "likelihood_ratio"])
+@pytest.mark.parametrize("window_size", [2, 3])
+def test_association_scores_match_nltk(measure, window_size):
+    from nltk.collocations import BigramAssocMeasures, BigramCollocationFinder
+
+    words = ("the cat sat on the mat and the dog sat on the cat while the bird sang on the mat "
+             "and the cat sang").split()
+    finder = BigramCollocationFinder.from_words(words, window_size=window_size)
+    expected = dict(finder.score_ngrams(getattr(BigramAssocMeasures, measure)))
+
+    bigrams = list(expected)
+    scores = association_scores(
+        measure,
+        np.array([finder.ngram_fd[bigram] for bigram in bigrams], dtype=np.float64),
+        np.array([finder.word_fd[first] for first, _ in bigrams]),
+        np.array([finder.word_fd[second] for _, second in bigrams]),
+        len(words),
+        window_size
+    )
+    assert scores == pytest.approx([expected[bigram] for bigram in bigrams], rel=1e-12, abs=1e-12)
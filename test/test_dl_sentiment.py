@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from dl_sentiment import SentimentEngine, plan_batches
+
+
+@pytest.mark.parametrize("token_budget,max_batch_size", [(64, 8), (100, 3), (512, 64)])
+def test_plan_batches_respects_budget_and_size(token_budget, max_batch_size):
+    lengths = np.random.default_rng(0).integers(1, 150, 300)
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= max_batch_size
+        if len(batch) > 1:
+            assert len(batch) * lengths[batch].max() <= token_budget
+    # Rows longer than the budget always run alone.
+    for batch in batches:
+        if lengths[batch].max() > token_budget:
+            assert len(batch) == 1
+
+
+def test_plan_batches_groups_similar_lengths():
+    lengths = np.array([5, 50, 6, 49, 5, 51])
+    assert plan_batches(lengths, token_budget=160, max_batch_size=3) == [[0, 4, 2], [3, 1, 5]]
+
+
+class CountingTokenizer:
+    pad_token_id = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, truncation=True, max_length=512):
+        self.calls.append(list(texts))
+        return {"input_ids": [[1] * len(text.split()) for text in texts]}
+
+
+class LengthSession:
+    # Stands in for an ONNX session: "Positive" for texts of even length.
+    def __init__(self):
+        self.shapes = []
+
+    def run(self, outputs, inputs):
+        self.shapes.append(inputs["input_ids"].shape)
+        even = inputs["attention_mask"].sum(axis=1) % 2 == 0
+        return [np.stack([np.where(even, -1.0, 1.0), np.where(even, 1.0, -1.0)], axis=1)]
+
+
+def test_predict_runs_identical_texts_once():
+    engine = SentimentEngine.__new__(SentimentEngine)
+    engine.tokenizer = CountingTokenizer()
+    engine.session = LengthSession()
+    engine.backend = "onnx"
+    engine.max_length = 512
+    engine.id2label = {0: "NEGATIVE", 1: "POSITIVE"}
+    engine.num_labels = 2
+    engine.multi_label = False
+
+    texts = ["a b", "a b c", "a b", "a b c d", "a b c", "a b"]
+    labels, scores, report = engine.predict(texts, token_budget=6, max_batch_size=2)
+
+    assert engine.tokenizer.calls == [["a b", "a b c", "a b c d"]]
+    assert report["distinct_texts"] == 3 and report["rows"] == 6
+    assert list(labels) == ["POSITIVE", "NEGATIVE", "POSITIVE", "POSITIVE", "NEGATIVE", "POSITIVE"]
+    assert np.allclose(scores, 1 / (1 + np.exp(-2.0)))
+    assert all(rows * width <= 6 or rows == 1 for rows, width in engine.session.shapes)
@@ -0,0 +1,70 @@
+import pytest
+
+import app as app_module
+from llm_cache import LLMLabelCache, label_cache_key
+from llm_inference import LLMBatchRunner
+from ollama_stub import start_stub_server, stub_label
+
+TEXTS = [
+    "Great phone, I love it",
+    "Terrible battery, it stopped working",
+    "It is a phone",
+    "Fast delivery and works perfectly",
+    "Broken on arrival, waste of money",
+    "Arrived on Tuesday",
+    "Excellent, would recommend",
+]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server, url = start_stub_server(port=0, **options)
+        servers.append(server)
+        return server.RequestHandlerClass, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def run(url, texts, pack_size=1, parallelism=2, cache=None):
+    runner = LLMBatchRunner("stub", parallelism=parallelism, pack_size=pack_size, backoff_seconds=0.01, host=url)
+    return runner.run(
+        texts, app_module.build_zero_shot_prompt, app_module.build_packed_zero_shot_prompt,
+        cache=cache,
+        cache_key_fn=lambda text: label_cache_key("stub", app_module.ZERO_SHOT_PROMPT_VERSION, None, text)
+    )
+
+
+def test_packed_labels_keep_input_order(stub):
+    handler, url = stub()
+    labels, report = run(url, TEXTS, pack_size=3)
+    assert labels == [stub_label(text) for text in TEXTS]
+    # Three packs, each answered with one JSON list.
+    assert handler.requests_served == 3
+    assert report["requests"] == 3
+
+
+def test_request_is_retried_after_server_error(stub):
+    handler, url = stub(fail_first=1)
+    labels, report = run(url, TEXTS[:2], parallelism=1)
+    assert labels == [stub_label(text) for text in TEXTS[:2]]
+    assert handler.requests_received == 3
+    assert report["retries"] == 1
+
+
+def test_cached_labels_skip_the_server(stub, tmp_path):
+    handler, url = stub()
+    cache = LLMLabelCache(str(tmp_path / "labels.sqlite3"))
+    first, _ = run(url, TEXTS, cache=cache)
+    assert handler.requests_served == len(TEXTS)
+
+    second, report = run(url, TEXTS + ["Poor quality"], cache=cache)
+    assert second[:len(TEXTS)] == first
+    assert report["cache_hits"] == len(TEXTS)
+    # Only the new text went to the server.
+    assert handler.requests_served == len(TEXTS) + 1
@@ -0,0 +1,39 @@
+import io
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import compute_column_stats
+from profiling import StreamingProfiler
+
+
+def assert_stats_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for column, column_stats in expected.items():
+        assert actual[column].keys() == column_stats.keys(), column
+        for name, value in column_stats.items():
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(actual[column][name]), (column, name)
+            else:
+                assert actual[column][name] == pytest.approx(value, rel=1e-12), (column, name)
+
+
+def test_streaming_profile_matches_whole_frame_stats():
+    rng = np.random.default_rng(0)
+    rows = 103
+    frame = pd.DataFrame({
+        "rating": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(1, 6, rows)),
+        "review": [None if i % 17 == 0 else "word " * int(rng.integers(1, 9)) + str(i % 40) for i in range(rows)],
+        "empty": [np.nan] * rows,
+    })
+    csv_bytes = frame.to_csv(index=False).encode("utf-8")
+
+    profiler = StreamingProfiler()
+    for chunk in pd.read_csv(io.BytesIO(csv_bytes), chunksize=10, dtype=str):
+        profiler.update(chunk)
+    expected = compute_column_stats(pd.read_csv(io.BytesIO(csv_bytes)))
+
+    assert [expected[column]["type"] for column in frame.columns] == ["Numeric", "Textual", "Numeric"]
+    assert_stats_equal(profiler.stats(), expected)
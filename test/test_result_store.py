@@ -0,0 +1,79 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import app as app_module
+from result_store import ResultSet, ResultStore
+
+LABELS = ["Positive", "Negative", "Neutral"]
+
+
+def make_result(rows=25):
+    labels = [LABELS[i % 3] for i in range(rows)]
+    scores = np.linspace(-1, 1, rows, dtype=np.float32)
+    scores[0] = 0.1
+    return ResultSet.from_labels("a" * 32, "review", np.arange(rows) * 2, labels, scores, {"aspect": "battery"})
+
+
+def reload(result, tmp_path):
+    # Written by one store, read back by another with an empty memory cache.
+    result_id = ResultStore(str(tmp_path)).put(result)
+    return ResultStore(str(tmp_path)).get(result_id)
+
+
+def test_round_trip_pages_and_exports(tmp_path):
+    original = make_result()
+    result = reload(original, tmp_path)
+    texts = pd.Series([f"text {i}" for i in range(60)])
+
+    assert len(result) == 25
+    expected = original.columns(texts=texts)
+    assert result.columns(texts=texts) == expected
+    assert list(expected) == ["row", "text", "aspect", "sentiment", "score"]
+    # Shortest float32 repr: 0.1, not 0.10000000149011612.
+    assert expected["score"][0] == 0.1
+    pages = [result.columns(start, start + 10) for start in range(0, 25, 10)]
+    assert [len(page["row"]) for page in pages] == [10, 10, 5]
+    assert sum((page["row"] for page in pages), []) == list(range(0, 50, 2))
+    assert result.columns(30, 40)["row"] == []
+
+    csv = pd.read_csv(io.StringIO("".join(result.iter_csv(texts, chunk_rows=7))))
+    assert csv["row"].tolist() == expected["row"]
+    assert csv["score"].tolist() == pytest.approx(expected["score"])
+    ndjson = [json.loads(line) for line in "".join(result.iter_ndjson(5, 12, texts, chunk_rows=3)).splitlines()]
+    assert [line["row"] for line in ndjson] == expected["row"][5:12]
+    assert ndjson[0] == {name: values[5] for name, values in expected.items()}
+    parquet = pq.read_table(io.BytesIO(b"".join(result.iter_parquet(texts, chunk_rows=7))))
+    assert parquet.num_rows == 25 and parquet.column("sentiment").to_pylist() == expected["sentiment"]
+
+
+def test_empty_result_exports_header_only(tmp_path):
+    result = reload(ResultSet.from_labels("a" * 32, "review", [], [], None), tmp_path)
+    assert len(result) == 0
+    assert "".join(result.iter_csv()).strip() == "row,sentiment"
+    assert "".join(result.iter_ndjson()) == ""
+    parquet = pq.read_table(io.BytesIO(b"".join(result.iter_parquet())))
+    assert parquet.num_rows == 0 and parquet.column_names == ["row", "sentiment"]
+
+
+def test_results_route_follows_cursor():
+    result_id = app_module.result_store.put(make_result())
+    client = app_module.app.test_client()
+    rows, cursor = [], 0
+    while cursor is not None:
+        page = client.get(f"/results/{result_id}?cursor={cursor}&limit=10").get_json()
+        assert page["total"] == 25 and page["cursor"] == cursor
+        rows += page["columns"]["row"]
+        cursor = page["nextCursor"]
+    assert rows == list(range(0, 50, 2))
+
+    ndjson = client.get(f"/results/{result_id}?format=ndjson&cursor=20").get_data(as_text=True)
+    assert [json.loads(line)["row"] for line in ndjson.splitlines()] == list(range(40, 50, 2))
+    for export_format in ("csv", "parquet", "ndjson"):
+        response = client.get(f"/results/{result_id}/export?format={export_format}")
+        assert response.status_code == 200 and response.get_data()
+    assert client.get("/results/" + "0" * 32).status_code == 404
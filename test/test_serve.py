@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+import app as app_module
+import sentiment_engine
+from jobs import JobManager, report_progress
+from serve import AnalysisPool
+
+ROUTE = "/process/sentiment"
+
+
+def counting_view(path, params):
+    # Stands in for a route: reports progress step by step, so it can be
+    # followed and cancelled from the server process.
+    for done in range(1, params["steps"] + 1):
+        report_progress(done, params["steps"], {"pid": os.getpid()})
+        time.sleep(params.get("delay", 0.02))
+    return {"pid": os.getpid(), "maxJobs": sentiment_engine.MAX_JOBS}, 200
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # Workers are forked, so they run the patched view.
+    original = app_module.run_view_as_job
+    app_module.run_view_as_job = counting_view
+    manager = JobManager()
+    pool = AnalysisPool(2, [ROUTE], manager).start()
+    try:
+        yield pool, manager
+    finally:
+        pool.shutdown(timeout=10)
+        manager.shutdown(timeout=10)
+        app_module.run_view_as_job = original
+
+
+def test_progress_is_forwarded_from_worker(pool):
+    pool, manager = pool
+    job = manager.submit("sentiment", ROUTE, lambda: pool.run(ROUTE, {"steps": 5}))
+    assert wait_for(lambda: job.status == "succeeded")
+    assert job.result["pid"] != os.getpid()
+    assert job.result["maxJobs"] == max(1, (os.cpu_count() or 1) // 2)
+    assert wait_for(lambda: job.done == 5 and job.total == 5)
+
+
+def test_cancel_reaches_worker(pool):
+    pool, manager = pool
+    job = manager.submit("sentiment", ROUTE, lambda: pool.run(ROUTE, {"steps": 10000, "delay": 0.01}))
+    assert wait_for(lambda: job.done > 0)
+    manager.cancel(job.id)
+    assert wait_for(lambda: job.status == "cancelled", timeout=10)
+    assert job.done < 10000
+    # The worker is free again afterwards.
+    assert pool.run(ROUTE, {"steps": 1})[1] == 200
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from text_artifacts import column_texts
+from topic_store import TopicModelStore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "amazon_review_29012025.csv")
+CASES = [("lda", "frozen"), ("nmf", "frozen"), ("nmf", "hashing")]
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return column_texts(pd.read_csv(CSV_PATH)["reviewText"])[:600]
+
+
+@pytest.mark.parametrize("method,vocabulary", CASES)
+def test_create_update_transform(tmp_path, texts, method, vocabulary):
+    store = TopicModelStore(str(tmp_path))
+    created = store.create(texts[:400], method, 4, vocabulary=vocabulary, n_features=2 ** 12)
+    model_id = created.model_id
+    first_topics = created.topics(5)
+
+    updated = store.update(model_id, texts[400:])
+    assert updated.documents == 600 and updated.updates == 1
+    assert len(updated.topics(5)) == 4 and updated.topics(5) != first_topics
+
+    # A new store reads the update back from disk.
+    reloaded = TopicModelStore(str(tmp_path)).get(model_id)
+    assert reloaded.info()["documents"] == 600
+    assert reloaded.topics(5) == updated.topics(5)
+    topic_model, doc_topics = TopicModelStore(str(tmp_path)).transform(model_id, texts[:10])
+    assert doc_topics.shape == (10, 4)
+    assert np.allclose(doc_topics, updated.transform(texts[:10]))
+
+
+@pytest.mark.parametrize("method,vocabulary", CASES)
+def test_failed_update_leaves_model_unchanged(tmp_path, texts, monkeypatch, method, vocabulary):
+    from sklearn.decomposition import LatentDirichletAllocation, MiniBatchNMF
+
+    store = TopicModelStore(str(tmp_path))
+    model_id = store.create(texts[:400], method, 4, vocabulary=vocabulary, n_features=2 ** 12).model_id
+    before = store.get(model_id)
+    info, topics, token_counts = before.info(), before.topics(5), dict(before.token_counts)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("fit failed")
+
+    estimator = LatentDirichletAllocation if method == "lda" else MiniBatchNMF
+    monkeypatch.setattr(estimator, "partial_fit", fail)
+    with pytest.raises(RuntimeError):
+        store.update(model_id, texts[400:])
+    monkeypatch.undo()
+
+    cached = store.get(model_id)
+    assert cached.info() == info
+    assert cached.topics(5) == topics
+    assert dict(cached.token_counts) == token_counts
+    assert store.update(model_id, texts[400:]).documents == 600